@@ -0,0 +1,56 @@
+import hashlib
+
+import pytest
+import allure
+
+from common.assertions import assert_ndjson_records, assert_status_code
+from common.logger import logger
+from core.streaming import iter_ndjson
+
+EXPORT_COUNT = 20000
+
+
+@pytest.fixture
+def requires_mock_server(mock_server):
+    """导出和上传接口只有本地模拟服务提供 (reqres.in 没有)"""
+    if mock_server is None:
+        pytest.skip("streaming endpoints require --mock-server")
+
+
+@allure.feature("Streaming")
+@pytest.mark.usefixtures("requires_mock_server")
+class TestStreaming:
+
+    @allure.story("NDJSON Export")
+    @allure.title("Test asserting a streamed NDJSON export record by record")
+    @pytest.mark.api
+    def test_export_ndjson(self, api_client):
+        """
+        流式读取 NDJSON 导出接口，逐条断言，响应体不整体读入内存
+        对应接口: GET /api/users/export
+        """
+        logger.info("Starting test: test_export_ndjson")
+        with api_client.stream('GET', '/users/export', params={'count': EXPORT_COUNT}) as response:
+            assert_status_code(response, 200)
+            assert_ndjson_records(iter_ndjson(response), keys=['id', 'email', 'first_name'], schema='user.json',
+                                  expected_count=EXPORT_COUNT)
+        logger.info("Test test_export_ndjson finished successfully.")
+
+    @allure.story("Chunked Upload / Download")
+    @allure.title("Test uploading a generated body and downloading an export with checksum")
+    @pytest.mark.api
+    def test_upload_and_download(self, api_client, tmp_path):
+        """
+        分块上传生成器产出的数据，服务端返回的 sha256 应与发送的内容一致；
+        下载导出文件并校验 sha256
+        """
+        chunks = [bytes([index]) * 65536 for index in range(16)]
+        response = api_client.upload('/uploads', iter(chunks))
+        assert_status_code(response, 201)
+        assert response.json() == {'size': 16 * 65536, 'sha256': hashlib.sha256(b''.join(chunks)).hexdigest()}
+
+        with api_client.stream('GET', '/users/export', params={'count': 100}) as response:
+            expected = hashlib.sha256(response.content).hexdigest()
+        result = api_client.download('/users/export', tmp_path / 'export.ndjson', checksum=expected,
+                                     params={'count': 100})
+        assert result.size == (tmp_path / 'export.ndjson').stat().st_size
@@ -3,34 +3,37 @@ import allure
 import requests
 # from core.api_client import api_client # 导入封装好的 client
 from common.logger import logger
-from common.read_yaml import read_yaml
+from common.read_yaml import load_case_refs
+from common.reporting import dynamic_description, step
+from common.sharding import select_shard
+from common.utils import excerpt
 # --- 导入封装的断言函数 ---
 from common.assertions import (
     assert_status_code,
     assert_json_value,
     assert_json_keys_exist,
-    assert_payload_in_response
+    assert_payload_in_response,
+    assert_response,
+    assert_json_schema
 )
 
 user_creation_data_path = 'data/user_creation_data.yaml'
 logger.info(f"Loading test data from: {user_creation_data_path}")
-# user_creation_test_data = read_yaml(user_creation_data_path)
-_user_creation_test_data_list = read_yaml(user_creation_data_path) # Use a temporary variable
+# 收集阶段只读取索引 (test_id + 文件偏移)，payload 在用例执行时才由 test_data fixture 加载
+# 分片执行 (--num-shards) 时只保留属于当前分片的行，其他行不会生成用例
+_user_creation_case_refs = select_shard(load_case_refs(user_creation_data_path))
 
 # --- Handle potential loading failure ---
-if _user_creation_test_data_list is None:
+if _user_creation_case_refs is None:
     logger.error(f"FATAL: Failed to load test data from {user_creation_data_path}. Skipping dependent tests.")
     # Assign an empty list to prevent parametrize from crashing during collection
     # Pytest will report 0 tests collected for the parametrized function, indicating a problem.
-    _user_creation_test_data_list = []
+    _user_creation_case_refs = []
     # Alternatively, raise a specific exception to halt collection more explicitly:
     # raise pytest.UsageError(f"Failed to load test data from {user_creation_data_path}")
 
-# --- 提取测试 ID (only if data loaded successfully) ---
-if _user_creation_test_data_list: # Check if list is not empty
-    test_ids = [data.get('test_id', f'data_index_{i}') for i, data in enumerate(_user_creation_test_data_list)]
-else:
-    test_ids = [] # Empty list if data loading failed
+# --- 提取测试 ID (直接来自索引，不需要反序列化 payload) ---
+test_ids = [ref.case_id for ref in _user_creation_case_refs]
 
 # 使用 Allure 来更好地组织报告
 @allure.feature("User Management") # 功能模块
@@ -82,21 +85,38 @@ class TestUsers:
 
         response = api_client.get(endpoint)
 
-        # --- 使用封装断言 ---
-        assert_status_code(response, 200)
-        assert_json_keys_exist(response, ['data'])
-         # Use the enhanced assertion function with dot notation
-        assert_json_value(response, 'data.id', user_id)
-        assert_json_value(response, 'data.email', 'janet.weaver@reqres.in') # Example of asserting another nested value
-        assert_json_value(response, 'data.first_name', 'Janet')
-
-        # If you wanted to assert keys within 'data', you might need a helper or assert them individually
-        # Option: Assert individual keys exist within 'data'
-        assert_json_value(response, 'data.last_name', 'Weaver') # Implicitly checks existence too
-        # Or, create a helper assert_json_path_keys_exist(response, 'data', ['email', 'first_name', ...]) if needed often
+        # --- 使用批量断言: 一次遍历完成所有检查，一次性报告所有不匹配项 ---
+        assert_response(
+            response,
+            status_code=200,
+            keys={'': ['data'], 'data': ['email', 'first_name', 'last_name', 'avatar']},
+            values={
+                'data.id': user_id,
+                'data.email': 'janet.weaver@reqres.in',
+                'data.first_name': 'Janet',
+                'data.last_name': 'Weaver',
+            },
+        )
+        assert_json_schema(response, 'single_user.json')
         logger.info("Test test_get_single_user_found finished successfully.")
 
 
+    @allure.story("Get User List")
+    @allure.title("Test user list page matches the list and user schemas")
+    @pytest.mark.api
+    def test_list_users_schema(self, api_client):
+        """
+        校验分页接口的响应结构，以及列表中每个用户的结构
+        对应接口: GET /api/users?page=2
+        """
+        logger.info("Starting test: test_list_users_schema")
+        response = api_client.get("/users", params={'page': 2})
+
+        assert_status_code(response, 200)
+        assert_json_schema(response, 'user_list.json')
+        assert_json_schema(response, 'user.json', items_path='data')
+        logger.info("Test test_list_users_schema finished successfully.")
+
     @allure.story("Get Single User")
     @allure.title("Test getting a single non-existing user (ID 23)")
     @pytest.mark.api
@@ -113,18 +133,38 @@ class TestUsers:
 
         assert_status_code(response, 404) # 断言状态码为 404
         # 断言响应体中包含预期的错误信息
-        with allure.step("Verify response body is empty JSON object"):
+        with step("Verify response body is empty JSON object"):
              assert response.text == '{}' or response.text == '', \
-                   f"Expected empty body or '{{}}' for 404, got: {response.text}"
+                   f"Expected empty body or '{{}}' for 404, got: {excerpt(response.text)}"
 
         logger.info("Test test_get_single_user_not_found finished successfully.")
+
+    @allure.story("Get Single User")
+    @allure.title("Test getting many users concurrently with the async client")
+    @pytest.mark.api
+    def test_get_users_concurrently(self, async_api_client):
+        """
+        使用 async_api_client 并发获取用户 1~12 和一个不存在的用户，响应顺序与请求顺序一致
+        对应接口: GET /api/users/{id}
+        """
+        logger.info("Starting test: test_get_users_concurrently")
+        user_ids = list(range(1, 13)) + [23]
+        responses = async_api_client.run(
+            async_api_client.gather(async_api_client.get(f"/users/{user_id}") for user_id in user_ids)
+        )
+
+        for user_id, response in zip(user_ids[:-1], responses):
+            assert_status_code(response, 200)
+            assert_json_value(response, 'data.id', user_id)
+        assert_status_code(responses[-1], 404)
+        logger.info("Test test_get_users_concurrently finished successfully.")
         
     #数据驱动创建用户测试
     @allure.story("Create User（数据驱动）")
     @allure.title("Test creating a user with data from YAML file")
     @pytest.mark.api
     @pytest.mark.regression # 可以标记为回归测试
-    @pytest.mark.parametrize("test_data", _user_creation_test_data_list, ids=test_ids) # 使用 parametrize 进行数据驱动测试
+    @pytest.mark.parametrize("test_data", _user_creation_case_refs, ids=test_ids, indirect=True) # 使用 parametrize 进行数据驱动测试 (test_data fixture 负责加载)
     def  test_create_user_data_driven(self, api_client, test_data): # <--- 接收 test_data 参数
         """
         数据驱动测试创建新用户的功能
@@ -140,12 +180,12 @@ class TestUsers:
         # 在 Allure 报告和日志中包含描述信息
         logger.info(f"Starting test: {description}")
         logger.debug(f"Test Data: {test_data}")
-        allure.dynamic.description(f"Test Scenario: {description}<br>Payload: {payload}") # 动态设置描述
+        dynamic_description(f"Test Scenario: {description}<br>Payload: {payload}") # 动态设置描述 (过长时截断)
 
         endpoint = "/users"
 
         # 发送 POST 请求
-        with allure.step(f"Send POST request to {endpoint} with payload: {payload}"):
+        with step(f"Send POST request to {endpoint} with payload: {payload}", level='summary'):
             response = api_client.post(endpoint, json=payload)
 
         # --- 使用封装断言 ---
@@ -157,15 +197,17 @@ class TestUsers:
              # 断言其他必须存在的 key
              if expected_keys:
                  assert_json_keys_exist(response, expected_keys)
+             # 服务端生成的字段 (id / createdAt) 的类型
+             assert_json_schema(response, 'created_user.json')
              logger.info(f"User '{payload.get('name')}' creation seems successful.")
         else: # 失败场景
              # (需要添加处理失败场景的断言函数, e.g., assert_error_message_contains)
              if expected_error:
-                 with allure.step(f"Verify error message contains '{expected_error}'"):
+                 with step(f"Verify error message contains '{expected_error}'"):
                       logger.info(f"Asserting error message contains: {expected_error}")
                       # 简单的实现：直接检查文本
                       assert expected_error in response.text, \
-                             f"Expected error '{expected_error}' not found in response: {response.text}"
+                             f"Expected error '{expected_error}' not found in response: {excerpt(response.text)}"
              else:
                  logger.info("No specific error message assertion defined for this failure case.")
 
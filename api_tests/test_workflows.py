@@ -0,0 +1,32 @@
+import glob
+import os
+
+import pytest
+import allure
+
+from common.logger import logger
+from core.workflow import Workflow
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+workflow_files = sorted(os.path.relpath(path, PROJECT_ROOT).replace(os.sep, '/')
+                        for path in glob.glob(os.path.join(PROJECT_ROOT, 'data', 'workflows', '*.yaml')))
+
+
+@allure.feature("Workflows")
+class TestWorkflows:
+
+    @allure.story("Stateful API Workflow")
+    @allure.title("Test running a dependent API workflow from YAML")
+    @pytest.mark.api
+    @pytest.mark.regression
+    @pytest.mark.parametrize("workflow_file", workflow_files,
+                             ids=[os.path.splitext(os.path.basename(path))[0] for path in workflow_files])
+    def test_workflow(self, workflow_runner, workflow_file):
+        """
+        按依赖关系执行 data/workflows/ 下的工作流: 无依赖的链并发执行，链内保持顺序
+        """
+        workflow = Workflow.from_yaml(workflow_file)
+        logger.info(f"Starting workflow test: {workflow.name} ({workflow_file})")
+        result = workflow_runner.run(workflow)
+        result.verify()
+        logger.info(f"Workflow '{workflow.name}' finished successfully.")
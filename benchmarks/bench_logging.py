@@ -0,0 +1,99 @@
+# benchmarks/bench_logging.py
+"""
+测量 ApiClient 在不同日志级别下每个请求的额外开销。
+
+请求不经过网络: Session 上挂载一个直接返回预置响应的 adapter，
+因此测到的是客户端本身 (header 合并、耗时统计、日志) 的开销。
+每个日志级别在独立的子进程中运行，日志写入临时目录，控制台输出被丢弃。
+
+用法 (在项目根目录执行):
+    python -m benchmarks.bench_logging
+    python -m benchmarks.bench_logging --requests 5000 --body-kb 256
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEVELS = ('TRACE', 'DEBUG', 'INFO', 'WARNING')
+
+
+def _canned_adapter(body):
+    import requests
+    from requests.adapters import BaseAdapter
+
+    class CannedAdapter(BaseAdapter):
+        """不发起网络请求，直接返回固定响应"""
+
+        def send(self, request, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response._content = body
+            response.encoding = 'utf-8'
+            response.headers['Content-Type'] = 'application/json'
+            response.url = request.url
+            response.request = request
+            return response
+
+        def close(self):
+            pass
+
+    return CannedAdapter()
+
+
+def run_worker(requests_count, body_kb):
+    """子进程入口: 按当前环境变量中的日志级别发送 requests_count 个请求，输出每个请求的平均微秒数"""
+    import contextlib
+    from core.api_client import ApiClient
+
+    items = [{'id': i, 'email': f'user{i}@example.com', 'first_name': 'Janet', 'last_name': 'Weaver'}
+             for i in range(max(body_kb * 1024 // 90, 1))]
+    body = json.dumps({'data': items}).encode('utf-8')
+    payload = {'name': 'morpheus', 'job': 'leader', 'items': items[:50]}
+
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        client = ApiClient()
+        client.session.mount('http://', _canned_adapter(body))
+        client.base_url = 'http://bench.local/api'
+        for _ in range(50):  # 预热
+            client.post('/users', json=payload)
+        start = time.perf_counter()
+        for _ in range(requests_count):
+            client.post('/users', json=payload)
+        elapsed = time.perf_counter() - start
+    print(json.dumps({'us_per_request': elapsed / requests_count * 1e6}))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-request logging overhead of ApiClient.")
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--body-kb', type=int, default=64, help="响应体大小 (KB)")
+    parser.add_argument('--levels', nargs='+', default=list(LEVELS))
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.requests, args.body_kb)
+        return
+
+    print(f"{'level':<8} | {'us/request':>10}")
+    with tempfile.TemporaryDirectory() as log_dir:
+        for level in args.levels:
+            env = {**os.environ,
+                   'AUTODEMO__LOGGING__LEVEL': level,
+                   'AUTODEMO__LOGGING__FILE_PATH': os.path.join(log_dir, f'bench-{level}.log')}
+            output = subprocess.run(
+                [sys.executable, '-m', 'benchmarks.bench_logging', '--worker',
+                 '--requests', str(args.requests), '--body-kb', str(args.body_kb)],
+                cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{level:<8} | {result['us_per_request']:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+# benchmarks/bench_parallel.py
+"""
+对比不同 xdist worker 数量下的测试执行耗时。
+
+用法 (在项目根目录执行):
+    python -m benchmarks.bench_parallel
+    python -m benchmarks.bench_parallel --workers 1 2 4 8 --target api_tests -- -m regression
+    # 不访问网络: 每个 worker 各自启动一个本地模拟服务 (core/mock_server.py)
+    python -m benchmarks.bench_parallel -- --mock-server=subprocess
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_pytest(workers, target, extra_args):
+    """以 -n workers 运行一次 pytest，返回 (耗时秒数, 退出码)"""
+    cmd = [sys.executable, '-m', 'pytest', target, '-q', '-p', 'no:cacheprovider',
+           '-n', str(workers), *extra_args]
+    start = time.perf_counter()
+    result = subprocess.run(cmd, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return time.perf_counter() - start, result.returncode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pytest-xdist speedup across worker counts.")
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8], help="要测试的 worker 数量")
+    parser.add_argument('--target', default='api_tests', help="pytest 运行目标")
+    parser.add_argument('--repeat', type=int, default=1, help="每种 worker 数量重复次数，取最小值")
+    parser.add_argument('pytest_args', nargs='*', help="透传给 pytest 的参数 (放在 -- 之后)")
+    args = parser.parse_args(argv)
+
+    results = []
+    for workers in args.workers:
+        timings = [run_pytest(workers, args.target, args.pytest_args) for _ in range(args.repeat)]
+        best = min(t for t, _ in timings)
+        results.append((workers, best, timings[-1][1]))
+
+    baseline = results[0][1]
+    print(f"{'workers':>8} | {'seconds':>8} | {'speedup':>7} | exit")
+    for workers, seconds, exit_code in results:
+        print(f"{workers:>8} | {seconds:>8.2f} | {baseline / seconds:>6.2f}x | {exit_code}")
+
+
+if __name__ == '__main__':
+    main()
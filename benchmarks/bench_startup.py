@@ -0,0 +1,54 @@
+# benchmarks/bench_startup.py
+"""
+测量框架模块的导入耗时 (冷启动子进程) 以及 pytest 收集阶段耗时。
+
+用法 (在项目根目录执行):
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --repeat 20
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只导入、不使用: 理想情况下不会解析配置，也不会配置日志 sink
+IMPORT_SNIPPET = "import common.read_config, common.logger, common.utils"
+# 导入后第一次使用 logger，包含配置解析和 sink 配置的成本
+FIRST_USE_SNIPPET = IMPORT_SNIPPET + "; from common.logger import logger; logger.debug('x')"
+
+
+def time_subprocess(cmd, repeat):
+    """重复运行命令，返回每次的耗时 (毫秒)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(cmd, cwd=PROJECT_ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark import and collection time of the framework.")
+    parser.add_argument('--repeat', type=int, default=10, help="每项测量的重复次数")
+    parser.add_argument('--target', default='api_tests', help="pytest 收集目标")
+    args = parser.parse_args(argv)
+
+    cases = {
+        'python (empty interpreter)': [sys.executable, '-c', 'pass'],
+        'import common.*': [sys.executable, '-c', IMPORT_SNIPPET],
+        'import + first log call': [sys.executable, '-c', FIRST_USE_SNIPPET],
+        'pytest --collect-only': [sys.executable, '-m', 'pytest', args.target, '--collect-only', '-q',
+                                  '-p', 'no:cacheprovider'],
+    }
+    print(f"{'case':<30} | {'median ms':>9} | {'min ms':>8}")
+    for name, cmd in cases.items():
+        timings = time_subprocess(cmd, args.repeat)
+        print(f"{name:<30} | {statistics.median(timings):>9.1f} | {min(timings):>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
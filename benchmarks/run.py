@@ -0,0 +1,310 @@
+# benchmarks/run.py
+"""
+框架自身开销的基准测试套件与回归门禁。
+
+测量项 (都不访问外网，HTTP 请求发往本地模拟服务 core/mock_server.py 的子进程):
+- client:     每个请求的客户端开销 = ApiClient 耗时 - 裸 requests.Session 耗时
+- assertions: 宽 JSON (几千项的列表) 和深 JSON (多层嵌套) 上的批量断言、schema 校验耗时 (含 JSON 解析)
+- data:       10k / 100k 条用例的 YAML 数据文件: 建立索引 (冷/热)、逐条加载全部用例
+- startup:    导入框架模块、pytest 收集、完整运行 api_tests (有/无 Allure 结果输出) 的耗时
+
+结果写入 JSON 文件 (默认 reports/benchmarks.json)，并与基线 (benchmarks/baseline.json) 比较:
+任一指标比基线慢超过阈值时退出码为 1，CI 中构建失败 (BENCHMARK_GATE 参数，默认打开，见 Jenkinsfile)。
+没有基线时只输出结果，不做比较。
+
+用法 (在项目根目录执行):
+    python -m benchmarks.run
+    python -m benchmarks.run --only client assertions --threshold 0.2
+    python -m benchmarks.run --quick                       # 缩小规模，快速检查
+    python -m benchmarks.run --update-baseline             # 在 CI 机器上重新生成基线
+
+基线与机器相关，必须在运行门禁的同一类 CI agent 上生成，不要提交开发机上生成的基线。
+仓库中没有基线时 CI 会在当前 agent 上生成一份并归档 (阶段标记为 UNSTABLE)，下载后提交即可打开门禁；
+更换 CI agent 或有意接受性能变化时，用 Jenkins 参数 UPDATE_BENCHMARK_BASELINE 重新生成。
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.bench_startup import time_subprocess
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_OUTPUT = os.path.join('reports', 'benchmarks.json')
+DEFAULT_BASELINE = os.path.join('benchmarks', 'baseline.json')
+DEFAULT_THRESHOLD = 0.25
+# 低于该绝对差值的变化视为噪声 (单位与指标相同)，避免几微秒的抖动触发门禁
+NOISE_FLOOR = {'us': 10.0, 'ms': 20.0}
+
+
+def _best_per_call(func, number, repeat=5):
+    """执行 repeat 轮、每轮调用 number 次，返回最快一轮中每次调用的耗时 (秒)"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def _median_ms(cmd, repeat):
+    """重复运行子进程，返回耗时中位数 (毫秒)"""
+    return statistics.median(time_subprocess(cmd, repeat))
+
+
+# --- 基准测试 ---
+
+def bench_client(scale):
+    import requests
+    from core.api_client import ApiClient
+    from core.mock_server import MockServer
+
+    number = int(2000 * scale)
+    server = MockServer.spawn()  # 独立进程，不与被测客户端争抢 GIL
+    session = requests.Session()
+    client = ApiClient()
+    client.base_url = server.base_url
+    url = f"{server.base_url}/users/2"
+    try:
+        raw = _best_per_call(lambda: session.get(url, timeout=10).content, number)
+        wrapped = _best_per_call(lambda: client.get('/users/2').content, number)
+        payload = {'name': 'morpheus', 'job': 'leader'}
+        wrapped_post = _best_per_call(lambda: client.post('/users', json=payload).content, number)
+    finally:
+        session.close()
+        client.close()
+        server.stop()
+    return {
+        'client.raw_session_get_us': (raw * 1e6, 'us'),
+        'client.api_client_get_us': (wrapped * 1e6, 'us'),
+        'client.overhead_get_us': ((wrapped - raw) * 1e6, 'us'),
+        'client.api_client_post_us': (wrapped_post * 1e6, 'us'),
+    }
+
+
+def _canned_response(body):
+    import requests
+
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.encoding = 'utf-8'
+    response.url = 'http://bench.local/api/users'
+    response.request = requests.Request('GET', response.url).prepare()
+    return response
+
+
+def bench_assertions(scale):
+    from common.assertions import assert_json_schema, assert_response
+    from core.mock_server import USERS
+
+    width = int(5000 * scale)
+    items = [{**USERS[index % len(USERS)], 'id': index + 1} for index in range(width)]
+    wide_body = json.dumps({'page': 1, 'data': items}).encode('utf-8')
+    wide_values = {'page': 1, 'data[0].id': 1, f'data[{width - 1}].id': width, 'data[?(@.id == 7)].first_name':
+                   [items[6]['first_name']]}
+
+    depth = 200
+    deep = {'value': 'leaf'}
+    for _ in range(depth):
+        deep = {'child': deep, 'sibling': list(range(10))}
+    deep_body = json.dumps(deep).encode('utf-8')
+    deep_path = '.'.join(['child'] * depth)
+
+    number = max(int(50 * scale), 5)
+    wide = _best_per_call(lambda: assert_response(_canned_response(wide_body), status_code=200, values=wide_values,
+                                                  keys={'data[0]': ['id', 'email']}), number)
+    wide_schema = _best_per_call(
+        lambda: assert_json_schema(_canned_response(wide_body), 'user.json', items_path='data'), number)
+    deep_values = _best_per_call(
+        lambda: assert_response(_canned_response(deep_body), status_code=200,
+                                values={f'{deep_path}.value': 'leaf'}, keys={deep_path: ['value']}), number * 10)
+    return {
+        'assertions.wide_values_us': (wide * 1e6, 'us'),
+        'assertions.wide_schema_us': (wide_schema * 1e6, 'us'),
+        'assertions.deep_values_us': (deep_values * 1e6, 'us'),
+    }
+
+
+def _write_cases(path, rows):
+    with open(path, 'w', encoding='utf-8') as file:
+        for index in range(rows):
+            file.write(f"- test_id: TC{index:06d}_create_user\n"
+                       f"  description: \"Create user {index}\"\n"
+                       f"  payload:\n"
+                       f"    name: \"user{index}\"\n"
+                       f"    job: \"job {index % 17}\"\n"
+                       f"  expected_status: 201\n"
+                       f"  expected_keys: ['name', 'job', 'id', 'createdAt']\n\n")
+
+
+def bench_data(scale):
+    from common.read_yaml import _index_path, load_case_refs, read_yaml
+
+    def best_ms(func, setup=None, repeat=3):
+        timings = []
+        for _ in range(repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return min(timings)
+
+    results = {}
+    with tempfile.TemporaryDirectory() as data_dir:
+        for rows in (10_000, 100_000):
+            label = f"{rows // 1000}k"
+            path = os.path.join(data_dir, f"cases_{label}.yaml")
+            _write_cases(path, max(int(rows * scale), 100))
+            index_path = _index_path(path)
+
+            def drop_index():
+                if os.path.exists(index_path):
+                    os.remove(index_path)
+
+            try:
+                results[f'data.index_cold_{label}_ms'] = (best_ms(lambda: load_case_refs(path), drop_index), 'ms')
+                results[f'data.index_warm_{label}_ms'] = (best_ms(lambda: load_case_refs(path)), 'ms')
+                refs = load_case_refs(path)
+                results[f'data.load_each_{label}_ms'] = (best_ms(lambda: [ref.load() for ref in refs]), 'ms')
+                if rows == 10_000:  # 一次性解析整个文件 (不走索引) 作为对照，100k 行耗时过长不测
+                    results[f'data.read_yaml_{label}_ms'] = (best_ms(lambda: read_yaml(path)), 'ms')
+            finally:
+                drop_index()
+    return results
+
+
+def bench_startup(scale):
+    repeat = max(int(5 * scale), 2)
+    pytest_cmd = [sys.executable, '-m', 'pytest', 'api_tests', '-q', '-p', 'no:cacheprovider']
+    results = {
+        'startup.import_ms': (_median_ms([sys.executable, '-c', 'import conftest'], repeat), 'ms'),
+        'startup.collect_ms': (_median_ms(pytest_cmd + ['--collect-only'], repeat), 'ms'),
+        'startup.run_api_tests_ms': (_median_ms(pytest_cmd + ['--mock-server=inprocess'], repeat), 'ms'),
+    }
+    with tempfile.TemporaryDirectory() as allure_dir:
+        results['startup.run_api_tests_allure_ms'] = (
+            _median_ms(pytest_cmd + ['--mock-server=inprocess', f'--alluredir={allure_dir}', '--clean-alluredir'],
+                       repeat), 'ms')
+    return results
+
+
+BENCHMARKS = {
+    'client': bench_client,
+    'assertions': bench_assertions,
+    'data': bench_data,
+    'startup': bench_startup,
+}
+
+
+# --- 结果与基线 ---
+
+def compare(results, baseline, threshold):
+    """
+    与基线比较，返回 (报告行列表, 回归的指标名列表)。
+    变慢超过 threshold (相对值) 且超过噪声下限 (绝对值) 时视为回归；基线中没有的指标只报告不判断。
+    基线为 0 时相对变化为无穷大，是否回归只取决于噪声下限。
+    """
+    lines = [f"{'metric':<36} | {'baseline':>10} | {'current':>10} | {'change':>8}"]
+    regressions = []
+    baseline_results = baseline.get('results', {}) if baseline else {}
+    for name, current in sorted(results.items()):
+        previous = baseline_results.get(name)
+        if previous is None:
+            lines.append(f"{name:<36} | {'-':>10} | {current['value']:>10.1f} | {'new':>8}")
+            continue
+        delta = current['value'] - previous['value']
+        if previous['value']:
+            change = delta / abs(previous['value'])  # 差值类指标 (e.g., overhead) 的基线可能为负
+        else:
+            change = math.copysign(math.inf, delta) if delta else 0.0  # 基线为 0 时只由噪声下限判断
+        regressed = change > threshold and delta > NOISE_FLOOR.get(current['unit'], 0.0)
+        if regressed:
+            regressions.append(name)
+        lines.append(f"{name:<36} | {previous['value']:>10.1f} | {current['value']:>10.1f} | {change:>+7.0%}"
+                     f"{'  REGRESSION' if regressed else ''}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the framework's own overhead and gate regressions.")
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help="只运行指定的基准测试")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="结果 JSON 文件")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="基线 JSON 文件")
+    parser.add_argument('--threshold', type=float, default=None,
+                        help=f"允许的相对变慢比例，默认使用基线文件中的 threshold (没有时为 {DEFAULT_THRESHOLD})")
+    parser.add_argument('--update-baseline', action='store_true', help="把本次结果写为新的基线")
+    parser.add_argument('--quick', action='store_true', help="缩小规模 (结果不能与完整规模的基线比较)")
+    args = parser.parse_args(argv)
+
+    # 框架日志写入临时目录 (子进程中的 pytest 同样继承)，不污染 logs/runtime.log
+    log_dir = tempfile.mkdtemp(prefix='autodemo-bench-')
+    os.environ.setdefault('AUTODEMO__LOGGING__FILE_PATH', os.path.join(log_dir, 'bench.log'))
+    os.environ.setdefault('AUTODEMO__LOGGING__LEVEL', 'INFO')
+    sys.path.insert(0, PROJECT_ROOT)
+    os.chdir(PROJECT_ROOT)
+
+    scale = 0.1 if args.quick else 1.0
+    results = {}
+    for name in args.only or BENCHMARKS:
+        print(f"Running benchmark '{name}'...", flush=True)
+        start = time.perf_counter()
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):  # 丢弃框架的控制台日志
+            measured = BENCHMARKS[name](scale)
+        for metric, (value, unit) in measured.items():
+            results[metric] = {'value': round(value, 3), 'unit': unit}
+        print(f"  done in {time.perf_counter() - start:.1f}s", flush=True)
+
+    document = {
+        'meta': {
+            'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'scale': scale,
+        },
+        'results': results,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w', encoding='utf-8') as file:
+        json.dump(document, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.update_baseline:
+        document['threshold'] = DEFAULT_THRESHOLD if args.threshold is None else args.threshold
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(document, file, indent=2)
+            file.write('\n')
+        print(f"Baseline updated: {args.baseline}")
+        return 0
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r', encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline.get('meta', {}).get('scale') != scale:
+            print(f"Baseline scale {baseline.get('meta', {}).get('scale')} differs from {scale}, not comparing.")
+            baseline = None
+    else:
+        print(f"No baseline at {args.baseline}, not comparing (generate one on the CI agent with --update-baseline).")
+    threshold = args.threshold
+    if threshold is None:
+        threshold = (baseline or {}).get('threshold', DEFAULT_THRESHOLD)
+    lines, regressions = compare(results, baseline, threshold)
+    print("\n".join(lines))
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,9 +1,28 @@
 # common/assertions.py
-import pytest
-import allure
-from common.logger import logger
 import requests # requests.Response 类型提示
+from common.expectations import ExpectationSet
+from common.logger import logger
+from common.metrics import latency_registry
+from common.reporting import step
+from common.schema import validate_document, validate_response
+from common.utils import excerpt
+
 
+def assert_response(response: requests.Response, status_code: int = None, values: dict = None,
+                    keys=None, payload: dict = None, description: str = None):
+    """
+    批量断言: 在一次遍历中检查状态码、多个 JSON 路径的值、必须存在的键以及 payload 回显，
+    作为一个 Allure 步骤上报，并一次性报告所有不匹配项。
+
+    :param response: requests 返回的 Response 对象
+    :param status_code: 预期的 HTTP 状态码
+    :param values: {json_path: expected_value}，e.g., {'data.id': 2, 'data.first_name': 'Janet'}
+    :param keys: 必须存在的键列表 (根对象)，或 {json_path: [keys]}
+    :param payload: 请求 payload，其中的键值应原样出现在响应中
+    :param description: 自定义 Allure 步骤标题
+    """
+    ExpectationSet(status_code=status_code, values=values, keys=keys, payload=payload,
+                   description=description).verify(response)
 
 
 def assert_status_code(response: requests.Response, expected_code: int):
@@ -13,79 +32,23 @@ def assert_status_code(response: requests.Response, expected_code: int):
     :param response: requests 返回的 Response 对象
     :param expected_code: 预期的 HTTP 状态码
     """
-    step_desc = f"Verify response status code is {expected_code}"
-    logger.info(step_desc)
-    with allure.step(step_desc):
-        actual_code = response.status_code
-        assert actual_code == expected_code, \
-            f"Assertion Failed: Expected status code {expected_code}, but got {actual_code}. " \
-            f"URL: {response.request.url}, Response: {response.text[:500]}..." # 限制响应文本长度
+    ExpectationSet(status_code=expected_code).verify(response)
+
 
 def assert_json_value(response: requests.Response, json_path: str, expected_value):
     """
     断言响应体 JSON 中指定路径 (支持点号'.'分隔) 的值是否符合预期。
 
     :param response: requests 返回的 Response 对象
-    :param json_path: JSON 路径字符串 (e.g., 'page', 'data.id', 'data.0.email' for lists - see note)
-                      NOTE: Simple list index access like 'data.0.email' is added.
-                      For more complex queries, consider libraries like jsonpath-ng.
+    :param json_path: JSON 路径字符串 (e.g., 'page', 'data.id', 'data.0.email' for lists)
+                      路径会被编译并缓存，还支持通配符/切片/过滤器，
+                      e.g., 'data[*].id', 'data[0:3].email', 'data[?(@.id == 2)].email'，
+                      这类多值路径的实际值是所有匹配值组成的列表。详见 common/json_path.py
     :param expected_value: 预期的值
     """
-    step_desc = f"Verify JSON value at path '{json_path}' is '{expected_value}'"
-    logger.info(step_desc)
-    with allure.step(step_desc):
-        try:
-            response_json = response.json()
-            logger.debug(f"Asserting on JSON: {response_json}")
-            keys = json_path.split('.')
-            actual_value = response_json
-            current_path_str = "root"
-
-            for key in keys:
-                logger.debug(f"Navigating: current path='{current_path_str}', next key='{key}', current value type='{type(actual_value)}'")
-                if isinstance(actual_value, dict):
-                    if key in actual_value:
-                        actual_value = actual_value[key]
-                        current_path_str += f".{key}"
-                    else:
-                        pytest.fail(f"Assertion Failed: Key '{key}' not found at path '{current_path_str}' in JSON. "
-                                    f"Available keys: {list(actual_value.keys())}. Full JSON: {response_json}")
-                elif isinstance(actual_value, list):
-                    try:
-                        # Try interpreting the key as an integer index for lists
-                        index = int(key)
-                        if 0 <= index < len(actual_value):
-                            actual_value = actual_value[index]
-                            current_path_str += f".[{index}]" # Indicate list access in path
-                        else:
-                             pytest.fail(f"Assertion Failed: Index {index} out of bounds for list at path '{current_path_str}'. "
-                                         f"List size: {len(actual_value)}. Full JSON: {response_json}")
-                    except ValueError:
-                        # Key is not a valid integer index for the list
-                        pytest.fail(f"Assertion Failed: Key '{key}' is not a valid integer index for list at path '{current_path_str}'. "
-                                    f"Full JSON: {response_json}")
-                else:
-                    # We are trying to access a key/index on something that's not a dict or list
-                    pytest.fail(f"Assertion Failed: Cannot access key/index '{key}' on non-dict/non-list element "
-                                f"(type: {type(actual_value)}) at path '{current_path_str}'. Full JSON: {response_json}")
-
-            # After loop, actual_value holds the final navigated value
-            logger.debug(f"Final navigated value at path '{json_path}': {actual_value} (type: {type(actual_value)})")
-            assert actual_value == expected_value, \
-                f"Assertion Failed: Expected JSON value '{expected_value}' (type: {type(expected_value)}) at path '{json_path}', " \
-                f"but got '{actual_value}' (type: {type(actual_value)}). Full JSON: {response_json}"
-
-        except requests.exceptions.JSONDecodeError:
-            logger.error(f"Failed to decode JSON response. Response text: {response.text}")
-            pytest.fail(f"Cannot assert JSON value: Response is not valid JSON. URL: {response.request.url}")
-        except Exception as e: # Catch other potential errors during navigation/assertion
-             logger.exception(f"An unexpected error occurred during JSON value assertion for path '{json_path}': {e}")
-             pytest.fail(f"Unexpected error during assertion for path '{json_path}': {e}. "
-                         f"Response Text: {response.text[:500]}...")
+    ExpectationSet(values={json_path: expected_value}).verify(response)
 
 
-# --- Keep assert_json_keys_exist and assert_payload_in_response as they are ---
-# They operate on the top-level JSON or specific dictionaries.
 def assert_json_keys_exist(response: requests.Response, keys: list):
     """
     断言响应体 JSON 中是否包含所有指定的键。
@@ -93,21 +56,7 @@ def assert_json_keys_exist(response: requests.Response, keys: list):
     :param response: requests 返回的 Response 对象
     :param keys: 预期必须存在的键列表 (list of strings)
     """
-    step_desc = f"Verify JSON contains keys: {keys}"
-    logger.info(step_desc)
-    with allure.step(step_desc):
-        try:
-            response_json = response.json()
-            missing_keys = [key for key in keys if key not in response_json]
-            assert not missing_keys, \
-                f"Assertion Failed: Missing expected JSON keys: {missing_keys}. " \
-                f"Available keys: {list(response_json.keys())}"
-        except requests.exceptions.JSONDecodeError:
-            logger.error(f"Failed to decode JSON response. Response text: {response.text}")
-            pytest.fail(f"Cannot assert JSON keys: Response is not valid JSON. URL: {response.request.url}")
-        except AttributeError:
-            pytest.fail(f"Cannot assert JSON keys: Response JSON is not a dictionary or None. URL: {response.request.url}")
-    pass
+    ExpectationSet(keys=keys).verify(response)
 
 
 def assert_payload_in_response(response: requests.Response, payload: dict):
@@ -117,29 +66,128 @@ def assert_payload_in_response(response: requests.Response, payload: dict):
     :param response: requests 返回的 Response 对象
     :param payload: 发送请求时使用的 payload 字典
     """
-    step_desc = f"Verify request payload values are reflected in response: {list(payload.keys())}"
+    ExpectationSet(payload=payload).verify(response)
+
+
+def assert_response_time(response: requests.Response, max_time_ms: float, phase: str = 'total'):
+    """
+    断言单个请求的耗时不超过阈值。
+
+    :param response: ApiClient / AsyncApiClient 返回的 Response 对象
+    :param max_time_ms: 允许的最大耗时 (毫秒)
+    :param phase: 耗时阶段，'total' (默认) / 'ttfb' / 'connect' / 'tcp' / 'tls'，含义见 common.metrics.PHASES
+    """
+    step_desc = f"Verify response {phase} time is at most {max_time_ms} ms"
+    logger.info(step_desc)
+    with step(step_desc):
+        timings = getattr(response, 'timings', None) or {'ttfb': response.elapsed.total_seconds() * 1000}
+        actual_ms = timings.get(phase)
+        assert actual_ms is not None, \
+            f"Assertion Failed: No '{phase}' timing recorded for {response.request.url} " \
+            f"(available: {[k for k, v in timings.items() if v is not None]})"
+        assert actual_ms <= max_time_ms, \
+            f"Assertion Failed: Expected {phase} time <= {max_time_ms} ms, but got {actual_ms:.1f} ms. " \
+            f"URL: {response.request.url}"
+
+
+def assert_latency_percentile(endpoint_key: str, percentile: float, max_time_ms: float, phase: str = 'total'):
+    """
+    断言某个接口在本次会话中 (当前进程) 的耗时百分位数不超过阈值。
+
+    :param endpoint_key: 分组键，'METHOD /endpoint/{id}' 格式，e.g., 'GET /users/{id}'
+    :param percentile: 百分位，e.g., 50 / 95 / 99
+    :param max_time_ms: 允许的最大耗时 (毫秒)
+    :param phase: 耗时阶段，默认 'total'
+    """
+    step_desc = f"Verify p{percentile:g} {phase} latency of '{endpoint_key}' is at most {max_time_ms} ms"
+    logger.info(step_desc)
+    with step(step_desc):
+        histogram = latency_registry.histogram(endpoint_key, phase)
+        assert histogram is not None and histogram.count, \
+            f"Assertion Failed: No '{phase}' latency recorded for '{endpoint_key}'. " \
+            f"Recorded endpoints: {latency_registry.keys()}"
+        actual_ms = histogram.percentile(percentile)
+        assert actual_ms <= max_time_ms, \
+            f"Assertion Failed: Expected p{percentile:g} {phase} latency of '{endpoint_key}' <= {max_time_ms} ms, " \
+            f"but got {actual_ms:.1f} ms over {histogram.count} requests."
+
+
+def assert_p50(endpoint_key: str, max_time_ms: float, phase: str = 'total'):
+    assert_latency_percentile(endpoint_key, 50, max_time_ms, phase)
+
+
+def assert_p95(endpoint_key: str, max_time_ms: float, phase: str = 'total'):
+    assert_latency_percentile(endpoint_key, 95, max_time_ms, phase)
+
+
+def assert_p99(endpoint_key: str, max_time_ms: float, phase: str = 'total'):
+    assert_latency_percentile(endpoint_key, 99, max_time_ms, phase)
+
+
+def assert_json_schema(response: requests.Response, schema: str, items_path: str = None, max_errors: int = 10):
+    """
+    断言响应的 JSON 符合 data/schemas/ 下的 JSON Schema (validator 按文件编译一次并缓存)。
+
+    :param response: requests 返回的 Response 对象
+    :param schema: schema 文件名，相对于 data/schemas/，e.g., 'single_user.json'
+    :param items_path: 不为空时校验该路径下列表的每一项，e.g., 分页接口用 items_path='data' 校验每个用户
+    :param max_errors: 失败信息中最多列出的错误条数
+    """
+    target = f"each item at '{items_path}'" if items_path else "response JSON"
+    step_desc = f"Verify {target} matches schema '{schema}'"
     logger.info(step_desc)
-    with allure.step(step_desc):
+    with step(step_desc):
         try:
-            response_json = response.json()
-            mismatches = {}
-            for key, expected_value in payload.items():
-                actual_value = response_json.get(key)
-                if actual_value != expected_value:
-                    mismatches[key] = {'expected': expected_value, 'actual': actual_value}
-
-            assert not mismatches, \
-                f"Assertion Failed: Payload values mismatch in response. Mismatches: {mismatches}. " \
-                f"Full JSON: {response_json}"
+            errors = validate_response(response, schema, items_path, max_errors)
         except requests.exceptions.JSONDecodeError:
-            logger.error(f"Failed to decode JSON response. Response text: {response.text}")
-            pytest.fail(f"Cannot assert payload in response: Response is not valid JSON. URL: {response.request.url}")
-        except AttributeError:
-            pytest.fail(f"Cannot assert payload in response: Response JSON is not a dictionary or None. URL: {response.request.url}")
-    pass
+            raise AssertionError(f"Assertion Failed: Cannot validate schema '{schema}': Response is not valid JSON. "
+                                 f"URL: {response.request.url}") from None
+        assert not errors, \
+            f"Assertion Failed: Response does not match schema '{schema}' (first {len(errors)} errors):\n" + \
+            "\n".join(errors) + f"\nURL: {response.request.url}"
+
+
+
+def assert_ndjson_records(records, values: dict = None, keys=None, schema: str = None, expected_count: int = None,
+                          max_errors: int = 10, description: str = None):
+    """
+    对流式读取的 NDJSON 记录逐条断言 (e.g., core.streaming.iter_ndjson 返回的迭代器)，
+    每条记录检查完即丢弃，内存占用与记录数无关。失败信息只保留前 max_errors 条，读完后一次性报告。
+
+    :param records: 记录的可迭代对象
+    :param values: 每条记录都应满足的 {json_path: expected_value}
+    :param keys: 每条记录都必须存在的键
+    :param schema: 每条记录都应符合的 schema 文件名 (data/schemas/ 下)
+    :param expected_count: 预期的记录数，None 表示不检查
+    :param max_errors: 失败信息中最多列出的错误条数
+    :param description: 自定义 Allure 步骤标题
+    :return: 记录数
+    """
+    expectations = ExpectationSet(values=values, keys=keys) if values or keys else None
+    checks = ([f"values {values}"] if values else []) + ([f"keys {list(keys)}"] if keys else []) + \
+             ([f"schema '{schema}'"] if schema else []) + \
+             ([f"count {expected_count}"] if expected_count is not None else [])
+    step_desc = description or f"Verify each streamed NDJSON record: {', '.join(checks) or 'valid JSON'}"
+    logger.info(step_desc)
+    with step(step_desc):
+        errors = []
+        failed = 0
+        count = 0
+        for count, record in enumerate(records, start=1):
+            mismatches = expectations.evaluate_document(record) if expectations else []
+            if schema:
+                mismatches += validate_document(schema, record, max_errors=max_errors)
+            if mismatches:
+                failed += 1
+                if len(errors) < max_errors:
+                    errors.append(f"record {count}: {'; '.join(mismatches)} (record: {excerpt(record, 200)})")
+        if expected_count is not None and count != expected_count:
+            errors.insert(0, f"Expected {expected_count} records, but got {count}")
+        assert not errors, \
+            f"Assertion Failed: {failed} of {count} NDJSON records failed (first {len(errors)} errors):\n" + \
+            "\n".join(errors)
+        return count
 
 # 可以在这里添加更多断言函数，例如：
-# - assert_json_schema(response, schema) # 使用 jsonschema 库进行模式校验
-# - assert_response_time(response, max_time_ms)
 # - assert_header_value(response, header_name, expected_value)
-# - assert_error_message_contains(response, expected_message) # 用于失败场景
\ No newline at end of file
+# - assert_error_message_contains(response, expected_message) # 用于失败场景
@@ -0,0 +1,217 @@
+# common/expectations.py
+"""
+声明式的批量断言: 把状态码、多个 JSON 路径的值、必须存在的键、payload 回显等检查
+组合成一个 ExpectationSet，在一次遍历中完成所有检查，并汇总报告所有不匹配项。
+
+    ExpectationSet(
+        status_code=200,
+        values={'data.id': 2, 'data.first_name': 'Janet'},
+        keys=['data', 'support'],
+        payload={'name': 'neo'},
+    ).verify(response)
+
+所有 JSON 路径会按公共前缀合并成一棵前缀树，公共前缀只访问一次。
+"""
+import requests
+
+from common.json_path import JsonPathError, compile_path, key_step
+from common.logger import logger
+from common.reporting import step
+from common.utils import excerpt, get_response_json
+
+EXCERPT_CHARS = 1000  # 失败信息中响应体摘录的最大长度
+VALUE_CHARS = 200  # 失败信息中单个值的最大长度
+
+
+class _Check:
+    """前缀树节点上挂载的一个检查项"""
+
+    __slots__ = ('kind', 'label', 'expected')
+
+    def __init__(self, kind, label, expected):
+        self.kind = kind  # 'value' | 'keys' | 'payload'
+        self.label = label
+        self.expected = expected
+
+
+class _PathNode:
+    """路径前缀树节点: children 以步骤为键，checks 是在该路径上执行的检查"""
+
+    __slots__ = ('children', 'checks')
+
+    def __init__(self):
+        self.children = {}
+        self.checks = []
+
+    def child(self, step):
+        key = (type(step).__name__, str(step))
+        if key not in self.children:
+            self.children[key] = (step, _PathNode())
+        return self.children[key][1]
+
+    def iter_checks(self):
+        yield from self.checks
+        for _, node in self.children.values():
+            yield from node.iter_checks()
+
+
+class ExpectationSet:
+    """
+    一组针对同一个响应的期望。
+
+    :param status_code: 预期的 HTTP 状态码
+    :param values: {json_path: expected_value}，路径语法见 common/json_path.py
+    :param keys: 必须存在的键。列表表示根对象上的键；也可以是 {json_path: [keys]}
+    :param payload: 请求 payload，其中每个键值都应原样出现在响应根对象中
+    :param description: Allure 步骤标题，默认根据检查项自动生成
+    """
+
+    def __init__(self, status_code=None, values=None, keys=None, payload=None, description=None):
+        self.status_code = status_code
+        self.description = description
+        self._root = _PathNode()
+        self._count = 0
+        self._summary = []
+        if values:
+            for json_path, expected_value in values.items():
+                self.expect_value(json_path, expected_value)
+        if keys:
+            for json_path, key_list in (keys.items() if isinstance(keys, dict) else [('', keys)]):
+                self.expect_keys(key_list, json_path)
+        if payload:
+            self.expect_payload(payload)
+
+    # --- 构建 ---
+
+    def _node_for(self, json_path):
+        node = self._root
+        for step in compile_path(json_path).steps if json_path else ():
+            node = node.child(step)
+        return node
+
+    def expect_status(self, expected_code):
+        self.status_code = expected_code
+        return self
+
+    def expect_value(self, json_path, expected_value):
+        self._node_for(json_path).checks.append(_Check('value', json_path, expected_value))
+        self._count += 1
+        self._summary.append(f"JSON value at path '{json_path}' is '{expected_value}'")
+        return self
+
+    def expect_keys(self, keys, json_path=''):
+        self._node_for(json_path).checks.append(_Check('keys', json_path or 'root', list(keys)))
+        self._count += 1
+        where = f" at path '{json_path}'" if json_path else ''
+        self._summary.append(f"JSON contains keys{where}: {list(keys)}")
+        return self
+
+    def expect_payload(self, payload):
+        # payload 的键直接作为根对象上的键 (不按路径解析)，缺失的键视为 None
+        for key, expected_value in payload.items():
+            self._root.child(key_step(key)).checks.append(_Check('payload', key, expected_value))
+        self._count += 1
+        self._summary.append(f"request payload values are reflected in response: {list(payload.keys())}")
+        return self
+
+    @property
+    def has_json_checks(self):
+        return bool(self._root.checks or self._root.children)
+
+    def __len__(self):
+        return self._count + (self.status_code is not None)
+
+    def describe(self):
+        """Allure 步骤标题: 只有一个检查项时直接使用该检查项的描述"""
+        if self.description:
+            return self.description
+        parts = ([f"response status code is {self.status_code}"] if self.status_code is not None else []) + self._summary
+        if len(parts) == 1:
+            return f"Verify {parts[0]}"
+        return f"Verify {len(parts)} expectations: " + '; '.join(parts)
+
+    # --- 执行 ---
+
+    def evaluate_document(self, document):
+        """对已解析的 JSON 执行所有 JSON 检查，返回不匹配信息列表 (全部通过时为空列表)"""
+        mismatches = []
+        payload_mismatches = {}
+        self._walk(self._root, document, True, 'root', mismatches, payload_mismatches)
+        if payload_mismatches:
+            mismatches.append(f"Payload values mismatch in response. Mismatches: {payload_mismatches}")
+        return mismatches
+
+    def _walk(self, node, value, singular, current_path, mismatches, payload_mismatches):
+        for check in node.checks:
+            self._apply_check(check, value, mismatches, payload_mismatches)
+        for step, child in node.children.values():
+            if singular and step.singular:
+                try:
+                    next_value = step.get(value, current_path)
+                except JsonPathError as e:
+                    self._fail_subtree(child, e, mismatches, payload_mismatches)
+                    continue
+                self._walk(child, next_value, True, f"{current_path}.{step}", mismatches, payload_mismatches)
+            else:
+                values = [value] if singular else value
+                selected = [item for v in values for item in step.select(v)]
+                self._walk(child, selected, False, f"{current_path}.{step}", mismatches, payload_mismatches)
+
+    @staticmethod
+    def _apply_check(check, actual_value, mismatches, payload_mismatches):
+        if check.kind == 'value':
+            if actual_value != check.expected:
+                mismatches.append(
+                    f"Expected JSON value '{check.expected}' (type: {type(check.expected)}) at path '{check.label}', "
+                    f"but got '{excerpt(str(actual_value), VALUE_CHARS)}' (type: {type(actual_value)})")
+        elif check.kind == 'payload':
+            if actual_value != check.expected:
+                payload_mismatches[check.label] = {'expected': check.expected,
+                                                   'actual': excerpt(str(actual_value), VALUE_CHARS)}
+        elif not isinstance(actual_value, dict):
+            mismatches.append(f"Cannot assert JSON keys: JSON at '{check.label}' is not a dictionary "
+                              f"(type: {type(actual_value)})")
+        else:
+            missing_keys = [key for key in check.expected if key not in actual_value]
+            if missing_keys:
+                mismatches.append(f"Missing expected JSON keys: {missing_keys}. "
+                                  f"Available keys: {excerpt(str(list(actual_value.keys())), VALUE_CHARS)}")
+
+    def _fail_subtree(self, node, error, mismatches, payload_mismatches):
+        """路径在中途断开: 该子树上所有检查都失败 (payload 检查的实际值视为 None)"""
+        for check in node.iter_checks():
+            if check.kind == 'payload':
+                self._apply_check(check, None, mismatches, payload_mismatches)
+            else:
+                mismatches.append(f"{error} (expectation on '{check.label}')")
+
+    def evaluate(self, response: requests.Response):
+        """对响应执行所有检查，返回不匹配信息列表"""
+        mismatches = []
+        if self.status_code is not None and response.status_code != self.status_code:
+            mismatches.append(
+                f"Expected status code {self.status_code}, but got {response.status_code}. "
+                f"URL: {response.request.url}, Response: {excerpt(response.text, EXCERPT_CHARS)}")
+        if self.has_json_checks:
+            try:
+                response_json = get_response_json(response)
+            except requests.exceptions.JSONDecodeError:
+                logger.error(f"Failed to decode JSON response. Response text: {excerpt(response.text, EXCERPT_CHARS)}")
+                mismatches.append(f"Cannot assert JSON expectations: Response is not valid JSON. "
+                                  f"URL: {response.request.url}")
+                return mismatches
+            json_mismatches = self.evaluate_document(response_json)
+            if json_mismatches:
+                mismatches.extend(json_mismatches)
+                # 只附带有界的摘录: 完整响应体会随断言信息留在 traceback、日志和 Allure 报告中
+                mismatches.append(f"Response JSON (excerpt): {excerpt(response_json, EXCERPT_CHARS)}")
+        return mismatches
+
+    def verify(self, response: requests.Response):
+        """执行所有检查，作为一个 Allure 步骤上报；有任何不匹配时一次性抛出包含全部不匹配项的 AssertionError"""
+        step_desc = self.describe()
+        logger.info(step_desc)
+        with step(step_desc):
+            mismatches = self.evaluate(response)
+            if mismatches:
+                raise AssertionError("Assertion Failed: " + "\n".join(mismatches))
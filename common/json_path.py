@@ -0,0 +1,285 @@
+# common/json_path.py
+"""
+轻量的 JSON 路径引擎: 路径字符串只解析一次 (按字符串缓存)，之后每次查找只是遍历已编译的步骤。
+
+支持的语法 (可以带可选的 '$' / '$.' 前缀):
+    data.id                 点号分隔的键
+    data.0.email            数字段: 在列表上按下标访问，在字典上按字符串键访问
+    data[0] / data[-1]      下标 (支持负数)
+    data[1:3] / data[::2]   切片
+    data.* / data[*]        通配符: 字典的所有值或列表的所有元素
+    data['first.name']      带特殊字符的键
+    data[?(@.id == 2)]      过滤: 支持 == != > >= < <=，右值按 JSON 解析 (2, "x", true, null)，
+    data[?(@.email)]        也可以只判断字段是否存在 (非 None)；
+    data[?(@.tags[0] == "x")] 过滤字段本身也可以是路径 (可以包含方括号)
+    tags[?(@ == "x")]       单独的 '@' 表示元素本身 (用于标量列表)
+"""
+import json
+import operator
+import re
+from functools import lru_cache
+
+
+class JsonPathError(Exception):
+    """路径语法错误，或在单值路径上找不到对应的值"""
+
+
+class _Step:
+    singular = True
+
+    def select(self, value):
+        """返回该步骤在 value 上匹配到的所有值 (找不到时返回空列表)"""
+        raise NotImplementedError
+
+    def get(self, value, current_path):
+        """单值步骤: 返回匹配到的值，找不到时抛出 JsonPathError"""
+        raise NotImplementedError
+
+
+class _Key(_Step):
+    """点号分隔的段: 字典上按键访问，列表上按整数下标访问"""
+
+    def __init__(self, name):
+        self.name = name
+        self.index = int(name) if re.fullmatch(r'-?\d+', name) else None
+
+    def select(self, value):
+        if isinstance(value, dict):
+            return [value[self.name]] if self.name in value else []
+        if isinstance(value, list) and self.index is not None and -len(value) <= self.index < len(value):
+            return [value[self.index]]
+        return []
+
+    def get(self, value, current_path):
+        if isinstance(value, dict):
+            if self.name in value:
+                return value[self.name]
+            raise JsonPathError(f"Key '{self.name}' not found at path '{current_path}'. "
+                                f"Available keys: {list(value.keys())}")
+        if isinstance(value, list):
+            if self.index is None:
+                raise JsonPathError(f"Key '{self.name}' is not a valid integer index for list at path '{current_path}'")
+            if not -len(value) <= self.index < len(value):
+                raise JsonPathError(f"Index {self.index} out of bounds for list at path '{current_path}'. "
+                                    f"List size: {len(value)}")
+            return value[self.index]
+        raise JsonPathError(f"Cannot access key/index '{self.name}' on non-dict/non-list element "
+                            f"(type: {type(value)}) at path '{current_path}'")
+
+    def __str__(self):
+        return self.name
+
+
+class _Index(_Key):
+    """方括号中的下标: 只能用于列表"""
+
+    def __init__(self, index):
+        super().__init__(str(index))
+
+    def select(self, value):
+        return super().select(value) if isinstance(value, list) else []
+
+    def get(self, value, current_path):
+        if not isinstance(value, list):
+            raise JsonPathError(f"Cannot use index [{self.index}] on non-list element "
+                                f"(type: {type(value)}) at path '{current_path}'")
+        return super().get(value, current_path)
+
+    def __str__(self):
+        return f"[{self.index}]"
+
+
+class _Wildcard(_Step):
+    singular = False
+
+    def select(self, value):
+        if isinstance(value, dict):
+            return list(value.values())
+        if isinstance(value, list):
+            return list(value)
+        return []
+
+    def __str__(self):
+        return '*'
+
+
+class _Slice(_Step):
+    singular = False
+
+    def __init__(self, start, stop, step):
+        self.slice = slice(start, stop, step)
+
+    def select(self, value):
+        return value[self.slice] if isinstance(value, list) else []
+
+    def __str__(self):
+        parts = [self.slice.start, self.slice.stop, self.slice.step]
+        return '[' + ':'.join('' if p is None else str(p) for p in parts) + ']'
+
+
+_FILTER_OPERATORS = {
+    '==': operator.eq, '!=': operator.ne,
+    '>=': operator.ge, '<=': operator.le,
+    '>': operator.gt, '<': operator.lt,
+}
+_FILTER_RE = re.compile(r'^\?\(?\s*(@)?\.?([^\s=!<>()@]*)\s*(?:(==|!=|>=|<=|>|<)\s*(.+?))?\s*\)?$')
+
+
+class _Filter(_Step):
+    singular = False
+
+    def __init__(self, expression):
+        match = _FILTER_RE.match(expression)
+        if not match or not (match.group(1) or match.group(2)):
+            raise JsonPathError(f"Invalid filter expression '[{expression}]'")
+        _, field, op, literal = match.groups()
+        self.expression = expression
+        self.field = compile_path(field) if field else None  # 单独的 '@' 表示元素本身
+        self.op = _FILTER_OPERATORS.get(op)
+        if literal is None:
+            self.literal = None
+        else:
+            try:
+                self.literal = json.loads(literal)
+            except ValueError:
+                self.literal = literal.strip('\'"')
+
+    def _matches(self, item):
+        found = [item] if self.field is None else self.field.find(item)
+        if not found:
+            return False
+        if self.op is None:
+            return found[0] is not None
+        try:
+            return self.op(found[0], self.literal)
+        except TypeError:
+            return False
+
+    def select(self, value):
+        items = value.values() if isinstance(value, dict) else value if isinstance(value, list) else ()
+        return [item for item in items if self._matches(item)]
+
+    def __str__(self):
+        return f"[{self.expression}]"
+
+
+_TOKEN_RE = re.compile(r"(?P<dot>\.)|(?P<name>[^.\[]+)")
+_QUOTED_RE = re.compile(r"""^\s*(?:'([^']*)'|"([^"]*)")\s*$""")
+
+
+def _bracket_end(text, start, expression):
+    """
+    返回与 text[start] 处的 '[' 配对的 ']' 的位置。
+    支持嵌套的方括号 (e.g., 过滤器 [?(@.tags[0] == "x")]) 和引号中的 ']'。
+    """
+    depth = 0
+    quote = None
+    for position in range(start, len(text)):
+        char = text[position]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in '\'"':
+            quote = char
+        elif char == '[':
+            depth += 1
+        elif char == ']':
+            depth -= 1
+            if depth == 0:
+                return position
+    raise JsonPathError(f"Unclosed '[' in JSON path '{expression}' at position {start}")
+
+
+def _parse(expression):
+    text = expression.strip()
+    if text.startswith('$'):
+        text = text[1:]
+    steps = []
+    position = 0
+    while position < len(text):
+        if text[position] == '[':
+            end = _bracket_end(text, position, expression)
+            steps.append(_bracket_step(text[position + 1:end], expression))
+            position = end + 1
+            continue
+        match = _TOKEN_RE.match(text, position)
+        if not match:
+            raise JsonPathError(f"Invalid JSON path '{expression}' at position {position}")
+        position = match.end()
+        if match.group('name') is not None:
+            name = match.group('name')
+            steps.append(_Wildcard() if name == '*' else _Key(name))
+    return steps
+
+
+def _bracket_step(content, expression):
+    """方括号中的内容: 带引号的键、通配符、过滤器、切片或下标"""
+    quoted = _QUOTED_RE.match(content)
+    if quoted:
+        return _Key(quoted.group(1) if quoted.group(1) is not None else quoted.group(2))
+    content = content.strip()
+    if content == '*':
+        return _Wildcard()
+    if content.startswith('?'):
+        return _Filter(content)
+    if ':' in content:
+        try:
+            parts = [int(p) if p.strip() else None for p in content.split(':')]
+        except ValueError:
+            raise JsonPathError(f"Invalid slice '[{content}]' in JSON path '{expression}'") from None
+        return _Slice(*(parts + [None] * (3 - len(parts))))
+    try:
+        return _Index(int(content))
+    except ValueError:
+        raise JsonPathError(f"Invalid index '[{content}]' in JSON path '{expression}'") from None
+
+
+class JsonPath:
+    """
+    编译后的 JSON 路径。通过 compile_path() 获取，相同的路径字符串只会解析一次。
+    """
+
+    def __init__(self, expression):
+        self.expression = expression
+        self.steps = _parse(expression)
+        self.is_singular = all(step.singular for step in self.steps)
+
+    def find(self, document):
+        """返回所有匹配的值 (列表)，找不到时返回空列表"""
+        values = [document]
+        for step in self.steps:
+            next_values = []
+            for value in values:
+                next_values.extend(step.select(value))
+            values = next_values
+            if not values:
+                break
+        return values
+
+    def resolve(self, document):
+        """
+        单值路径返回对应的值，找不到时抛出 JsonPathError (错误信息中包含出错位置)；
+        包含通配符/切片/过滤器的路径返回所有匹配值组成的列表。
+        """
+        if not self.is_singular:
+            return self.find(document)
+        value = document
+        current_path = 'root'
+        for step in self.steps:
+            value = step.get(value, current_path)
+            current_path += f".{step}"
+        return value
+
+    def __repr__(self):
+        return f"JsonPath({self.expression!r})"
+
+
+def key_step(name):
+    """返回按字面键名访问的单个步骤 (键名中的 '.'、'[' 等字符不会被当作路径语法)"""
+    return _Key(name)
+
+
+@lru_cache(maxsize=1024)
+def compile_path(expression):
+    """编译并缓存 JSON 路径"""
+    return JsonPath(expression)
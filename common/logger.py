@@ -1,29 +1,68 @@
 import os
-from loguru import logger
+import threading
 from common.read_config import get_config
+from common.utils import get_worker_id, is_xdist_worker
 
-def setup_logger():
+
+def worker_log_path(log_file_path):
+    """
+    xdist 分布式执行时为每个 worker 生成独立的日志文件 (logs/runtime.gw0.log)，
+    避免多个进程同时写入/轮转同一个 logs/runtime.log。
+    """
+    if not is_xdist_worker():
+        return log_file_path
+    root, ext = os.path.splitext(log_file_path)
+    return f"{root}.{get_worker_id()}{ext}"
+
+
+_setup_lock = threading.Lock()
+_setup_done = False
+
+# loguru 内置级别对应的数值，用于在热路径上廉价地判断某个级别是否会被输出
+_LEVEL_NOS = {'TRACE': 5, 'DEBUG': 10, 'INFO': 20, 'SUCCESS': 25, 'WARNING': 30, 'ERROR': 40, 'CRITICAL': 50}
+_min_level_no = _LEVEL_NOS['INFO']
+
+
+def setup_logger(force=False):
     """
-    配置loguru日志记录器
+    配置loguru日志记录器 (幂等: 只在第一次调用时真正添加 sink，force=True 时重新配置)
     """
-    config = get_config()
+    global _setup_done
+    from loguru import logger
+
+    if _setup_done and not force:
+        return logger
+    with _setup_lock:
+        if _setup_done and not force:
+            return logger
+        _configure_sinks(logger)
+        _setup_done = True
+    logger.info("Logger setup complete.")
+    return logger
+
+
+def _configure_sinks(logger):
+    global _min_level_no
+    config = get_config() or {}
     log_config = config.get('logging', {})
     log_level = log_config.get('level', 'INFO')
+    _min_level_no = _LEVEL_NOS.get(log_level.upper(), 0)
     log_rotation = log_config.get('rotation', '10 MB')
     log_retention = log_config.get('retention', '7 days')
-    log_file_path = log_config.get('file_path', 'logs/runtime.log')
+    log_file_path = worker_log_path(log_config.get('file_path', 'logs/runtime.log'))
 
     log_directory = os.path.dirname(log_file_path)
     if not os.path.exists(log_directory):
         os.makedirs(log_directory)
 
     logger.remove()  # 移除默认的日志处理器
+    logger.configure(extra={'worker': get_worker_id()}) # 日志中标记来源 worker
 
     # 添加控制台输出handler
     logger.add(
         sink=lambda msg: print(msg, end=''),  # 控制台输出
         level=log_level.upper(),  # 日志级别
-        format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
+        format="<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | <magenta>{extra[worker]}</magenta> | <cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> - <level>{message}</level>",
         colorize=True # 在控制台启用颜色
     )
 
@@ -34,13 +73,54 @@ def setup_logger():
         rotation=log_rotation,
         retention=log_retention,
         encoding='utf-8',
-        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {name}:{function}:{line} - {message}",
+        format="{time:YYYY-MM-DD HH:mm:ss.SSS} | {level: <8} | {extra[worker]} | {name}:{function}:{line} - {message}",
         enqueue=True, # 异步写入，提高性能
         backtrace=True, # 记录异常堆栈信息
         diagnose=True  # 记录更详细的诊断信息
     )
 
-    logger.info("Logger setup complete.")
-    return logger
 
-logger = setup_logger()
\ No newline at end of file
+def is_enabled(level):
+    """
+    判断某个级别的日志是否会被输出。
+    构造日志内容本身有开销 (e.g., 格式化大的请求/响应体) 时，先用它判断再决定是否构造。
+    """
+    setup_logger()
+    return _LEVEL_NOS.get(level.upper(), 0) >= _min_level_no
+
+
+def body_log_settings():
+    """
+    请求/响应体日志配置 (config.yaml 的 logging 段):
+    - body_max_chars: 单个 body 最多记录的字符数，超出部分截断
+    - sample_success_every: 成功请求每 N 个才完整记录一次响应体，失败请求总是记录
+    """
+    log_config = (get_config() or {}).get('logging', {})
+    return {
+        'body_max_chars': log_config.get('body_max_chars', 2048),
+        'sample_success_every': max(int(log_config.get('sample_success_every', 1)), 1),
+    }
+
+
+def truncate(value, max_chars):
+    """把 value 转为字符串并截断到 max_chars 个字符 (max_chars 为 None 或 0 时不截断)"""
+    text = value if isinstance(value, str) else repr(value)
+    if not max_chars or len(text) <= max_chars:
+        return text
+    return f"{text[:max_chars]}... <truncated {len(text) - max_chars} chars>"
+
+
+class _LazyLogger:
+    """
+    loguru logger 的惰性代理: import common.logger 时不做任何配置，
+    第一次真正使用 (logger.info(...) 等) 时才调用 setup_logger()。
+    取到的属性会缓存在代理实例上，之后的调用不再经过 __getattr__。
+    """
+
+    def __getattr__(self, name):
+        attr = getattr(setup_logger(), name)
+        setattr(self, name, attr)
+        return attr
+
+
+logger = _LazyLogger()
@@ -0,0 +1,219 @@
+# common/metrics.py
+"""
+请求耗时统计: 按 "METHOD /endpoint/{id}" 聚合的低开销内存直方图。
+
+直方图使用对数分桶 (相邻桶上界相差约 2%)，记录一次耗时只是一次 log 计算和一次字典自增，
+计算百分位数时的相对误差不超过约 1%。直方图可以序列化并合并，
+因此 xdist 的多个 worker 或多个 CI 分片的数据可以汇总成一份报告。
+"""
+import json
+import math
+import os
+import re
+import threading
+
+# 各阶段耗时 (毫秒):
+#   total   - 从发起请求到读取完响应体
+#   ttfb    - 从发出请求到解析完响应头 (requests 的 response.elapsed)
+#   connect - 建立新连接的总耗时 (包含 DNS 解析、TCP 握手和 TLS 握手)，复用连接时没有该项
+#   tcp     - DNS 解析 + TCP 握手
+#   tls     - TLS 握手 (仅 HTTPS)
+PHASES = ('total', 'ttfb', 'connect', 'tcp', 'tls')
+
+_GROWTH = 1.02
+_LOG_GROWTH = math.log(_GROWTH)
+_MIN_VALUE_MS = 0.001
+
+_ID_SEGMENT_RE = re.compile(
+    r'^(\d+|[0-9a-fA-F]{8}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{4}-[0-9a-fA-F]{12}|[0-9a-fA-F]{24,})$'
+)
+
+
+def endpoint_template(endpoint):
+    """
+    把具体的 endpoint 归一化为模板，作为统计的分组键:
+    '/users/2?page=1' -> '/users/{id}'  (数字、UUID、长十六进制串视为 ID)
+    """
+    path = endpoint.split('?', 1)[0]
+    return '/'.join('{id}' if _ID_SEGMENT_RE.match(segment) else segment for segment in path.split('/'))
+
+
+class LatencyHistogram:
+    """对数分桶直方图，单位毫秒"""
+
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    @staticmethod
+    def _bucket(value_ms):
+        return int(math.log(max(value_ms, _MIN_VALUE_MS) / _MIN_VALUE_MS) / _LOG_GROWTH)
+
+    @staticmethod
+    def _bucket_value(bucket):
+        """桶的代表值: 取桶上下界的几何中点"""
+        return _MIN_VALUE_MS * _GROWTH ** (bucket + 0.5)
+
+    def record(self, value_ms):
+        bucket = self._bucket(value_ms)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms < self.min:
+            self.min = value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+
+    def percentile(self, percent):
+        """返回第 percent 百分位 (0-100) 的耗时，没有数据时返回 None"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                return min(max(self._bucket_value(bucket), self.min), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def summary(self):
+        return {
+            'count': self.count,
+            'mean': _round(self.mean),
+            'min': _round(self.min if self.count else None),
+            'p50': _round(self.percentile(50)),
+            'p90': _round(self.percentile(90)),
+            'p95': _round(self.percentile(95)),
+            'p99': _round(self.percentile(99)),
+            'max': _round(self.max if self.count else None),
+        }
+
+    def to_dict(self):
+        return {
+            'buckets': {str(bucket): count for bucket, count in self.buckets.items()},
+            'count': self.count,
+            'total': self.total,
+            'min': self.min if self.count else None,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls()
+        histogram.buckets = {int(bucket): count for bucket, count in data['buckets'].items()}
+        histogram.count = data['count']
+        histogram.total = data['total']
+        histogram.min = data['min'] if data['min'] is not None else math.inf
+        histogram.max = data['max']
+        return histogram
+
+
+def _round(value):
+    return round(value, 3) if value is not None else None
+
+
+class LatencyRegistry:
+    """按 'METHOD /endpoint/{id}' 和阶段分组的直方图集合 (线程安全)"""
+
+    def __init__(self):
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def record(self, key, timings):
+        """
+        :param key: 分组键，e.g., 'GET /users/{id}'
+        :param timings: {phase: 毫秒}，值为 None 的阶段会被忽略
+        """
+        with self._lock:
+            phases = self._histograms.setdefault(key, {})
+            for phase, value in timings.items():
+                if value is not None:
+                    histogram = phases.get(phase)
+                    if histogram is None:
+                        histogram = phases[phase] = LatencyHistogram()
+                    histogram.record(value)
+
+    def histogram(self, key, phase='total'):
+        """返回指定分组和阶段的直方图，没有数据时返回 None"""
+        return self._histograms.get(key, {}).get(phase)
+
+    def keys(self):
+        return list(self._histograms)
+
+    def clear(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def merge(self, other):
+        with self._lock:
+            for key, phases in other._histograms.items():
+                target = self._histograms.setdefault(key, {})
+                for phase, histogram in phases.items():
+                    target.setdefault(phase, LatencyHistogram()).merge(histogram)
+        return self
+
+    def summary(self):
+        """{key: {phase: {count, mean, p50, p95, p99, ...}}}"""
+        with self._lock:
+            return {
+                key: {phase: histogram.summary() for phase, histogram in phases.items()}
+                for key, phases in sorted(self._histograms.items())
+            }
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                key: {phase: histogram.to_dict() for phase, histogram in phases.items()}
+                for key, phases in self._histograms.items()
+            }
+
+    @classmethod
+    def from_dict(cls, data):
+        registry = cls()
+        registry._histograms = {
+            key: {phase: LatencyHistogram.from_dict(h) for phase, h in phases.items()}
+            for key, phases in data.items()
+        }
+        return registry
+
+    def dump(self, path):
+        """写入 JSON 文件: summary 供人阅读和 CI 比较，histograms 用于后续合并"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'summary': self.summary(), 'histograms': self.to_dict()}, file, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r', encoding='utf-8') as file:
+            return cls.from_dict(json.load(file)['histograms'])
+
+
+def merge_latency_files(paths, output_path):
+    """合并多个 dump() 生成的文件 (多个 worker / 多个分片)，写入 output_path 并返回合并后的 registry"""
+    merged = LatencyRegistry()
+    for path in paths:
+        merged.merge(LatencyRegistry.load(path))
+    merged.dump(output_path)
+    return merged
+
+
+# 进程级别的全局统计，ApiClient / AsyncApiClient 每次请求都会记录到这里
+latency_registry = LatencyRegistry()
@@ -1,27 +1,98 @@
-import yaml
 import os
+import threading
+
+# 环境变量覆盖配置项的前缀，层级之间用双下划线分隔:
+#   AUTODEMO__API__BASE_URL=http://127.0.0.1:8000/api  ->  config['api']['base_url']
+#   AUTODEMO__API__TIMEOUT=30                           ->  config['api']['timeout'] = 30
+ENV_PREFIX = 'AUTODEMO__'
+
+_DEFAULT_CONFIG_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'config', 'config.yaml'
+)
+
+# {config_path: (文件 mtime_ns, 文件大小, 环境变量快照, 配置字典)}
+_config_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _env_overrides():
+    """收集所有以 ENV_PREFIX 开头的环境变量，返回排好序的 (key, value) 元组，用作缓存键"""
+    return tuple(sorted(
+        (key, value) for key, value in os.environ.items() if key.startswith(ENV_PREFIX)
+    ))
+
+
+def _apply_env_overrides(config, overrides):
+    """把环境变量覆盖到配置字典上，值按 YAML 标量解析 (数字、布尔值、列表等保持类型)"""
+    import yaml
+
+    for key, raw_value in overrides:
+        path = [part.lower() for part in key[len(ENV_PREFIX):].split('__') if part]
+        if not path:
+            continue
+        node = config
+        for part in path[:-1]:
+            if not isinstance(node.get(part), dict):
+                node[part] = {}
+            node = node[part]
+        try:
+            node[path[-1]] = yaml.safe_load(raw_value)
+        except yaml.YAMLError:
+            node[path[-1]] = raw_value
+    return config
+
+
+def _load_config_file(config_path):
+    import yaml
+
+    try:
+        with open(config_path, 'r', encoding='utf-8') as file:
+            config = yaml.safe_load(file)
+        return config if config is not None else {}
+    except FileNotFoundError:
+        print(f"配置文件未找到: {config_path}")
+        return None
+    except yaml.YAMLError as e:
+        print(f"读取配置文件时发生错误: {e}")
+        return None
+
 
 def get_config(config_path = None):
-    
+
     """
-    读取配置文件
+    读取配置文件 (带缓存)
+    配置文件只解析一次，文件修改时间或大小变化、或 AUTODEMO__* 环境变量变化时自动重新加载。
+    返回的是共享的缓存对象，调用方不要修改它。
     ：param config_path: 配置文件路径，默认值为 None，表示读取当前目录下的 config.yaml 文件
     :return: 返回配置字典
     """
     if config_path is None:
-        project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-        config_path = os.path.join(project_root, 'config','config.yaml')
+        config_path = _DEFAULT_CONFIG_PATH
     try:
-        with open(config_path, 'r', encoding='utf-8') as file:
-            config = yaml.safe_load(file)
-        return config
+        stat = os.stat(config_path)
     except FileNotFoundError:
         print(f"配置文件未找到: {config_path}")
         return None
-    except yaml.YAMLError as e:
-        print(f"读取配置文件时发生错误: {e}")
-        return None
-    
+    overrides = _env_overrides()
+
+    cached = _config_cache.get(config_path)
+    if cached and cached[:3] == (stat.st_mtime_ns, stat.st_size, overrides):
+        return cached[3]
+
+    with _cache_lock:
+        config = _load_config_file(config_path)
+        if config is None:
+            return None
+        config = _apply_env_overrides(config, overrides)
+        _config_cache[config_path] = (stat.st_mtime_ns, stat.st_size, overrides, config)
+        return config
+
+
+def clear_config_cache():
+    """清空配置缓存，下一次 get_config() 会重新读取文件"""
+    with _cache_lock:
+        _config_cache.clear()
+
 # config = get_config()
 
 # 示例：如何获取配置项
@@ -29,4 +100,4 @@ def get_config(config_path = None):
 #     if config:
 #         print("API Base URL:", config.get('api', {}).get('base_url'))
 #         print("Web Browser:", config.get('web', {}).get('browser'))
-#         print("Logging Level:", config.get('logging', {}).get('level'))
\ No newline at end of file
+#         print("Logging Level:", config.get('logging', {}).get('level'))
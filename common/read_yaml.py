@@ -1,42 +1,44 @@
 # common/read_yaml.py
-import yaml
+import json
 import os
+
+import yaml
+
 from common.logger import logger
 
+# 优先使用 libyaml 提供的 C 加速解析器，不可用时回退到纯 Python 实现
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover - 取决于 PyYAML 的编译方式
+    from yaml import SafeLoader
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 测试数据索引的缓存目录 (已加入 .gitignore)
+INDEX_DIR = os.path.join(PROJECT_ROOT, '.cache', 'testdata')
+INDEX_VERSION = 1
+
+JSONL_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+def _full_path(file_path):
+    """相对路径按项目根目录解析"""
+    return file_path if os.path.isabs(file_path) else os.path.join(PROJECT_ROOT, file_path)
+
+
 def read_yaml(file_path):
     """
     读取 YAML 文件并返回其内容。
     :param file_path:相对于项目根目录的 YAML 文件路径 (e.g., 'data/user_creation_data.yaml')
     :return: 解析后的 Python 对象 (通常是列表或字典)，如果失败则返回 None
     """
-        # 构建绝对路径
-    try: # Add a try block for safety during debugging
-        # <<<--- Add debug prints here --->>>
-        current_file_abspath = os.path.abspath(__file__)
-        common_dir = os.path.dirname(current_file_abspath)
-        project_root = os.path.dirname(common_dir)
-
-        print(f"DEBUG: Type of project_root: {type(project_root)}, Value: {project_root}")
-        print(f"DEBUG: Type of file_path: {type(file_path)}, Value: {file_path}")
-        # <<<---------------------------->>>
-
-        full_path = os.path.join(project_root, file_path) # Error occurs here
-
-        logger.debug(f"Attempting to read YAML file: {full_path}")
-        # ... (rest of the function: open, load, return) ...
-    except Exception as e:
-        logger.error(f"An error occurred during path calculation or reading {file_path}: {e}")
-        print(f"ERROR during read_yaml execution: {e}") # Also print to console
-        return None # Ensure None is returned on error
     # 构建绝对路径
-    project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    full_path = os.path.join(project_root, file_path)
+    full_path = _full_path(file_path)
 
-    logger.debug(f"Attempting to read YAML file: {full_path}")
+    logger.debug("Attempting to read YAML file: {}", full_path)
     try:
         with open(full_path, 'r', encoding='utf-8') as file:
-            data = yaml.safe_load(file)
-            logger.debug(f"Successfully read and parsed YAML data from {full_path}")
+            data = yaml.load(file, Loader=SafeLoader)
+            logger.debug("Successfully read and parsed YAML data from {}", full_path)
             return data
     except FileNotFoundError:
         logger.error(f"Error: YAML file not found at {full_path}")
@@ -48,11 +50,263 @@ def read_yaml(file_path):
         logger.error(f"An unexpected error occurred while reading {full_path}: {e}")
         return None
 
-# # 示例用法
-# if __name__ == '__main__':
-#     user_data = read_yaml('data/user_creation_data.yaml')
-#     if user_data:
-#         print(user_data)
-#
-#     non_existent_data = read_yaml('data/non_existent.yaml')
-#     print(non_existent_data) # Should print None and log an error
\ No newline at end of file
+
+# --- 流式读取 ---
+
+def _compose_node(loader, anchors):
+    """
+    根据解析器事件组装一个 YAML 节点。
+    PyYAML 的 C 解析器不对外暴露 compose_node，这里用事件流自己组装，
+    从而可以逐条处理顶层列表中的元素，同时享受 C 解析器的速度。
+    """
+    event = loader.get_event()
+    if isinstance(event, yaml.AliasEvent):
+        if event.anchor not in anchors:
+            raise yaml.composer.ComposerError(
+                None, None, f"found undefined alias {event.anchor!r}", event.start_mark)
+        return anchors[event.anchor]
+
+    if isinstance(event, yaml.ScalarEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.ScalarNode, event.value, event.implicit)
+        node = yaml.ScalarNode(tag, event.value, event.start_mark, event.end_mark, style=event.style)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        return node
+
+    if isinstance(event, yaml.SequenceStartEvent):
+        tag = event.tag
+        if tag is None or tag == '!':
+            tag = loader.resolve(yaml.SequenceNode, None, event.implicit)
+        node = yaml.SequenceNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+        if event.anchor is not None:
+            anchors[event.anchor] = node
+        while not loader.check_event(yaml.SequenceEndEvent):
+            node.value.append(_compose_node(loader, anchors))
+        node.end_mark = loader.get_event().end_mark
+        return node
+
+    # MappingStartEvent
+    tag = event.tag
+    if tag is None or tag == '!':
+        tag = loader.resolve(yaml.MappingNode, None, event.implicit)
+    node = yaml.MappingNode(tag, [], event.start_mark, None, flow_style=event.flow_style)
+    if event.anchor is not None:
+        anchors[event.anchor] = node
+    while not loader.check_event(yaml.MappingEndEvent):
+        key_node = _compose_node(loader, anchors)
+        value_node = _compose_node(loader, anchors)
+        node.value.append((key_node, value_node))
+    node.end_mark = loader.get_event().end_mark
+    return node
+
+
+def _iter_yaml_nodes(stream):
+    """
+    逐个产出 YAML 用例节点及其所属 loader:
+    - 文档是列表时，列表中的每个元素是一个用例
+    - 多文档 YAML (--- 分隔) 中，非列表文档本身是一个用例
+    """
+    loader = SafeLoader(stream)
+    try:
+        loader.get_event()  # StreamStartEvent
+        while not loader.check_event(yaml.StreamEndEvent):
+            loader.get_event()  # DocumentStartEvent
+            anchors = {}
+            if loader.check_event(yaml.SequenceStartEvent):
+                loader.get_event()
+                while not loader.check_event(yaml.SequenceEndEvent):
+                    yield loader, _compose_node(loader, anchors)
+                loader.get_event()  # SequenceEndEvent
+            else:
+                node = _compose_node(loader, anchors)
+                if not (isinstance(node, yaml.ScalarNode) and node.tag == 'tag:yaml.org,2002:null'):
+                    yield loader, node
+            loader.get_event()  # DocumentEndEvent
+    finally:
+        loader.dispose()
+
+
+def _iter_jsonl_lines(file):
+    """逐行产出 (字节偏移, 行内容)，跳过空行和 # 注释行"""
+    offset = 0
+    for line in file:
+        stripped = line.strip()
+        if stripped and not stripped.startswith(b'#'):
+            yield offset, line
+        offset += len(line)
+
+
+def iter_cases(file_path):
+    """
+    惰性地逐条读取测试用例，支持:
+    - .yaml/.yml: 顶层为列表的 YAML，或多文档 YAML
+    - .jsonl/.ndjson: 每行一个 JSON 对象
+    任何时刻内存中只保留当前这一条用例。
+
+    :param file_path: 相对于项目根目录的数据文件路径
+    :return: 用例字典的生成器
+    """
+    full_path = _full_path(file_path)
+    if full_path.endswith(JSONL_EXTENSIONS):
+        with open(full_path, 'rb') as file:
+            for _, line in _iter_jsonl_lines(file):
+                yield json.loads(line)
+    else:
+        with open(full_path, 'rb') as file:
+            for loader, node in _iter_yaml_nodes(file):
+                yield loader.construct_document(node)
+
+
+# --- 索引 & 按需加载 ---
+
+class CaseRef:
+    """
+    指向数据文件中某一条用例的轻量引用。
+    收集阶段只需要 case_id (用作 parametrize 的 ids)，真正执行用例时才调用 load() 反序列化。
+    """
+
+    __slots__ = ('source', 'case_id', 'ordinal', 'offset', 'length', 'column')
+
+    def __init__(self, source, case_id, ordinal, offset, length, column=0):
+        self.source = source
+        self.case_id = case_id
+        self.ordinal = ordinal
+        self.offset = offset
+        self.length = length
+        self.column = column
+
+    def read_raw(self):
+        """读取该用例在文件中的原始字节"""
+        with open(_full_path(self.source), 'rb') as file:
+            file.seek(self.offset)
+            return file.read(self.length)
+
+    def load(self):
+        """反序列化该用例，只读取文件中属于它的那一段"""
+        raw = self.read_raw().decode('utf-8')
+        if self.source.endswith(JSONL_EXTENSIONS):
+            return json.loads(raw)
+        # 列表元素的首行以 "- " 开头: 用空格替换掉，使其成为一个合法的缩进块
+        text = ' ' * self.column + raw[self.column:]
+        try:
+            case = yaml.load(text, Loader=SafeLoader)
+            if not isinstance(case, dict) or str(case.get('test_id', self.case_id)) == self.case_id:
+                return case
+        except yaml.YAMLError:
+            pass
+        # 例如引用了其他用例中定义的锚点，或者行号与字节偏移不一致，只能按顺序流式读取
+        logger.debug("Falling back to streaming load for case '{}' in {}", self.case_id, self.source)
+        for ordinal, case in enumerate(iter_cases(self.source)):
+            if ordinal == self.ordinal:
+                return case
+        raise LookupError(f"Case #{self.ordinal} ('{self.case_id}') no longer exists in {self.source}")
+
+    def __repr__(self):
+        return f"CaseRef({self.source!r}, {self.case_id!r})"
+
+
+def _node_case_id(loader, node):
+    """只反序列化 mapping 节点中的 test_id 字段，不触碰 payload"""
+    if isinstance(node, yaml.MappingNode):
+        for key_node, value_node in node.value:
+            if isinstance(key_node, yaml.ScalarNode) and key_node.value == 'test_id':
+                case_id = loader.construct_object(value_node, deep=True)
+                # 不经过 construct_document 时需要手动清理构造缓存，否则会随用例数量增长
+                loader.constructed_objects = {}
+                loader.recursive_objects = {}
+                return case_id
+    return None
+
+
+def _line_offsets(full_path, line_numbers):
+    """一次遍历文件，返回指定行号 (0 起始) 的字节偏移"""
+    wanted = sorted(set(line_numbers))
+    offsets = {}
+    position = 0
+    index = 0
+    with open(full_path, 'rb') as file:
+        for line_number, line in enumerate(file):
+            while index < len(wanted) and wanted[index] == line_number:
+                offsets[line_number] = position
+                index += 1
+            if index == len(wanted):
+                break
+            position += len(line)
+    # 结束行号可能等于文件总行数 (即文件末尾)
+    for line_number in wanted[index:]:
+        offsets[line_number] = position
+    return offsets
+
+
+def _build_index_entries(full_path):
+    """扫描数据文件，返回 [(case_id, offset, length, column), ...]"""
+    entries = []
+    if full_path.endswith(JSONL_EXTENSIONS):
+        with open(full_path, 'rb') as file:
+            for offset, line in _iter_jsonl_lines(file):
+                case = json.loads(line)
+                case_id = case.get('test_id') if isinstance(case, dict) else None
+                entries.append((case_id, offset, len(line), 0))
+        return entries
+
+    spans = []
+    with open(full_path, 'rb') as file:
+        for loader, node in _iter_yaml_nodes(file):
+            start, end = node.start_mark, node.end_mark
+            end_line = end.line if end.column == 0 else end.line + 1
+            spans.append((_node_case_id(loader, node), start.line, end_line, start.column))
+    offsets = _line_offsets(full_path, [line for span in spans for line in span[1:3]])
+    for case_id, start_line, end_line, column in spans:
+        entries.append((case_id, offsets[start_line], offsets[end_line] - offsets[start_line], column))
+    return entries
+
+
+def _index_path(full_path):
+    relative = os.path.relpath(full_path, PROJECT_ROOT)
+    name = relative.replace(os.sep, '__').replace(':', '_')
+    return os.path.join(INDEX_DIR, f"{name}.index.json")
+
+
+def load_case_refs(file_path):
+    """
+    返回数据文件中所有用例的 CaseRef 列表 (按文件顺序)。
+    索引保存在 .cache/testdata 下，数据文件的大小或修改时间变化时自动重建，
+    因此在数据不变的情况下，收集阶段不会反序列化任何 payload。
+
+    :param file_path: 相对于项目根目录的数据文件路径
+    :return: CaseRef 列表，失败时返回 None
+    """
+    full_path = _full_path(file_path)
+    try:
+        stat = os.stat(full_path)
+        signature = [INDEX_VERSION, stat.st_size, stat.st_mtime_ns]
+        index_path = _index_path(full_path)
+
+        entries = None
+        if os.path.exists(index_path):
+            with open(index_path, 'r', encoding='utf-8') as file:
+                index = json.load(file)
+            if index.get('signature') == signature:
+                entries = index['entries']
+        if entries is None:
+            logger.debug("Building test data index for {}", full_path)
+            entries = _build_index_entries(full_path)
+            os.makedirs(INDEX_DIR, exist_ok=True)
+            tmp_path = f"{index_path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'signature': signature, 'entries': entries}, file)
+            os.replace(tmp_path, index_path) # 原子替换，xdist 多个 worker 同时构建也安全
+    except FileNotFoundError:
+        logger.error(f"Error: test data file not found at {full_path}")
+        return None
+    except (yaml.YAMLError, ValueError) as e:
+        logger.error(f"Error indexing test data file {full_path}: {e}")
+        return None
+
+    return [
+        CaseRef(file_path, str(case_id) if case_id is not None else f'data_index_{ordinal}',
+                ordinal, offset, length, column)
+        for ordinal, (case_id, offset, length, column) in enumerate(entries)
+    ]
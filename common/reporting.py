@@ -0,0 +1,65 @@
+# common/reporting.py
+"""
+Allure 报告的步骤粒度控制。
+
+用例和断言函数通过 step() 代替 allure.step() 上报步骤，并声明步骤的级别:
+- 'summary' : 用例级别的关键动作，e.g., "Send POST request to /users"
+- 'full'    : 细粒度的步骤，e.g., 每一次断言
+
+报告粒度 (config.yaml 的 allure.steps 或命令行 --allure-steps) 决定哪些步骤会被写入报告:
+- full    : 全部步骤 (默认)
+- summary : 只保留 'summary' 级别的步骤；断言失败的详细信息仍然出现在用例的失败信息中
+- none    : 不写入任何步骤
+数据驱动用例数量很大时，降低粒度可以显著减少报告的生成和归档时间。
+"""
+import contextlib
+
+import allure
+
+from common.logger import truncate
+from common.read_config import get_config
+
+STEP_LEVELS = ('none', 'summary', 'full')
+_RANKS = {level: rank for rank, level in enumerate(STEP_LEVELS)}
+
+_settings = {}
+
+
+def _allure_config():
+    return (get_config() or {}).get('allure', {})
+
+
+def get_step_level():
+    if 'steps' not in _settings:
+        _settings['steps'] = _allure_config().get('steps', 'full')
+    return _settings['steps']
+
+
+def set_step_level(level):
+    """设置报告粒度 (conftest 根据 --allure-steps 调用)"""
+    if level not in STEP_LEVELS:
+        raise ValueError(f"Unknown allure step level '{level}', expected one of {STEP_LEVELS}.")
+    _settings['steps'] = level
+
+
+def _max_chars():
+    if 'max_chars' not in _settings:
+        _settings['max_chars'] = _allure_config().get('text_max_chars', 1000)
+    return _settings['max_chars']
+
+
+def step(title, level='full'):
+    """
+    按当前报告粒度返回 allure.step(title) 或空的上下文管理器。标题超过 allure.text_max_chars 时截断。
+
+    :param title: 步骤标题
+    :param level: 步骤级别，'summary' 或 'full'
+    """
+    if _RANKS[level] > _RANKS[get_step_level()]:
+        return contextlib.nullcontext()
+    return allure.step(truncate(title, _max_chars()))
+
+
+def dynamic_description(text):
+    """设置用例的动态描述，超过 allure.text_max_chars 时截断 (避免把完整 payload 写入每个结果文件)"""
+    allure.dynamic.description(truncate(text, _max_chars()))
@@ -0,0 +1,107 @@
+# common/schema.py
+"""
+JSON Schema 校验: data/schemas/ 下的每个 schema 文件只加载、检查并编译一次，编译好的 validator 在整个会话中缓存。
+schema 之间可以通过相对路径互相引用 (e.g., {"$ref": "user.json"})，被引用的文件同样只加载一次。
+
+    errors = validate_response(response, 'single_user.json')
+    errors = validate_response(response, 'user.json', items_path='data')  # 校验列表中的每一项
+"""
+import json
+import os
+from functools import lru_cache
+
+import requests
+
+from common.json_path import JsonPathError, compile_path
+from common.utils import get_response_json
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCHEMA_DIR = os.path.join(PROJECT_ROOT, 'data', 'schemas')
+
+
+class SchemaError(ValueError):
+    """schema 文件不存在或不是合法的 JSON Schema"""
+
+
+@lru_cache(maxsize=None)
+def _load_schema(name):
+    path = os.path.normpath(os.path.join(SCHEMA_DIR, name))
+    if not path.startswith(SCHEMA_DIR + os.sep):
+        raise SchemaError(f"Schema '{name}' is outside {SCHEMA_DIR}")
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        raise SchemaError(f"Schema file not found: {path}") from None
+    except ValueError as e:
+        raise SchemaError(f"Schema file {path} is not valid JSON: {e}") from None
+
+
+@lru_cache(maxsize=1)
+def _registry():
+    """按需从 SCHEMA_DIR 加载被 $ref 引用的 schema"""
+    from referencing import Registry, Resource
+    from referencing.jsonschema import DRAFT202012
+
+    def retrieve(uri):
+        return Resource.from_contents(_load_schema(uri), default_specification=DRAFT202012)
+
+    return Registry(retrieve=retrieve)
+
+
+@lru_cache(maxsize=None)
+def get_validator(name):
+    """
+    返回 schema 文件对应的已编译 validator (按文件名缓存)。
+
+    :param name: 相对于 data/schemas/ 的文件名，e.g., 'user.json'
+    """
+    from jsonschema import validators  # 延迟导入，不做 schema 校验的运行不需要加载 jsonschema
+    from jsonschema.exceptions import SchemaError as InvalidSchema
+
+    schema = _load_schema(name)
+    validator_class = validators.validator_for(schema)
+    try:
+        validator_class.check_schema(schema)
+    except InvalidSchema as e:
+        raise SchemaError(f"Schema '{name}' is not a valid JSON Schema: {e.message}") from None
+    return validator_class(schema, registry=_registry())
+
+
+def validate_document(name, document, items_path=None, max_errors=10):
+    """
+    校验已解析的 JSON，返回错误信息列表 (通过时为空列表)。
+
+    :param name: schema 文件名
+    :param document: 已解析的 JSON
+    :param items_path: 不为空时，用 schema 校验该路径下列表中的每一项 (e.g., 分页接口的 'data')
+    :param max_errors: 最多返回的错误条数
+    """
+    validator = get_validator(name)
+    if items_path is None:
+        targets = [('', document)]
+    else:
+        try:
+            items = compile_path(items_path).resolve(document)
+        except JsonPathError as e:
+            return [str(e)]
+        if not isinstance(items, list):
+            return [f"Expected a list at path '{items_path}' (type: {type(items)})"]
+        targets = [(f"{items_path}[{index}]", item) for index, item in enumerate(items)]
+
+    errors = []
+    for prefix, target in targets:
+        if validator.is_valid(target):  # 快速路径: 通过时不需要收集错误详情
+            continue
+        for error in validator.iter_errors(target):
+            location = error.json_path[1:]  # '$.data.email' -> '.data.email'
+            where = f"{prefix}{location}" if prefix else location.lstrip('.')
+            errors.append(f"{where or 'root'}: {error.message}")
+            if len(errors) >= max_errors:
+                return errors
+    return errors
+
+
+def validate_response(response: requests.Response, name, items_path=None, max_errors=10):
+    """校验响应的 JSON (复用响应上缓存的解析结果)，返回错误信息列表"""
+    return validate_document(name, get_response_json(response), items_path, max_errors)
@@ -0,0 +1,126 @@
+# common/sharding.py
+"""
+把用例分配到多个分片 (CI agent)，每个分片只收集并执行自己的那一部分。
+
+两种分配方式:
+- hash:     按 test_id (数据驱动用例) 或 nodeid 的稳定哈希取模，不依赖任何历史数据；
+            数据增删只影响对应的行，其余行的归属不变
+- duration: 按历史耗时做贪心装箱 (最长的先放入当前总耗时最小的分片)，各分片耗时更均衡；
+            所有分片必须读取同一份耗时文件，否则分配结果不一致 (会漏跑或重复执行)
+
+数据驱动用例在 parametrize 时就过滤 (只依赖数据文件的索引，不加载其他行的 payload):
+    _case_refs = select_shard(load_case_refs('data/user_creation_data.yaml'))
+
+分片参数由 plugins/sharding.py 根据 --shard-id / --num-shards / --shard-mode 设置，
+未设置时 select_shard 原样返回全部用例。
+"""
+import hashlib
+import json
+import re
+import statistics
+
+from common.logger import logger
+
+SHARD_MODES = ('hash', 'duration')
+DEFAULT_DURATION = 1.0  # 没有历史耗时的用例按 1 秒估算
+
+_settings = {'shard_id': 0, 'num_shards': 1, 'mode': 'hash', 'durations': {}}
+_PARAM_ID_RE = re.compile(r'\[(.*)\]$')
+_presharded = set()  # select_shard 已经过滤过的用例: {(source, ordinal)}
+
+
+def configure_shard(shard_id, num_shards, mode='hash', durations=None):
+    """
+    设置当前进程的分片 (plugins/sharding.py 在 pytest_configure 中调用)。
+
+    :param shard_id: 分片编号，从 0 开始
+    :param num_shards: 分片总数
+    :param mode: 'hash' / 'duration'
+    :param durations: {nodeid 或 test_id: 秒}，duration 模式使用
+    """
+    if num_shards < 1 or not 0 <= shard_id < num_shards:
+        raise ValueError(f"Invalid shard {shard_id} of {num_shards}: expected 0 <= shard_id < num_shards.")
+    if mode not in SHARD_MODES:
+        raise ValueError(f"Unknown shard mode '{mode}', expected one of {SHARD_MODES}.")
+    _settings.update(shard_id=shard_id, num_shards=num_shards, mode=mode, durations=durations or {})
+
+
+def get_shard():
+    """返回 (shard_id, num_shards)"""
+    return _settings['shard_id'], _settings['num_shards']
+
+
+def is_sharded():
+    return _settings['num_shards'] > 1
+
+
+def load_durations(path):
+    """
+    读取历史耗时文件，返回 {nodeid: 秒}，文件不存在或不可读时返回空字典。
+    支持 {nodeid: 秒} 以及 test impact 记录 ({nodeid: {'duration': 秒, ...}}) 两种格式。
+    数据驱动用例同时以 test_id (nodeid 中 [...] 内的参数 id) 为键，供 select_shard 使用。
+    """
+    try:
+        with open(path, 'r', encoding='utf-8') as file:
+            records = json.load(file)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable durations file {path}: {e!r}")
+        return {}
+    durations = {}
+    for nodeid, value in records.items():
+        seconds = value.get('duration') if isinstance(value, dict) else value
+        if isinstance(seconds, (int, float)):
+            durations[nodeid] = float(seconds)
+            match = _PARAM_ID_RE.search(nodeid)
+            if match:
+                durations[match.group(1)] = durations.get(match.group(1), 0.0) + float(seconds)
+    return durations
+
+
+def shard_of(key, num_shards=None):
+    """key 的哈希分片 (sha1，与进程、Python 版本和 PYTHONHASHSEED 无关)"""
+    num_shards = num_shards or _settings['num_shards']
+    return int(hashlib.sha1(key.encode('utf-8')).hexdigest()[:8], 16) % num_shards
+
+
+def assign(keys):
+    """按当前模式把 keys 分配到各分片，返回属于当前分片的 key 集合"""
+    shard_id, num_shards = get_shard()
+    if _settings['mode'] == 'hash':
+        return {key for key in keys if shard_of(key, num_shards) == shard_id}
+
+    durations = _settings['durations']
+    known = [durations[key] for key in keys if key in durations]
+    default = statistics.median(known) if known else DEFAULT_DURATION
+    loads = [0.0] * num_shards
+    selected = set()
+    # 耗时相同时按 key 排序，保证每个分片上的计算结果完全一致
+    for key in sorted(set(keys), key=lambda k: (-durations.get(k, default), k)):
+        target = min(range(num_shards), key=lambda index: (loads[index], index))
+        loads[target] += durations.get(key, default)
+        if target == shard_id:
+            selected.add(key)
+    return selected
+
+
+def select_shard(case_refs):
+    """
+    过滤数据驱动用例 (CaseRef 列表)，只返回属于当前分片的行，按 test_id 分配。
+    返回的 CaseRef 会被记录下来，plugins/sharding.py 不会再对这些用例重新分配。
+    """
+    if not case_refs or not is_sharded():
+        return case_refs
+    selected_ids = assign([ref.case_id for ref in case_refs])
+    selected = [ref for ref in case_refs if ref.case_id in selected_ids]
+    _presharded.update((ref.source, ref.ordinal) for ref in selected)
+    shard_id, num_shards = get_shard()
+    logger.info(f"Shard {shard_id}/{num_shards}: selected {len(selected)} of {len(case_refs)} cases "
+                f"from {case_refs[0].source}")
+    return selected
+
+
+def is_presharded(case_ref):
+    """该 CaseRef 是否已经由 select_shard 分配到当前分片"""
+    return (case_ref.source, case_ref.ordinal) in _presharded
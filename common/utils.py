@@ -0,0 +1,74 @@
+# common/utils.py
+import json
+import os
+
+
+def get_worker_id():
+    """
+    返回当前 pytest-xdist worker 的 ID (e.g., 'gw0')。
+    未使用 xdist 分布式执行时返回 'master'。
+    """
+    return os.environ.get('PYTEST_XDIST_WORKER', 'master')
+
+
+def is_xdist_worker():
+    """当前进程是否为 pytest-xdist 的 worker 进程"""
+    return 'PYTEST_XDIST_WORKER' in os.environ
+
+
+def run_once_across_workers(name, factory, shared_dir):
+    """
+    在所有 worker 进程之间只执行一次 factory()，结果 (必须可 JSON 序列化) 通过文件缓存共享。
+    第一个拿到文件锁的 worker 负责计算并写入缓存，其余 worker 直接读取。
+
+    :param name: 缓存名称，用作文件名 (e.g., 'auth_token')
+    :param factory: 无参可调用对象，返回需要共享的数据
+    :param shared_dir: 所有 worker 都能访问的目录 (通常是 basetemp 的父目录)
+    :return: factory() 的返回值
+    """
+    from filelock import FileLock
+
+    os.makedirs(shared_dir, exist_ok=True)
+    cache_file = os.path.join(shared_dir, f"{name}.json")
+    with FileLock(f"{cache_file}.lock"):
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        data = factory()
+        with open(cache_file, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        return data
+
+
+_RESPONSE_JSON_ATTR = '_parsed_json'
+
+
+def get_response_json(response):
+    """
+    返回响应体解析后的 JSON，并缓存在 response 对象上。
+    同一个响应上的多次断言只解析一次响应体；解析失败时抛出
+    requests.exceptions.JSONDecodeError (与 response.json() 一致)，且不会缓存。
+    """
+    try:
+        return response.__dict__[_RESPONSE_JSON_ATTR]
+    except KeyError:
+        data = response.json()
+        response.__dict__[_RESPONSE_JSON_ATTR] = data
+        return data
+
+
+def excerpt(value, max_chars=1000):
+    """
+    返回用于失败信息的有界摘录: 字符串原样截断，其他对象先序列化为 JSON。
+    避免把整个响应体拼进断言信息 (traceback、日志和 Allure 报告都会保留这些信息)。
+
+    :param value: 响应文本 / bytes / 已解析的 JSON
+    :param max_chars: 最多保留的字符数
+    """
+    if isinstance(value, bytes):
+        value = value.decode('utf-8', errors='replace')
+    if not isinstance(value, str):
+        value = json.dumps(value, ensure_ascii=False, default=str)
+    if len(value) <= max_chars:
+        return value
+    return f"{value[:max_chars]}... ({len(value) - max_chars} more chars)"
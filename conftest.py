@@ -1,21 +1,210 @@
 # conftest.py
+import glob
+import os
 import pytest
 from core.api_client import ApiClient  # 导入我们定义的ApiClient类
+from core.async_api_client import AsyncApiClient
+from core.cassette import MODES as CASSETTE_MODES, Cassette
+from core.mock_server import MockServer
+from core.web_driver import BROWSERS, DriverPool, create_driver
+from core.workflow import WorkflowRunner
 from common.logger import logger          # 导入日志记录器
+from common.metrics import latency_registry, merge_latency_files
+from common.read_config import get_config
+from common.read_yaml import CaseRef
+from common.utils import get_worker_id, is_xdist_worker, run_once_across_workers
+
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+pytest_plugins = ['plugins.test_impact', 'plugins.allure_stream', 'plugins.sharding']
+
+MOCK_SERVER_MODES = ('off', 'inprocess', 'subprocess')
+
+
+def _latency_dir():
+    metrics_config = (get_config() or {}).get('metrics', {})
+    return os.path.join(PROJECT_ROOT, metrics_config.get('latency_dir', 'reports/latency'))
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("autodemo")
+    group.addoption("--cassette-mode", choices=CASSETTE_MODES, default=None,
+                    help="HTTP 录制/回放模式，默认使用 config.yaml 中的 api.cassette.mode")
+    group.addoption("--cassette-name", default=None,
+                    help="cassette 名称，默认使用 config.yaml 中的 api.cassette.name")
+    group.addoption("--browser", choices=BROWSERS, default=None,
+                    help="UI 用例使用的浏览器，默认使用 config.yaml 中的 web.browser")
+    group.addoption("--headless", action="store_true", default=None,
+                    help="以无头模式启动浏览器 (覆盖 config.yaml 中的 web.headless)")
+    group.addoption("--mock-server", choices=MOCK_SERVER_MODES, default=None,
+                    help="使用本地模拟服务代替 api.base_url，默认使用 config.yaml 中的 mock_server.mode")
+
+
+def _create_cassette(pytest_config):
+    cassette_config = (get_config() or {}).get('api', {}).get('cassette', {})
+    mode = pytest_config.getoption("--cassette-mode") or cassette_config.get('mode', 'passthrough')
+    if mode == 'passthrough':
+        return None
+    return Cassette(
+        directory=os.path.join(PROJECT_ROOT, cassette_config.get('dir', 'cassettes')),
+        name=pytest_config.getoption("--cassette-name") or cassette_config.get('name', 'api_tests'),
+        mode=mode,
+    )
+
+
+def _shared_dir(tmp_path_factory):
+    """
+    所有 xdist worker 共享的临时目录 (本次运行的 basetemp 父目录)，
+    非分布式执行时就是 basetemp 本身。
+    """
+    basetemp = tmp_path_factory.getbasetemp()
+    return str(basetemp.parent if is_xdist_worker() else basetemp)
+
+
+@pytest.fixture(scope="session")
+def mock_server(pytestconfig):
+    """
+    --mock-server=inprocess|subprocess 时启动本地模拟服务 (core/mock_server.py)，监听随机端口；
+    关闭时返回 None。使用 xdist 时每个 worker 各自启动一个。
+    """
+    mock_config = (get_config() or {}).get('mock_server', {})
+    mode = pytestconfig.getoption("--mock-server") or mock_config.get('mode') or 'off'
+    if mode == 'off':
+        yield None
+        return
+    options = {name: mock_config[name] for name in ('latency_ms', 'jitter_ms', 'error_rate', 'error_status', 'seed')
+               if mock_config.get(name) is not None}
+    server = MockServer(**options).start() if mode == 'inprocess' else MockServer.spawn(**options)
+    yield server
+    server.stop()
 
 @pytest.fixture(scope="session") # 使用 session 作用域，保证整个测试运行期间只创建一个实例
-def api_client():
+def api_client(tmp_path_factory, pytestconfig, mock_server):
     """
     提供一个 session 级别的 ApiClient 实例。
+    使用 pytest-xdist (-n N) 时每个 worker 进程各自创建一个实例。
+    --cassette-mode=replay 时所有响应来自录制文件，不访问网络。
+    --mock-server 时请求发往本地模拟服务。
     """
     logger.info("--- Initializing API Client Fixture (Session Scope) ---")
     client = ApiClient()
-    # 如果未来需要进行全局的 setup，例如获取认证 token，可以在这里添加
-    # client.authenticate(...)
+    if mock_server is not None:
+        client.base_url = mock_server.base_url
+    client.cassette = _create_cassette(pytestconfig)
+    # 全局 setup: 配置了 api.auth 时获取 token，所有 worker 只登录一次
+    if client.auth_config:
+        token = run_once_across_workers('auth_token', client.login, _shared_dir(tmp_path_factory))
+        client.set_auth_token(token, client.auth_config.get('scheme', 'Bearer'))
     yield client  # yield 将 client 实例提供给测试函数
     # yield 之后的部分是 teardown 代码
     logger.info("--- Tearing down API Client Fixture (Session Scope) ---")
     # 如果有全局的清理操作，例如退出登录，可以在这里添加
     # client.logout(...)
+    client.close() # 关闭 Session，释放连接池 (并保存录制)
+
+@pytest.fixture(autouse=True)
+def _release_response_bodies(request):
+    """
+    每个使用 api_client 的用例结束后，压缩该用例中仍被引用的响应体
+    (失败用例的 traceback 会让响应对象一直存活)，保留字节数按用例重新计数。
+    """
+    yield
+    if 'api_client' in request.fixturenames:
+        request.getfixturevalue('api_client').release_response_bodies()
+
+@pytest.fixture(scope="session")
+def async_api_client(mock_server):
+    """
+    提供一个 session 级别的 AsyncApiClient 实例。
+    客户端持有自己的事件循环，用例中通过 run() 驱动并发请求，例如:
+        responses = async_api_client.run(
+            async_api_client.gather(async_api_client.get(f"/users/{i}") for i in range(1, 200))
+        )
+    """
+    logger.info("--- Initializing Async API Client Fixture (Session Scope) ---")
+    client = AsyncApiClient()
+    if mock_server is not None:
+        client.base_url = mock_server.base_url
+    yield client
+    logger.info("--- Tearing down Async API Client Fixture (Session Scope) ---")
+    client.close()
+
+@pytest.fixture(scope="session")
+def workflow_runner(api_client):
+    """
+    提供一个 session 级别的 WorkflowRunner，共享 api_client。
+    工作流的 setup 步骤 (e.g., 获取 token、查询基础数据) 的响应在整个会话中缓存复用。
+    """
+    workflow_config = (get_config() or {}).get('workflow', {})
+    return WorkflowRunner(api_client, max_workers=workflow_config.get('max_workers', 8))
+
+@pytest.fixture(scope="session")
+def web_driver_pool(pytestconfig):
+    """
+    提供一个 session 级别的浏览器池。
+    使用 pytest-xdist (-n N) 时每个 worker 进程各自持有一个池，浏览器在该 worker 的用例之间复用。
+    """
+    logger.info("--- Initializing WebDriver Pool Fixture (Session Scope) ---")
+    web_config = dict((get_config() or {}).get('web', {}))
+    browser = pytestconfig.getoption("--browser")
+    headless = pytestconfig.getoption("--headless")
+    pool = DriverPool(size=web_config.get('pool_size', 1),
+                      factory=lambda: create_driver(browser, headless, web_config))
+    if web_config.get('prewarm'):
+        pool.prewarm()
+    yield pool
+    logger.info("--- Tearing down WebDriver Pool Fixture (Session Scope) ---")
+    pool.close()
+
+@pytest.fixture
+def driver(web_driver_pool):
+    """
+    为每个 UI 用例提供一个浏览器: 从池中取出，用例结束后清理 cookies / storage 并归还，不重新启动。
+    """
+    web_driver = web_driver_pool.acquire()
+    yield web_driver
+    web_driver_pool.release(web_driver)
+
+@pytest.fixture
+def test_data(request):
+    """
+    数据驱动用例的数据 fixture，配合 parametrize(..., indirect=True) 使用。
+    参数是 CaseRef 时在用例执行时才从数据文件中加载这一条用例。
+    """
+    param = request.param
+    return param.load() if isinstance(param, CaseRef) else param
+
+def pytest_sessionstart(session):
+    """
+    主进程启动时 (xdist worker 启动前) 清理上一次运行遗留的文件:
+    - 耗时统计文件
+    - record 模式下该 cassette 已有的录制 (各 worker 只会覆盖自己的文件)
+    """
+    if not is_xdist_worker():
+        for path in glob.glob(os.path.join(_latency_dir(), 'latency-*.json')):
+            os.remove(path)
+        cassette = _create_cassette(session.config)
+        if cassette is not None and cassette.mode == 'record':
+            cassette.clear()
+
+
+def pytest_sessionfinish(session, exitstatus):
+    """
+    会话结束时写出耗时统计:
+    - 每个进程 (xdist worker 或单进程) 写出 latency-<worker>.json
+    - 主进程最后把所有文件合并为 latency-summary.json，供 CI 比较延迟回归
+    """
+    latency_dir = _latency_dir()
+    if latency_registry.keys():
+        latency_registry.dump(os.path.join(latency_dir, f"latency-{get_worker_id()}.json"))
+    if not is_xdist_worker():
+        paths = [p for p in glob.glob(os.path.join(latency_dir, 'latency-*.json'))
+                 if not p.endswith('latency-summary.json')]
+        if paths:
+            merged = merge_latency_files(paths, os.path.join(latency_dir, 'latency-summary.json'))
+            for key, phases in merged.summary().items():
+                total = phases.get('total', {})
+                logger.info(f"Latency {key}: count={total.get('count')} p50={total.get('p50')}ms "
+                            f"p95={total.get('p95')}ms p99={total.get('p99')}ms")
 
-# 你可以在这里添加其他全局的 fixtures，例如数据库连接、Web Driver 等。
\ No newline at end of file
+# 你可以在这里添加其他全局的 fixtures，例如数据库连接等。
\ No newline at end of file
@@ -1,55 +1,332 @@
+import itertools
+import os
+import threading
+import time
+from contextlib import contextmanager
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3 import PoolManager
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.util.retry import Retry
 from common.read_config import get_config
-from common.logger import logger # 导入我们配置好的 logger
+from common.logger import body_log_settings, is_enabled, logger, truncate # 导入我们配置好的 logger
+from common.metrics import endpoint_template, latency_registry
+from core import streaming
+from core.compact_response import ResponseRetention
+
+# requests.Request 接受的参数，其余参数 (timeout、verify 等) 属于发送阶段
+REQUEST_ARGS = ('params', 'data', 'json', 'files', 'auth', 'cookies', 'hooks')
+
+# 当前线程最近一次新建连接的耗时 (毫秒)，由 _TimedConnectionMixin 写入，_send_request 读取
+_connect_timings = threading.local()
+# 当前线程正在发送无法回退的请求体 (生成器等)，由 PooledHTTPAdapter.send 设置
+_one_shot_body = threading.local()
+_NO_RETRY = Retry(0, read=False)
+
+
+def _is_one_shot(body):
+    """生成器等可迭代请求体只能读取一次 (文件对象可以 seek，urllib3 重试前会自动回退)"""
+    return body is not None and not isinstance(body, (bytes, str)) and not hasattr(body, 'seek')
+
+
+class _TimedConnectionMixin:
+    """记录新建连接时 DNS+TCP 握手 (_new_conn) 和完整建连 (connect，含 TLS) 的耗时"""
+
+    def _new_conn(self):
+        start = time.perf_counter()
+        sock = super()._new_conn()
+        _connect_timings.tcp = (time.perf_counter() - start) * 1000
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        _connect_timings.connect = (time.perf_counter() - start) * 1000
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+_TIMED_CONNECTION_CLASSES = {
+    HTTPConnection: _TimedHTTPConnection,
+    HTTPSConnection: _TimedHTTPSConnection,
+}
+
+
+class _TrackingPoolManager(PoolManager):
+    """记录创建过的所有连接池，用于统计连接复用情况 (连接池被淘汰后统计依然保留)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.created_pools = []
+
+    def _new_pool(self, scheme, host, port, request_context=None):
+        pool = super()._new_pool(scheme, host, port, request_context=request_context)
+        pool.ConnectionCls = _TIMED_CONNECTION_CLASSES.get(pool.ConnectionCls, pool.ConnectionCls)
+        self.created_pools.append(pool)
+        return pool
+
+
+class PooledHTTPAdapter(HTTPAdapter):
+    """
+    带连接复用统计的 HTTPAdapter。
+    urllib3 的连接池本身会累计 num_connections (新建连接数) 和 num_requests (发出的请求数)，
+    这里只是把它们汇总起来。
+    """
+
+    def init_poolmanager(self, connections, maxsize, block=False, **pool_kwargs):
+        super().init_poolmanager(connections, maxsize, block=block, **pool_kwargs)
+        self.poolmanager = _TrackingPoolManager(
+            num_pools=connections, maxsize=maxsize, block=block, **pool_kwargs
+        )
+
+    @property
+    def max_retries(self):
+        # 重试会重新发送请求体，而生成器已经读完: 这类请求不重试，避免静默地发出空的请求体
+        return _NO_RETRY if getattr(_one_shot_body, 'active', False) else self._max_retries
+
+    @max_retries.setter
+    def max_retries(self, value):
+        self._max_retries = value
+
+    def send(self, request, *args, **kwargs):
+        if not _is_one_shot(request.body):
+            return super().send(request, *args, **kwargs)
+        _one_shot_body.active = True
+        try:
+            return super().send(request, *args, **kwargs)
+        finally:
+            _one_shot_body.active = False
+
+    def connection_stats(self):
+        pools = self.poolmanager.created_pools
+        new_connections = sum(pool.num_connections for pool in pools)
+        requests_sent = sum(pool.num_requests for pool in pools)
+        return {
+            'requests': requests_sent,
+            'new_connections': new_connections,
+            'reused_connections': max(requests_sent - new_connections, 0),
+        }
+
+
+def _build_retry(retry_config):
+    """根据配置构建 urllib3 的 Retry 对象 (默认只对幂等方法重试)"""
+    return Retry(
+        total=retry_config.get('total', 3),
+        backoff_factor=retry_config.get('backoff_factor', 0.3),
+        status_forcelist=retry_config.get('status_forcelist', [502, 503, 504]),
+        allowed_methods=frozenset(
+            m.upper() for m in retry_config.get('allowed_methods', Retry.DEFAULT_ALLOWED_METHODS)
+        ),
+        raise_on_status=False, # 重试耗尽后返回最后一次响应，交给断言去判断状态码
+    )
+
 
 class ApiClient:
-    def __init__(self):
+    def __init__(self, pool_maxsize=None, retry=None):
+        """
+        :param pool_maxsize: 覆盖 api.pool.maxsize，多线程并发使用同一个客户端时 (e.g., 负载测试) 应不小于线程数
+        :param retry: 覆盖 api.retry 中的配置项，e.g., retry={'total': 0} 关闭重试 (负载测试中每次尝试都是一个样本)
+        """
         config = get_config() # <--- 在初始化时调用 get_config()
         if not config:
              logger.error("Failed to load configuration for ApiClient.")
              # 根据需要处理，可以抛出异常阻止实例化
              raise ValueError("API configuration could not be loaded.")
 
-        self.base_url = config.get("api", {}).get("base_url")
-        self.default_headers = config.get('api', {}).get('headers', {})
-        self.default_timeout = config.get('api', {}).get('timeout', 10)
+        api_config = config.get('api', {})
+        self.base_url = api_config.get("base_url")
+        self.default_headers = api_config.get('headers', {})
+        self.default_timeout = api_config.get('timeout', 10)
+        self.auth_config = api_config.get('auth')
+        self.cassette = None # core.cassette.Cassette，录制/回放模式下由 fixture 设置
+        self.log_settings = body_log_settings()
+        self._log_counter = itertools.count()
+        # 每个用例原样保留的响应体字节数上限，超出的部分压缩或落盘 (见 core/compact_response.py)
+        self.retention = ResponseRetention.from_config(api_config.get('response_capture', {}))
+        if pool_maxsize:
+            api_config = {**api_config, 'pool': {**api_config.get('pool', {}), 'maxsize': pool_maxsize}}
+        if retry is not None:
+            api_config = {**api_config, 'retry': {**api_config.get('retry', {}), **retry}}
+        self.session = self._create_session(api_config)
         logger.info(f"API Client initialized with base URL: {self.base_url}")
 
+    @staticmethod
+    def _create_session(api_config):
+        """创建带连接池和重试策略的 requests.Session，复用 TCP/TLS 连接"""
+        pool_config = api_config.get('pool', {})
+        adapter = PooledHTTPAdapter(
+            pool_connections=pool_config.get('connections', 10),
+            pool_maxsize=pool_config.get('maxsize', 10),
+            pool_block=pool_config.get('block', False),
+            max_retries=_build_retry(api_config.get('retry', {})),
+        )
+        session = requests.Session()
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        return session
+
+    def login(self, auth_config=None):
+        """
+        调用登录接口获取 token，只负责获取，不修改 headers。
+        xdist 分布式执行时由 conftest 保证只有一个 worker 真正调用。
+
+        :param auth_config: 认证配置，默认使用 config.yaml 中的 api.auth
+        :return: token 字符串
+        """
+        auth_config = auth_config or self.auth_config
+        response = self.post(auth_config['endpoint'], json=auth_config.get('payload'))
+        response.raise_for_status()
+        return response.json()[auth_config.get('token_field', 'token')]
+
+    def set_auth_token(self, token, scheme='Bearer'):
+        """把 token 加入默认 headers，后续所有请求都会携带"""
+        self.default_headers = {**self.default_headers, 'Authorization': f"{scheme} {token}".strip()}
+
+    def connection_stats(self):
+        """
+        返回连接复用统计: 请求数、新建连接数、复用连接数。
+        reused_connections 接近 requests 说明握手已基本消除。
+        """
+        stats = {'requests': 0, 'new_connections': 0, 'reused_connections': 0}
+        for adapter in {id(a): a for a in self.session.adapters.values()}.values():
+            if isinstance(adapter, PooledHTTPAdapter):
+                for key, value in adapter.connection_stats().items():
+                    stats[key] += value
+        return stats
+
+    def close(self):
+        """关闭 Session 并释放连接池中的所有连接 (录制模式下同时保存 cassette)"""
+        if self.cassette is not None:
+            self.cassette.save()
+        if self.session is not None:
+            logger.info(f"Closing API Client session. Connection stats: {self.connection_stats()}")
+            self.session.close()
+            self.session = None
+        self.retention.close()
+
+    def release_response_bodies(self):
+        """用例结束时调用: 压缩本用例中仍被引用的响应体，重新开始按用例计数"""
+        self.retention.reset()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
     def _send_request(self, method, endpoint, **kwargs):
         """内部方法，用于发送所有类型的请求"""
         url = f"{self.base_url}{endpoint}"
         headers = {**self.default_headers, **kwargs.pop('headers', {})} # 合并默认和自定义 headers
         timeout = kwargs.pop('timeout', self.default_timeout)
+        # 耗时统计的分组键，默认把路径中的 ID 归一化 (/users/2 -> /users/{id})
+        template = kwargs.pop('endpoint_template', None) or endpoint_template(endpoint)
+        stream = kwargs.get('stream', False) # 录制模式下 _send_via_cassette 会取走 stream，这里先记下
 
-        logger.debug(f"Sending {method.upper()} request to: {url}")
-        logger.debug(f"Headers: {headers}")
-        if 'params' in kwargs:
-            logger.debug(f"Query Params: {kwargs['params']}")
-        if 'json' in kwargs:
-            logger.debug(f"Request Body (JSON): {kwargs['json']}")
-        if 'data' in kwargs:
-             logger.debug(f"Request Body (Data): {kwargs['data']}")
+        # 日志内容只在对应级别开启时才构造，关闭时热路径上不做任何格式化
+        if is_enabled('DEBUG'):
+            self._log_request(method, url, headers, kwargs)
 
         try:
-            response = requests.request(
-                method=method,
-                url=url,
-                headers=headers,
-                timeout=timeout,
-                **kwargs
-            )
-            logger.debug(f"Response Status Code: {response.status_code}")
-            # 尝试记录响应体，不是json格式的响应则记录文本
-            try:
-                logger.trace(f"Response Body (JSON): {response.json()}")
-            except requests.exceptions.JSONDecodeError:
-                logger.trace(f"Response Body (Non-JSON): {response.text}")
+            _connect_timings.__dict__.clear()
+            start = time.perf_counter()
+            if self.cassette is not None and self.cassette.active:
+                response = self._send_via_cassette(method, url, headers, timeout, kwargs)
+            else:
+                response = self.session.request(
+                    method=method,
+                    url=url,
+                    headers=headers,
+                    timeout=timeout,
+                    **kwargs
+                )
+            response.timings = self._collect_timings(response, start)
+            if not getattr(response, 'from_cassette', False): # 回放的响应不计入耗时统计
+                latency_registry.record(f"{method.upper()} {template}", response.timings)
+            logger.debug("Response Status Code: {}", response.status_code)
+            if is_enabled('TRACE'):
+                if stream:
+                    logger.trace("Response Body: <streamed>")  # 流式响应体只能由调用方读取一次
+                else:
+                    self._log_response_body(response)
+            self.retention.track(response)
             return response
         except requests.exceptions.RequestException as e:
             logger.error(f"Request failed: {e}")
             raise
 
+    def _log_request(self, method, url, headers, kwargs):
+        max_chars = self.log_settings['body_max_chars']
+        logger.debug("Sending {} request to: {}", method.upper(), url)
+        logger.debug("Headers: {}", headers)
+        if kwargs.get('params') is not None:
+            logger.debug("Query Params: {}", kwargs['params'])
+        if kwargs.get('json') is not None:
+            logger.debug("Request Body (JSON): {}", truncate(kwargs['json'], max_chars))
+        if kwargs.get('data') is not None:
+            logger.debug("Request Body (Data): {}", truncate(kwargs['data'], max_chars))
+
+    def _log_response_body(self, response):
+        """
+        TRACE 级别记录响应体: 直接记录文本 (不再为了打日志解析 JSON)，按配置截断；
+        成功请求按 sample_success_every 采样，失败请求总是记录。
+        """
+        if response.status_code < 400 and next(self._log_counter) % self.log_settings['sample_success_every']:
+            logger.trace("Response Body: <sampled out, {} bytes>", len(response.content))
+            return
+        logger.trace("Response Body: {}", truncate(response.text, self.log_settings['body_max_chars']))
+
+    def _send_via_cassette(self, method, url, headers, timeout, kwargs):
+        """
+        与 Session.request 相同的 prepare + send 流程，中间插入 cassette 的回放/录制。
+        """
+        request_kwargs = {key: kwargs.pop(key) for key in REQUEST_ARGS if key in kwargs}
+        prepared = self.session.prepare_request(
+            requests.Request(method=method.upper(), url=url, headers=headers, **request_kwargs)
+        )
+        response = self.cassette.play(prepared)
+        if response is not None:
+            logger.debug("Replayed {} {} from cassette '{}'", prepared.method, prepared.url, self.cassette.name)
+            return response
+        settings = self.session.merge_environment_settings(
+            prepared.url, kwargs.pop('proxies', {}), kwargs.pop('stream', None),
+            kwargs.pop('verify', None), kwargs.pop('cert', None)
+        )
+        response = self.session.send(
+            prepared, timeout=timeout, allow_redirects=kwargs.pop('allow_redirects', True), **settings
+        )
+        if settings.get('stream'):
+            # 录制需要读取完整的响应体，流式响应不录制 (回放模式下需要改为非流式请求或使用 passthrough)
+            logger.debug("Not recording streamed response for {} {}", prepared.method, prepared.url)
+        else:
+            self.cassette.record(prepared, response)
+        return response
+
+    @staticmethod
+    def _collect_timings(response, start):
+        """汇总本次请求各阶段耗时 (毫秒)，不可用的阶段为 None。各阶段含义见 common.metrics.PHASES"""
+        connect = getattr(_connect_timings, 'connect', None)
+        tcp = getattr(_connect_timings, 'tcp', None)
+        tls = connect - tcp if connect is not None and tcp is not None and response.url.startswith('https') else None
+        return {
+            'total': (time.perf_counter() - start) * 1000,
+            'ttfb': response.elapsed.total_seconds() * 1000,
+            'connect': connect,
+            'tcp': tcp,
+            'tls': tls,
+        }
+
         #封装常用的HTTP方法
+    def request(self, method, endpoint, **kwargs):
+        """发送任意方法的请求 (方法名由调用方决定时使用，e.g., 负载测试、工作流)"""
+        return self._send_request(method, endpoint, **kwargs)
+
     def get(self, endpoint,params=None, **kwargs):
         """发送 GET 请求"""
         return self._send_request('GET', endpoint, params=params,**kwargs)
@@ -67,6 +344,45 @@ class ApiClient:
     def delete(self, endpoint, **kwargs):
         return self._send_request('delete', endpoint, **kwargs)
 
+    # 流式请求 (见 core/streaming.py)，响应体不整体读入内存
+    @contextmanager
+    def stream(self, method, endpoint, **kwargs):
+        """
+        发送 stream=True 的请求，退出时关闭响应 (连接归还连接池)。
+        响应体用 core.streaming.iter_chunks / iter_ndjson 逐块读取；
+        耗时统计中的 total 为收到响应头的时间，不含读取响应体。
+        """
+        response = self._send_request(method, endpoint, stream=True, **kwargs)
+        try:
+            yield response
+        finally:
+            response.close()
+
+    def download(self, endpoint, path, checksum=None, algorithm='sha256', method='GET', **kwargs):
+        """
+        下载响应体到文件并计算校验和，返回 core.streaming.DownloadResult。
+        状态码不是 2xx 时抛出 HTTPError，校验和不一致时抛出 ChecksumMismatchError。
+        """
+        with self.stream(method, endpoint, **kwargs) as response:
+            response.raise_for_status()
+            result = streaming.download(response, path, checksum, algorithm)
+        logger.info(f"Downloaded {result.size} bytes from {endpoint} to {path} ({algorithm}: {result.checksum})")
+        return result
+
+    def upload(self, endpoint, source, method='POST', content_type='application/octet-stream', **kwargs):
+        """
+        上传文件或数据流，请求体按块发送。
+
+        :param source: 文件路径 / 文件对象 (带 Content-Length，失败时可以重试) /
+                       bytes 生成器 (分块传输编码，不重试) / bytes
+        :param content_type: 请求的 Content-Type (覆盖默认的 application/json)
+        """
+        headers = {'Content-Type': content_type, **kwargs.pop('headers', {})}
+        if isinstance(source, (str, os.PathLike)):
+            with open(source, 'rb') as file:
+                return self._send_request(method, endpoint, data=file, headers=headers, **kwargs)
+        return self._send_request(method, endpoint, data=source, headers=headers, **kwargs)
+
 # 创建一个实例，方便其他模块导入后直接使用
 # 如果希望每次使用都是新实例，可以在 fixture 中创建
 # api_client = ApiClient()
@@ -0,0 +1,151 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import aiohttp
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from common.read_config import get_config
+from common.logger import logger
+from common.metrics import endpoint_template, latency_registry
+
+
+class AsyncApiClient:
+    """
+    ApiClient 的 asyncio 版本，接口保持一致 (get/post/put/patch/delete)。
+    通过信号量限制最大并发数，适合在一个用例中并发发送大量独立请求。
+
+    返回值是填充好的 requests.Response，因此 common.assertions 中的断言函数可以直接使用。
+    """
+
+    def __init__(self, concurrency=None):
+        config = get_config()
+        if not config:
+            logger.error("Failed to load configuration for AsyncApiClient.")
+            raise ValueError("API configuration could not be loaded.")
+
+        api_config = config.get('api', {})
+        self.base_url = api_config.get("base_url")
+        self.default_headers = api_config.get('headers', {})
+        self.default_timeout = api_config.get('timeout', 10)
+        self.concurrency = concurrency or api_config.get('async', {}).get('concurrency', 100)
+        self._session = None
+        self._semaphore = None
+        self._loop = None
+        logger.info(f"Async API Client initialized with base URL: {self.base_url}, concurrency: {self.concurrency}")
+
+    async def _get_session(self):
+        """ClientSession 必须在事件循环中创建，因此延迟到第一次请求时初始化"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.concurrency)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._session
+
+    async def _send_request(self, method, endpoint, **kwargs):
+        """内部方法，用于发送所有类型的请求 (与 ApiClient._send_request 的 header/timeout 合并规则一致)"""
+        url = f"{self.base_url}{endpoint}"
+        headers = {**self.default_headers, **(kwargs.pop('headers', None) or {})} # 合并默认和自定义 headers
+        timeout = kwargs.pop('timeout', self.default_timeout)
+        template = kwargs.pop('endpoint_template', None) or endpoint_template(endpoint)
+        # requests 风格的参数中 None 表示"不传"，aiohttp 不接受 params=None 以外的 None 组合
+        kwargs = {key: value for key, value in kwargs.items() if value is not None}
+
+        session = await self._get_session()
+        async with self._semaphore:
+            logger.debug("Sending async {} request to: {}", method.upper(), url)
+            start = time.perf_counter()
+            try:
+                async with session.request(
+                    method.upper(),
+                    url,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                    **kwargs
+                ) as resp:
+                    content = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logger.error(f"Async request failed: {method.upper()} {url}: {e!r}")
+                raise
+            elapsed = time.perf_counter() - start
+
+        logger.debug("Async Response Status Code: {}", resp.status)
+        response = self._to_requests_response(method, url, headers, resp, content, elapsed)
+        # aiohttp 不提供连接阶段的耗时，只记录总耗时
+        response.timings = {'total': elapsed * 1000}
+        latency_registry.record(f"{method.upper()} {template}", response.timings)
+        return response
+
+    @staticmethod
+    def _to_requests_response(method, url, headers, resp, content, elapsed):
+        """把 aiohttp 的响应转换为 requests.Response，复用现有断言"""
+        response = requests.Response()
+        response.status_code = resp.status
+        response.reason = resp.reason
+        response.headers = CaseInsensitiveDict()
+        for name, value in resp.headers.items():
+            # 重复的响应头 (e.g., 多个 Set-Cookie) 与 urllib3 一样用 ', ' 合并，直接转换只会保留其中一个
+            response.headers[name] = f"{response.headers[name]}, {value}" if name in response.headers else value
+        response.url = str(resp.url)
+        response.encoding = resp.get_encoding() if content else None
+        response.elapsed = timedelta(seconds=elapsed)
+        response._content = content
+        response.request = requests.Request(method.upper(), url, headers=headers).prepare()
+        return response
+
+    async def get(self, endpoint, params=None, **kwargs):
+        """发送 GET 请求"""
+        return await self._send_request('GET', endpoint, params=params, **kwargs)
+
+    async def post(self, endpoint, json=None, data=None, **kwargs):
+        """发送 POST 请求"""
+        return await self._send_request('POST', endpoint, json=json, data=data, **kwargs)
+
+    async def put(self, endpoint, json=None, data=None, **kwargs):
+        return await self._send_request('put', endpoint, json=json, data=data, **kwargs)
+
+    async def patch(self, endpoint, json=None, data=None, **kwargs):
+        return await self._send_request('patch', endpoint, json=json, data=data, **kwargs)
+
+    async def delete(self, endpoint, **kwargs):
+        return await self._send_request('delete', endpoint, **kwargs)
+
+    async def gather(self, calls, return_exceptions=False):
+        """
+        批量并发执行请求，结果顺序与传入顺序一致。
+
+        :param calls: 可迭代的协程，例如 (client.get(f"/users/{i}") for i in range(100))
+        :param return_exceptions: 为 True 时异常作为结果返回，而不是中断整个批次
+        :return: 响应列表
+        """
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+    def run(self, coro):
+        """
+        在客户端自己的事件循环中同步执行协程。
+        session 级别的 fixture 通过它在普通 (同步) 用例中驱动异步请求，
+        aiohttp 的连接在整个会话期间绑定在同一个事件循环上。
+        """
+        if self._loop is None or self._loop.is_closed():
+            self._loop = asyncio.new_event_loop()
+        return self._loop.run_until_complete(coro)
+
+    async def aclose(self):
+        """关闭 ClientSession 并释放连接"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def close(self):
+        """同步关闭: 关闭 session 以及 run() 使用的事件循环"""
+        if self._loop is not None and not self._loop.is_closed():
+            self._loop.run_until_complete(self.aclose())
+            self._loop.close()
+        self._loop = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.aclose()
@@ -0,0 +1,202 @@
+# core/cassette.py
+"""
+HTTP 录制/回放 (cassette): 第一次运行把请求/响应对录制到 gzip 压缩的 JSONL 文件中，
+之后的运行直接从内存索引中返回录制的响应，不访问网络。
+
+模式:
+- passthrough  : 不使用 cassette，所有请求都走网络 (默认)
+- record       : 所有请求都走网络，并重新录制 (开始录制前删除该 cassette 已有的所有文件，见 clear())
+- replay       : 只从录制中返回响应，找不到匹配的录制时抛出 CassetteMissError，绝不访问网络
+- new_episodes : 能匹配的请求从录制中返回，匹配不到的走网络并追加录制
+
+匹配键由 方法 + 路径 + 排序后的查询参数 + 规范化的请求体 (JSON 按键排序) 组成，
+不包含 host 和 headers，因此同一份录制可以在不同环境 (base_url) 下回放。
+同一个键录制了多次时 (e.g., 多次创建同名用户、轮询状态)，回放时按录制顺序依次返回，
+因此相同的响应也按次数保留。
+"""
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from common.logger import logger
+from common.utils import get_worker_id, is_xdist_worker
+
+MODES = ('passthrough', 'record', 'replay', 'new_episodes')
+
+
+class CassetteMissError(requests.exceptions.RequestException):
+    """replay 模式下找不到与请求匹配的录制"""
+
+
+def normalize_request(prepared):
+    """返回请求的匹配键 (sha1)，prepared 为 requests.PreparedRequest"""
+    parts = urlsplit(prepared.url)
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    body = prepared.body
+    if body is None:
+        body = b''
+    elif isinstance(body, str):
+        body = body.encode('utf-8')
+    elif not isinstance(body, bytes):
+        body = b'<stream>'  # 生成器/文件对象等流式请求体无法参与匹配
+    if body:
+        try:
+            body = json.dumps(json.loads(body), sort_keys=True, separators=(',', ':')).encode('utf-8')
+        except ValueError:
+            pass
+    raw = f"{prepared.method.upper()} {parts.path}?{query}\n".encode('utf-8') + body
+    return hashlib.sha1(raw).hexdigest()
+
+
+class Cassette:
+    """
+    :param directory: cassette 文件目录
+    :param name: cassette 名称，文件为 <name>.jsonl.gz (xdist worker 录制时为 <name>.<worker>.jsonl.gz)
+    :param mode: 见模块说明
+    """
+
+    def __init__(self, directory, name='default', mode='passthrough'):
+        if mode not in MODES:
+            raise ValueError(f"Unknown cassette mode '{mode}', expected one of {MODES}.")
+        self.directory = directory
+        self.name = name
+        self.mode = mode
+        self._entries = {}  # {key: [entry, ...]}
+        self._play_counts = {}  # {key: 已回放次数}
+        self._new_entries = []
+        self._lock = threading.Lock()
+        if mode in ('replay', 'new_episodes'):
+            self._load()
+
+    @property
+    def active(self):
+        return self.mode != 'passthrough'
+
+    @property
+    def save_path(self):
+        suffix = f".{get_worker_id()}" if is_xdist_worker() else ''
+        return os.path.join(self.directory, f"{self.name}{suffix}.jsonl.gz")
+
+    def _files(self):
+        base = os.path.join(self.directory, self.name)
+        return sorted(set(glob.glob(f"{base}.jsonl.gz") + glob.glob(f"{base}.*.jsonl.gz")))
+
+    def clear(self):
+        """
+        删除该 cassette 名称下的所有录制文件 (<name>.jsonl.gz 以及各 worker 的 <name>.*.jsonl.gz)。
+        record 模式开始前调用，避免上一次录制 (e.g., 使用了不同的 worker 数量) 残留的文件在回放时被合并进来。
+        使用 xdist 时应由主进程在 worker 启动前调用 (见 conftest.py)。
+        """
+        for path in self._files():
+            os.remove(path)
+            logger.info(f"Removed previous recording {path}")
+
+    def _load(self):
+        count = 0
+        for path in self._files():
+            with gzip.open(path, 'rt', encoding='utf-8') as file:
+                for line in file:
+                    entry = json.loads(line)
+                    self._entries.setdefault(entry['key'], []).append(entry)
+                    count += 1
+        logger.info(f"Loaded {count} recorded interactions for cassette '{self.name}' (mode: {self.mode})")
+
+    def __len__(self):
+        return sum(len(entries) for entries in self._entries.values())
+
+    def play(self, prepared):
+        """
+        返回与请求匹配的录制响应；需要走网络时返回 None。
+        replay 模式下找不到匹配时抛出 CassetteMissError。
+        """
+        if self.mode in ('passthrough', 'record'):
+            return None
+        key = normalize_request(prepared)
+        with self._lock:
+            entries = self._entries.get(key)
+            if entries:
+                index = self._play_counts.get(key, 0)
+                self._play_counts[key] = index + 1
+                entry = entries[index % len(entries)]
+            else:
+                entry = None
+        if entry is not None:
+            return self._build_response(entry, prepared)
+        if self.mode == 'replay':
+            raise CassetteMissError(
+                f"No recorded interaction for {prepared.method} {prepared.url} in cassette '{self.name}'. "
+                f"Re-run with --cassette-mode=new_episodes (or record) to record it.")
+        return None
+
+    def record(self, prepared, response):
+        """记录一次真实的请求/响应 (passthrough / replay 模式下不记录)"""
+        if self.mode not in ('record', 'new_episodes'):
+            return
+        content = response.content
+        entry = {
+            'key': normalize_request(prepared),
+            'method': prepared.method,
+            'url': prepared.url,
+            'status': response.status_code,
+            'reason': response.reason,
+            'headers': dict(response.headers),
+        }
+        try:
+            entry['body'] = content.decode('utf-8')
+        except UnicodeDecodeError:
+            entry['body_b64'] = base64.b64encode(content).decode('ascii')
+        with self._lock:
+            # 相同的响应也要保留: 回放按录制顺序返回，去重会打乱顺序 (A, A, B 会回放成 A, B, A)
+            self._entries.setdefault(entry['key'], []).append(entry)
+            self._new_entries.append(entry)
+
+    @staticmethod
+    def _build_response(entry, prepared):
+        response = requests.Response()
+        response.status_code = entry['status']
+        response.reason = entry.get('reason')
+        response.headers = CaseInsensitiveDict(entry.get('headers', {}))
+        response.encoding = get_encoding_from_headers(response.headers)
+        response.url = prepared.url
+        response.request = prepared
+        response.elapsed = timedelta(0)
+        if 'body_b64' in entry:
+            response._content = base64.b64decode(entry['body_b64'])
+        else:
+            response._content = entry.get('body', '').encode('utf-8')
+        response._content_consumed = True  # 响应体已在内存中，iter_content (流式读取) 直接切分它
+        response.from_cassette = True
+        return response
+
+    def save(self):
+        """
+        写出录制。record 模式覆盖本进程的 cassette 文件，new_episodes 模式在原文件基础上追加。
+        先写临时文件再原子替换，避免中断时损坏 cassette。
+        """
+        with self._lock:
+            if not self._new_entries:
+                return
+            path = self.save_path
+            os.makedirs(self.directory, exist_ok=True)
+            existing = []
+            if self.mode == 'new_episodes' and os.path.exists(path):
+                with gzip.open(path, 'rt', encoding='utf-8') as file:
+                    existing = [line for line in file if line.strip()]
+            tmp_path = f"{path}.{os.getpid()}.tmp"
+            with gzip.open(tmp_path, 'wt', encoding='utf-8') as file:
+                file.writelines(existing)
+                for entry in self._new_entries:
+                    file.write(json.dumps(entry, ensure_ascii=False, separators=(',', ':')) + '\n')
+            os.replace(tmp_path, path)
+            logger.info(f"Saved {len(self._new_entries)} new interactions to cassette {path}")
+            self._new_entries = []
@@ -0,0 +1,162 @@
+# core/compact_response.py
+"""
+紧凑的响应体存储，限制长时间运行 (soak / 大量数据驱动用例) 时响应体占用的内存。
+
+session 级别的 api_client 会活过整个测试会话，失败用例的 traceback、日志等会让 Response 对象
+(以及完整的响应体和解析后的 JSON) 一直存活。ResponseRetention 为每个用例设置一个保留字节数上限:
+- 上限以内的响应体按原样保留 (断言时直接访问，没有额外开销)
+- 超过上限后的响应体立即压缩 (zlib)，超过 spill_min_bytes 的大响应体写入临时文件
+- 用例结束 (reset) 时，本用例中仍然存活的响应全部压缩/落盘，并丢弃解析后的 JSON 缓存
+
+压缩后的响应仍然是 requests.Response (CompactResponse)，content / text / json() 按需解压，
+现有的断言函数不需要任何修改。
+"""
+import os
+import shutil
+import tempfile
+import threading
+import weakref
+import zlib
+
+import requests
+from requests.models import iter_slices
+
+from common.logger import logger
+
+
+class _CompressedBody:
+    __slots__ = ('data', 'size')
+
+    def __init__(self, content):
+        self.data = zlib.compress(content, 1)  # 最快的压缩级别: JSON 文本通常也能压缩到 1/5 以下
+        self.size = len(content)
+
+    def read(self):
+        return zlib.decompress(self.data)
+
+
+class _SpilledBody:
+    __slots__ = ('path', 'size')
+
+    def __init__(self, content, path):
+        with open(path, 'wb') as file:
+            file.write(content)
+        self.path = path
+        self.size = len(content)
+
+    def read(self):
+        with open(self.path, 'rb') as file:
+            return file.read()
+
+
+class CompactResponse(requests.Response):
+    """响应体以压缩或临时文件形式保存的 Response，每次访问 content 时按需还原"""
+
+    @property
+    def content(self):
+        body = self.__dict__.get('_compact_body')
+        return body.read() if body is not None else super().content
+
+    def iter_content(self, chunk_size=1, decode_unicode=False):
+        body = self.__dict__.get('_compact_body')
+        if body is None:
+            return super().iter_content(chunk_size, decode_unicode)
+        chunks = iter_slices(body.read(), chunk_size)
+        return requests.utils.stream_decode_response_unicode(chunks, self) if decode_unicode else chunks
+
+
+class ResponseRetention:
+    """
+    按用例限制保留在内存中的响应体字节数 (线程安全)。
+
+    :param max_bytes_per_test: 每个用例最多原样保留的响应体字节数
+    :param compress_min_bytes: 小于该大小的响应体不参与统计，也不压缩 (压缩收益小于开销)
+    :param spill_min_bytes: 不小于该大小的响应体写入临时文件，而不是压缩后留在内存中
+    :param spill_dir: 临时文件的父目录，None 表示系统临时目录
+    """
+
+    def __init__(self, max_bytes_per_test=1024 * 1024, compress_min_bytes=4096, spill_min_bytes=256 * 1024,
+                 spill_dir=None):
+        self.max_bytes_per_test = max_bytes_per_test
+        self.compress_min_bytes = compress_min_bytes
+        self.spill_min_bytes = spill_min_bytes
+        self.spill_parent = spill_dir
+        self.retained_bytes = 0
+        self.stats = {'compressed': 0, 'spilled': 0, 'compacted_bytes': 0}
+        self._tracked = []  # 本用例中原样保留的响应 (弱引用)
+        self._spill_dir = None
+        self._counter = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, capture_config):
+        return cls(
+            max_bytes_per_test=capture_config.get('max_retained_bytes_per_test', 1024 * 1024),
+            compress_min_bytes=capture_config.get('compress_min_bytes', 4096),
+            spill_min_bytes=capture_config.get('spill_min_bytes', 256 * 1024),
+            spill_dir=capture_config.get('spill_dir'),
+        )
+
+    def track(self, response):
+        """记录一个新响应；超出本用例的保留上限时立即压缩"""
+        content = response.__dict__.get('_content')
+        if not isinstance(content, bytes) or len(content) < self.compress_min_bytes:
+            return  # 流式响应 (尚未读取) 或小响应体
+        with self._lock:
+            if self.retained_bytes + len(content) <= self.max_bytes_per_test:
+                self.retained_bytes += len(content)
+                self._tracked.append(weakref.ref(response))
+                return
+        self.compact(response)
+
+    def compact(self, response):
+        """把响应体转为压缩或落盘存储，并丢弃解析后的 JSON 缓存"""
+        content = response.__dict__.get('_content')
+        if not isinstance(content, bytes) or isinstance(response, CompactResponse):
+            return
+        if len(content) >= self.spill_min_bytes:
+            body = _SpilledBody(content, self._next_spill_path())
+            weakref.finalize(response, _remove_quietly, body.path)
+            kind = 'spilled'
+        else:
+            body = _CompressedBody(content)
+            kind = 'compressed'
+        with self._lock:  # 并发用例 (e.g., 负载测试) 共享同一个 ApiClient
+            self.stats[kind] += 1
+            self.stats['compacted_bytes'] += len(content)
+        response.__class__ = CompactResponse
+        response.__dict__['_compact_body'] = body
+        response._content = None
+        response.__dict__.pop('_parsed_json', None)
+
+    def _next_spill_path(self):
+        with self._lock:
+            if self._spill_dir is None:
+                self._spill_dir = tempfile.mkdtemp(prefix='autodemo-bodies-', dir=self.spill_parent)
+            self._counter += 1
+            return os.path.join(self._spill_dir, f"{self._counter}.body")
+
+    def reset(self):
+        """用例结束: 压缩本用例中仍然存活的响应，重新开始计数"""
+        with self._lock:
+            tracked, self._tracked = self._tracked, []
+            self.retained_bytes = 0
+        for ref in tracked:
+            response = ref()
+            if response is not None:
+                self.compact(response)
+
+    def close(self):
+        """删除所有落盘的响应体"""
+        if self._spill_dir is not None:
+            shutil.rmtree(self._spill_dir, ignore_errors=True)
+            self._spill_dir = None
+        if self.stats['compressed'] or self.stats['spilled']:
+            logger.info(f"Compacted response bodies: {self.stats}")
+
+
+def _remove_quietly(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
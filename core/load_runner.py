@@ -0,0 +1,231 @@
+# core/load_runner.py
+"""
+负载测试模式: 复用数据驱动用例 (e.g., data/user_creation_data.yaml)，
+通过 ApiClient 以固定速率或固定并发在一段时间内反复回放，输出吞吐量、错误率和延迟百分位。
+
+两种调度方式:
+- open   (开环): 按固定到达速率 (req/s) 发起请求，不受响应快慢影响。
+                 延迟从"计划发送时间"开始计算，避免服务变慢时低估延迟 (coordinated omission)。
+- closed (闭环): N 个虚拟用户，每个用户收到响应后立即发起下一个请求。
+
+用法 (在项目根目录执行):
+    python -m core.load_runner --data data/user_creation_data.yaml --method POST --endpoint /users \\
+        --mode open --rate 50 --duration 30
+    python -m core.load_runner --data data/user_creation_data.yaml --method POST --endpoint /users \\
+        --mode closed --users 20 --duration 30 --base-url http://127.0.0.1:8000/api --output reports/load.json
+    # 对本地模拟服务 (core/mock_server.py，独立子进程) 压测，测量客户端本身的吞吐量
+    python -m core.load_runner --data data/user_creation_data.yaml --mode closed --users 20 --duration 10 \\
+        --mock-server --mock-latency-ms 5
+"""
+import argparse
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common.logger import logger
+from common.metrics import LatencyHistogram
+from common.read_yaml import iter_cases
+from core.api_client import ApiClient
+from core.mock_server import MockServer
+
+NO_RETRY = {'total': 0}  # 负载测试中每次尝试都作为一个样本记录
+
+
+class LoadResult:
+    """负载测试结果 (线程安全地累加)"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.requests = 0
+        self.errors = 0
+        self.error_samples = {}
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def record(self, latency_ms, error=None):
+        with self._lock:
+            self.requests += 1
+            self.latency.record(latency_ms)
+            if error is not None:
+                self.errors += 1
+                self.error_samples[error] = self.error_samples.get(error, 0) + 1
+
+    @property
+    def duration(self):
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def throughput(self):
+        return self.requests / self.duration if self.duration > 0 else 0.0
+
+    @property
+    def error_rate(self):
+        return self.errors / self.requests if self.requests else 0.0
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'error_rate': round(self.error_rate, 4),
+            'duration_s': round(self.duration, 3),
+            'throughput_rps': round(self.throughput, 2),
+            'latency_ms': self.latency.summary(),
+            'error_samples': dict(sorted(self.error_samples.items(), key=lambda item: -item[1])[:10]),
+        }
+
+
+class LoadRunner:
+    """
+    :param client: ApiClient 实例 (连接池大小应不小于并发数，见 config.yaml 的 api.pool.maxsize；
+                   应关闭重试，e.g., ApiClient(retry=NO_RETRY)，否则重试会掩盖错误并把退避时间计入延迟)
+    :param cases: 用例列表，每条用例使用 payload / params / expected_status 字段
+    :param method: HTTP 方法
+    :param endpoint: 接口路径，可以使用用例中的字段做格式化，e.g., '/users/{user_id}'
+    """
+
+    def __init__(self, client, cases, method='POST', endpoint='/users'):
+        if not cases:
+            raise ValueError("LoadRunner needs at least one case to replay.")
+        self.client = client
+        self.cases = cases
+        self.method = method.upper()
+        self.endpoint = endpoint
+
+    def _execute(self, case, result, scheduled_at=None):
+        """发送一条用例对应的请求并记录结果; scheduled_at 不为空时延迟从计划时间算起 (开环)"""
+        start = scheduled_at if scheduled_at is not None else time.perf_counter()
+        error = None
+        try:
+            endpoint = self.endpoint.format(**case) if '{' in self.endpoint else self.endpoint
+            kwargs = {'params': case.get('params')}
+            if self.method not in ('GET', 'DELETE'):
+                kwargs['json'] = case.get('payload')
+            response = self.client.request(self.method, endpoint, **kwargs)
+            expected_status = case.get('expected_status')
+            if expected_status is not None and response.status_code != expected_status:
+                error = f"status {response.status_code} != {expected_status}"
+            elif expected_status is None and response.status_code >= 400:
+                error = f"status {response.status_code}"
+        except requests.exceptions.RequestException as e:
+            error = type(e).__name__
+        except Exception as e:
+            # 用例数据或参数错误 (e.g., endpoint 中引用了用例没有的字段) 也计为错误，
+            # 否则闭环的虚拟用户线程会直接退出，开环的异常会被 future 吞掉，结果中看不到任何请求
+            error = f"{type(e).__name__}: {e}"
+        result.record((time.perf_counter() - start) * 1000, error)
+
+    def run_open(self, rate, duration, max_workers=None):
+        """
+        开环: 以 rate (req/s) 的固定到达速率发送 duration 秒。
+        请求按计划时间提交到线程池，线程池大小决定最多能同时在途多少请求。
+        """
+        result = LoadResult()
+        interval = 1.0 / rate
+        max_workers = max_workers or min(max(int(rate), 1), 256)
+        cases = itertools.cycle(self.cases)
+        result.started_at = time.perf_counter()
+        deadline = result.started_at + duration
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='load-open') as executor:
+            for i in itertools.count():
+                scheduled_at = result.started_at + i * interval
+                if scheduled_at >= deadline:
+                    break
+                delay = scheduled_at - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                executor.submit(self._execute, next(cases), result, scheduled_at)
+        result.finished_at = time.perf_counter()
+        return result
+
+    def run_closed(self, users, duration):
+        """闭环: users 个虚拟用户各自循环发送请求，持续 duration 秒"""
+        result = LoadResult()
+        result.started_at = time.perf_counter()
+        deadline = result.started_at + duration
+
+        def virtual_user(offset):
+            for case in itertools.islice(itertools.cycle(self.cases), offset, None):
+                if time.perf_counter() >= deadline:
+                    return
+                self._execute(case, result)
+
+        threads = [threading.Thread(target=virtual_user, args=(i % len(self.cases),), name=f'load-vu-{i}', daemon=True)
+                   for i in range(users)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        result.finished_at = time.perf_counter()
+        return result
+
+    def run(self, mode='closed', rate=10, users=10, duration=10):
+        logger.info(f"Starting load test: {self.method} {self.endpoint}, mode={mode}, "
+                    f"rate={rate if mode == 'open' else '-'}, users={users if mode == 'closed' else '-'}, "
+                    f"duration={duration}s, cases={len(self.cases)}")
+        if mode == 'open':
+            result = self.run_open(rate, duration)
+        elif mode == 'closed':
+            result = self.run_closed(users, duration)
+        else:
+            raise ValueError(f"Unknown load mode '{mode}', expected 'open' or 'closed'.")
+        logger.info(f"Load test finished: {result.summary()}")
+        return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay data-driven API cases as a load test.")
+    parser.add_argument('--data', required=True, help="用例数据文件 (YAML / JSONL)，相对于项目根目录")
+    parser.add_argument('--method', default='POST')
+    parser.add_argument('--endpoint', default='/users')
+    parser.add_argument('--mode', choices=['open', 'closed'], default='closed')
+    parser.add_argument('--rate', type=float, default=10, help="开环模式的到达速率 (req/s)")
+    parser.add_argument('--users', type=int, default=10, help="闭环模式的虚拟用户数")
+    parser.add_argument('--duration', type=float, default=10, help="持续时间 (秒)")
+    parser.add_argument('--base-url', help="覆盖 config.yaml 中的 api.base_url")
+    parser.add_argument('--mock-server', action='store_true', help="在子进程中启动本地模拟服务并对其压测")
+    parser.add_argument('--mock-latency-ms', type=float, default=0, help="模拟服务注入的固定延迟 (毫秒)")
+    parser.add_argument('--mock-error-rate', type=float, default=0.0, help="模拟服务注入错误的概率")
+    parser.add_argument('--max-error-rate', type=float, default=None, help="错误率超过该值时返回非 0 退出码")
+    parser.add_argument('--output', help="结果 JSON 输出路径")
+    args = parser.parse_args(argv)
+
+    cases = list(iter_cases(args.data))
+    concurrency = args.users if args.mode == 'closed' else min(max(int(args.rate), 1), 256)
+    mock_server = None
+    if args.mock_server:
+        mock_server = MockServer.spawn(latency_ms=args.mock_latency_ms, error_rate=args.mock_error_rate)
+    try:
+        # 关闭重试: 重试会掩盖服务端错误，退避的等待时间也会被计入延迟
+        with ApiClient(pool_maxsize=concurrency, retry=NO_RETRY) as client:
+            if mock_server is not None:
+                client.base_url = mock_server.base_url
+            elif args.base_url:
+                client.base_url = args.base_url
+            result = LoadRunner(client, cases, args.method, args.endpoint).run(
+                args.mode, rate=args.rate, users=args.users, duration=args.duration)
+    finally:
+        if mock_server is not None:
+            mock_server.stop()
+
+    summary = result.summary()
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w', encoding='utf-8') as file:
+            json.dump(summary, file, indent=2, ensure_ascii=False)
+    if result.requests == result.errors:
+        logger.error("Load test failed: no request completed successfully.")
+        return 1
+    if args.max_error_rate is not None and result.error_rate > args.max_error_rate:
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,428 @@
+# core/mock_server.py
+"""
+本地的 reqres 风格模拟服务 (asyncio 实现的 HTTP/1.1 服务，支持 keep-alive)，
+用于在没有网络时运行用例，以及在压测/基准测试中测量客户端本身的开销。
+
+支持的接口 (路径前缀默认 /api，与 config.yaml 中的 base_url 一致):
+    GET    /api/users?page=2&per_page=6   用户列表 (12 个固定用户，与 reqres.in 相同)
+    GET    /api/users/{id}                单个用户，不存在时返回 404 和 {}
+    POST   /api/users                     201，回显请求体并加上 id 和 createdAt
+    PUT    /api/users/{id}                200，回显请求体并加上 updatedAt
+    PATCH  /api/users/{id}                同 PUT
+    DELETE /api/users/{id}                204，空响应体
+    GET    /api/users/export?count=100000 NDJSON 流 (分块传输)，每行一个用户，边生成边发送
+    POST   /api/uploads                   201，返回收到的请求体大小和 sha256 (PUT 同)
+
+故障注入 (所有请求生效): latency_ms 固定延迟 + jitter_ms 随机抖动；
+error_rate 的概率返回 error_status (默认 503)。
+
+三种启动方式:
+- 进程内: MockServer().start() 在后台线程中运行事件循环
+- 子进程: MockServer.spawn() 启动独立进程，测量客户端性能时不与客户端争抢 GIL
+- 命令行: python -m core.mock_server --port 8000 --latency-ms 5 --error-rate 0.01
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import string
+import subprocess
+import sys
+import threading
+from datetime import datetime, timezone
+from urllib.parse import parse_qsl, urlsplit
+
+from common.logger import logger
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_EXPORT_BATCH = 500  # 导出接口每个分块包含的记录数
+
+_REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request', 404: 'Not Found',
+            405: 'Method Not Allowed', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+_SUPPORT = {
+    'url': 'https://contentcaddy.io?utm_source=reqres&utm_medium=json&utm_campaign=referral',
+    'text': 'Tired of writing endless social media content? Let Content Caddy generate it for you.',
+}
+
+USERS = [
+    {'id': user_id, 'email': f"{first.lower()}.{last.lower()}@reqres.in", 'first_name': first, 'last_name': last,
+     'avatar': f"https://reqres.in/img/faces/{user_id}-image.jpg"}
+    for user_id, (first, last) in enumerate([
+        ('George', 'Bluth'), ('Janet', 'Weaver'), ('Emma', 'Wong'), ('Eve', 'Holt'),
+        ('Charles', 'Morris'), ('Tracey', 'Ramos'), ('Michael', 'Lawson'), ('Lindsay', 'Ferguson'),
+        ('Tobias', 'Funke'), ('Byron', 'Fields'), ('George', 'Edwards'), ('Rachel', 'Howell'),
+    ], start=1)
+]
+
+
+class _BadRequest(Exception):
+    pass
+
+
+def _parse_length(value, base, name):
+    """解析 Content-Length (十进制) 或块大小 (十六进制)，只接受非负整数"""
+    digits = string.hexdigits if base == 16 else string.digits
+    if not value or any(char not in digits for char in value):
+        raise _BadRequest(f"Invalid {name}: {value!r}")
+    return int(value, base)
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+
+class MockServer:
+    """
+    :param host: 监听地址
+    :param port: 监听端口，0 表示由系统分配空闲端口
+    :param base_path: 接口路径前缀
+    :param latency_ms: 每个请求的固定延迟 (毫秒)
+    :param jitter_ms: 在固定延迟上叠加的 0~jitter_ms 随机延迟
+    :param error_rate: 返回 error_status 的概率 (0~1)
+    :param error_status: 注入错误时返回的状态码
+    :param seed: 随机数种子，便于复现故障注入的结果
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, base_path='/api', latency_ms=0, jitter_ms=0,
+                 error_rate=0.0, error_status=503, seed=None):
+        self.host = host
+        self.port = port
+        self.base_path = base_path.rstrip('/')
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self._random = random.Random(seed)
+        self._next_id = 100
+        self._users = {user['id']: user for user in USERS}
+        self._single_user_bodies = {  # GET 单个用户的响应体预先序列化
+            user_id: json.dumps({'data': user, 'support': _SUPPORT}).encode('utf-8')
+            for user_id, user in self._users.items()
+        }
+        self._loop = None
+        self._task = None
+        self._server = None
+        self._thread = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}{self.base_path}"
+
+    def configure(self, **options):
+        """运行中调整故障注入参数，e.g., server.configure(latency_ms=50, error_rate=0.1)"""
+        for name, value in options.items():
+            if name not in ('latency_ms', 'jitter_ms', 'error_rate', 'error_status'):
+                raise ValueError(f"Unknown mock server option '{name}'")
+            setattr(self, name, value)
+
+    # --- HTTP ---
+
+    async def _read_body(self, reader, headers):
+        """读取请求体，Content-Length 或块大小不合法时抛出 _BadRequest"""
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            chunks = []
+            while True:
+                size_line = await reader.readuntil(b'\r\n')
+                size = _parse_length(size_line.split(b';', 1)[0].strip().decode('latin-1'), 16, 'chunk size')
+                if size == 0:
+                    await reader.readuntil(b'\r\n')  # 结尾的空行 (不支持 trailer)
+                    return b''.join(chunks)
+                chunks.append(await reader.readexactly(size))
+                await reader.readexactly(2)
+        length = _parse_length(headers.get('content-length') or '0', 10, 'Content-Length')
+        return await reader.readexactly(length) if length else b''
+
+    async def _handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    return  # 客户端关闭了 keep-alive 连接
+                lines = head.decode('latin-1').split('\r\n')
+                try:
+                    method, target, version = lines[0].split(' ', 2)
+                except ValueError:
+                    writer.write(self._render(400, {}, keep_alive=False))
+                    return
+                headers = {}
+                for line in lines[1:]:
+                    if line:
+                        name, _, value = line.partition(':')
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    body = await self._read_body(reader, headers)
+                except _BadRequest as e:
+                    # 请求体的边界未知，连接上剩余的数据无法解析，回复 400 后关闭连接
+                    writer.write(self._render(400, {'error': str(e)}, keep_alive=False))
+                    await writer.drain()
+                    return
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection != 'close' and (version != 'HTTP/1.0' or connection == 'keep-alive')
+
+                self.requests += 1
+                delay = self.latency_ms + (self._random.uniform(0, self.jitter_ms) if self.jitter_ms else 0)
+                if delay:
+                    await asyncio.sleep(delay / 1000)
+                if self.error_rate and self._random.random() < self.error_rate:
+                    status, payload = self.error_status, {'error': 'injected failure'}
+                else:
+                    try:
+                        status, payload = self.route(method.upper(), target, body)
+                    except _BadRequest as e:
+                        status, payload = 400, {'error': str(e)}
+                if hasattr(payload, '__next__'):
+                    await self._write_chunked(writer, status, payload, keep_alive)
+                else:
+                    writer.write(self._render(status, payload, keep_alive))
+                    await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            pass  # 服务停止时取消空闲的 keep-alive 连接，正常结束即可
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _render(status, payload, keep_alive=True):
+        """payload 为 None 时响应体为空；bytes 原样输出；其余序列化为 JSON"""
+        if payload is None:
+            body = b''
+        elif isinstance(payload, bytes):
+            body = payload
+        else:
+            body = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+                f"Content-Type: application/json; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        return head.encode('latin-1') + body  # 响应头和响应体一次写出，避免 Nagle / 延迟 ACK 带来的等待
+
+    @staticmethod
+    async def _write_chunked(writer, status, chunks, keep_alive=True):
+        """分块传输编码发送生成器产出的响应体，每块写出后等待缓冲区排空 (服务端内存同样有界)"""
+        writer.write((f"HTTP/1.1 {status} {_REASONS.get(status, 'Unknown')}\r\n"
+                      f"Content-Type: application/x-ndjson; charset=utf-8\r\n"
+                      f"Transfer-Encoding: chunked\r\n"
+                      f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n").encode('latin-1'))
+        for chunk in chunks:
+            writer.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+        await writer.drain()
+
+    # --- 路由 ---
+
+    def route(self, method, target, body):
+        """返回 (status, payload)，payload 为 dict / bytes / None / bytes 生成器 (分块发送)"""
+        parts = urlsplit(target)
+        path = parts.path
+        if self.base_path:
+            if not path.startswith(self.base_path + '/'):
+                return 404, {}
+            path = path[len(self.base_path):]
+        segments = [segment for segment in path.split('/') if segment]
+        if segments == ['uploads']:
+            if method not in ('POST', 'PUT'):
+                return 405, {}
+            return 201, {'size': len(body), 'sha256': hashlib.sha256(body).hexdigest()}
+        if not segments or segments[0] != 'users' or len(segments) > 2:
+            return 404, {}
+        if len(segments) == 1:
+            if method == 'GET':
+                return 200, self._list_users(dict(parse_qsl(parts.query)))
+            if method == 'POST':
+                return 201, self._create_user(body)
+            return 405, {}
+        if segments[1] == 'export':
+            return (200, self._export_users(dict(parse_qsl(parts.query)))) if method == 'GET' else (405, {})
+        try:
+            user_id = int(segments[1])
+        except ValueError:
+            return 404, {}
+        if method == 'GET':
+            user_body = self._single_user_bodies.get(user_id)
+            return (200, user_body) if user_body is not None else (404, {})
+        if method in ('PUT', 'PATCH'):
+            return 200, {**self._json(body), 'updatedAt': _now()}
+        if method == 'DELETE':
+            return 204, None
+        return 405, {}
+
+    @staticmethod
+    def _json(body):
+        if not body:
+            return {}
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise _BadRequest("Request body is not valid JSON") from None
+        if not isinstance(data, dict):
+            raise _BadRequest("Request body must be a JSON object")
+        return data
+
+    def _list_users(self, query):
+        try:
+            page = max(int(query.get('page', 1)), 1)
+            per_page = max(int(query.get('per_page', 6)), 1)
+        except ValueError:
+            raise _BadRequest("page and per_page must be integers") from None
+        users = list(self._users.values())
+        start = (page - 1) * per_page
+        return {'page': page, 'per_page': per_page, 'total': len(users),
+                'total_pages': -(-len(users) // per_page), 'data': users[start:start + per_page],
+                'support': _SUPPORT}
+
+    def _export_users(self, query):
+        try:
+            count = max(int(query.get('count', 1000)), 0)
+        except ValueError:
+            raise _BadRequest("count must be an integer") from None
+        users = list(self._users.values())
+
+        def generate():
+            for start in range(0, count, _EXPORT_BATCH):
+                lines = []
+                for index in range(start, min(start + _EXPORT_BATCH, count)):
+                    user = users[index % len(users)]
+                    lines.append(json.dumps({**user, 'id': index + 1}))
+                yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+        return generate()
+
+    def _create_user(self, body):
+        self._next_id += 1
+        return {**self._json(body), 'id': str(self._next_id), 'createdAt': _now()}
+
+    # --- 生命周期 ---
+
+    async def serve(self, on_ready=None):
+        """在当前事件循环中启动服务并一直运行，开始监听后调用 on_ready()"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if on_ready is not None:
+            on_ready()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start(self, timeout=10):
+        """在后台线程中启动 (进程内模式)，返回 self"""
+        ready = threading.Event()
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.serve(ready.set))
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            try:
+                self._loop.run_until_complete(self._task)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                # 取消仍在处理中的 keep-alive 连接
+                pending = asyncio.all_tasks(self._loop)
+                for task in pending:
+                    task.cancel()
+                self._loop.run_until_complete(asyncio.gather(*pending, return_exceptions=True))
+                self._loop.close()
+
+        self._thread = threading.Thread(target=run, name='mock-server', daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise RuntimeError(f"Mock server did not start within {timeout}s")
+        logger.info(f"Mock server started in-process at {self.base_url}")
+        return self
+
+    def stop(self):
+        if self._thread is None:
+            return
+        if not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+        self._thread.join(timeout=5)
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    @staticmethod
+    def spawn(**options):
+        """在子进程中启动 (子进程模式)，参数与构造函数相同，返回 MockServerProcess"""
+        return MockServerProcess(**options)
+
+
+class MockServerProcess:
+    """子进程中运行的 MockServer，接口与进程内模式一致 (base_url / stop / with 语句)"""
+
+    def __init__(self, host='127.0.0.1', port=0, base_path='/api', **options):
+        command = [sys.executable, '-m', 'core.mock_server', '--host', host, '--port', str(port),
+                   '--base-path', base_path, '--print-port']
+        for name, value in options.items():
+            if value is not None:
+                command += [f"--{name.replace('_', '-')}", str(value)]
+        self.host = host
+        self.base_path = base_path.rstrip('/')
+        self.process = subprocess.Popen(command, cwd=PROJECT_ROOT, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL, text=True)
+        line = self.process.stdout.readline()  # 子进程开始监听后输出实际端口，启动失败时得到空行
+        if not line.strip().isdigit():
+            self.stop()
+            raise RuntimeError(f"Mock server subprocess failed to start: {line!r}")
+        self.port = int(line)
+        logger.info(f"Mock server started in subprocess (pid {self.process.pid}) at {self.base_url}")
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}{self.base_path}"
+
+    def stop(self):
+        if self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.process.stdout:
+            self.process.stdout.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local reqres-style mock API server.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000, help="0 表示由系统分配空闲端口")
+    parser.add_argument('--base-path', default='/api')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--jitter-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--print-port', action='store_true', help="开始监听后在标准输出打印端口 (供父进程读取)")
+    args = parser.parse_args(argv)
+
+    server = MockServer(args.host, args.port, args.base_path, args.latency_ms, args.jitter_ms,
+                        args.error_rate, args.error_status, args.seed)
+
+    def on_ready():
+        print(server.port if args.print_port else f"Mock server listening at {server.base_url}", flush=True)
+
+    try:
+        asyncio.run(server.serve(on_ready))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    main()
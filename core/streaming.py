@@ -0,0 +1,122 @@
+# core/streaming.py
+"""
+流式读取响应体 (stream=True)，响应体不会整体读入内存，适用于返回几百 MB 的导出接口。
+
+    with api_client.stream('GET', '/users/export') as response:
+        for record in iter_ndjson(response):
+            ...
+
+    result = api_client.download('/reports/export.csv', 'reports/export.csv', checksum='9f86d0...')
+
+上传: post / put 的 data 参数可以直接传入文件对象或 bytes 生成器 (分块传输，不会整体读入内存)，
+也可以使用 ApiClient.upload(endpoint, source)，source 为文件路径时按块读取。
+"""
+import hashlib
+import json
+import os
+
+import requests
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class ChecksumMismatchError(requests.exceptions.RequestException):
+    """下载内容的校验和与预期不一致"""
+
+
+class NdjsonDecodeError(requests.exceptions.RequestException):
+    """NDJSON 流中的某一行不是合法的 JSON"""
+
+
+class DownloadResult:
+    """下载结果: 文件路径、字节数、校验和 (十六进制)、响应 (响应体已写入文件)"""
+
+    __slots__ = ('path', 'size', 'checksum', 'algorithm', 'response')
+
+    def __init__(self, path, size, checksum, algorithm, response):
+        self.path = path
+        self.size = size
+        self.checksum = checksum
+        self.algorithm = algorithm
+        self.response = response
+
+    def __repr__(self):
+        return f"DownloadResult({self.path!r}, size={self.size}, {self.algorithm}={self.checksum})"
+
+
+def iter_chunks(response: requests.Response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """逐块返回响应体 (bytes)，已按 Content-Encoding 解压"""
+    for chunk in response.iter_content(chunk_size=chunk_size):
+        if chunk:
+            yield chunk
+
+
+def iter_ndjson(response: requests.Response, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    逐行解析 NDJSON 响应体，每次返回一条记录，空行跳过。
+    某一行不是合法 JSON 时抛出 NdjsonDecodeError (包含行号)。
+    """
+    buffer = b''
+    line_number = 0
+    for chunk in iter_chunks(response, chunk_size):
+        buffer += chunk
+        lines = buffer.split(b'\n')
+        buffer = lines.pop()  # 最后一段可能是不完整的行，留到下一块
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield _parse_line(line, line_number, response)
+    if buffer.strip():
+        yield _parse_line(buffer, line_number + 1, response)
+
+
+def _parse_line(line, line_number, response):
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        raise NdjsonDecodeError(f"Invalid JSON at line {line_number} of {response.url}: {e}",
+                                response=response) from None
+
+
+def download(response: requests.Response, path, checksum=None, algorithm='sha256', chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    把响应体按块写入文件，同时计算校验和。
+    先写入 <path>.part，完整且校验通过后才重命名为 path；校验失败时删除临时文件并抛出 ChecksumMismatchError。
+
+    :param response: stream=True 的响应
+    :param path: 目标文件路径
+    :param checksum: 预期的校验和 (十六进制，不区分大小写)，None 表示只计算不校验
+    :param algorithm: hashlib 支持的算法名
+    """
+    digest = hashlib.new(algorithm)
+    size = 0
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    part_path = f"{path}.part"
+    try:
+        with open(part_path, 'wb') as file:
+            for chunk in iter_chunks(response, chunk_size):
+                file.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        actual = digest.hexdigest()
+        if checksum is not None and actual != checksum.lower():
+            raise ChecksumMismatchError(
+                f"{algorithm} mismatch for {response.url}: expected {checksum.lower()}, got {actual} ({size} bytes)",
+                response=response)
+        os.replace(part_path, path)
+    except BaseException:
+        if os.path.exists(part_path):
+            os.remove(part_path)
+        raise
+    return DownloadResult(path, size, actual, algorithm, response)
+
+
+def iter_file(path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """按块读取文件，作为分块上传的请求体"""
+    with open(path, 'rb') as file:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
@@ -0,0 +1,271 @@
+# core/web_driver.py
+"""
+UI 层的 WebDriver 管理: 维护一个预热好的浏览器实例池，在用例之间复用。
+
+启动浏览器是 UI 用例最主要的耗时 (通常 1~3 秒)，而清理 cookies / storage 只需要几十毫秒。
+因此用例结束后不关闭浏览器，而是重置状态后放回池中，下一个用例直接取用。
+
+- 每个进程 (单进程或 xdist 的每个 worker) 各自持有一个 DriverPool，互不共享浏览器。
+- 池中的浏览器按需创建，最多 size 个；归还时重置状态，重置失败 (浏览器已崩溃等) 则直接丢弃，
+  下次取用时重新创建。
+- selenium 在第一次创建浏览器时才导入，只运行 API 用例时不需要安装浏览器及其驱动。
+
+    pool = DriverPool()
+    with pool.lease() as driver:
+        driver.get("http://127.0.0.1:8000/index.html")
+"""
+import contextlib
+import queue
+import threading
+import time
+from urllib.parse import urlsplit
+
+from common.read_config import get_config
+from common.logger import logger
+from common.utils import get_worker_id
+
+BROWSERS = ('chrome', 'firefox', 'edge', 'safari')
+
+# 清理当前页面所属源的 Web Storage
+_CLEAR_STORAGE_JS = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+def _web_config():
+    config = get_config()
+    if not config:
+        logger.error("Failed to load configuration for WebDriver.")
+        raise ValueError("Web configuration could not be loaded.")
+    return config.get('web', {})
+
+
+def create_driver(browser=None, headless=None, web_config=None):
+    """
+    按配置创建一个新的 WebDriver 实例。
+    驱动程序由 selenium 自带的 Selenium Manager 自动下载和定位。
+
+    :param browser: 浏览器类型，默认使用 config.yaml 中的 web.browser
+    :param headless: 是否无头模式，默认使用 config.yaml 中的 web.headless
+    :param web_config: web 配置，默认读取 config.yaml
+    """
+    from selenium import webdriver  # 延迟导入，见模块说明
+
+    web_config = web_config if web_config is not None else _web_config()
+    browser = (browser or web_config.get('browser', 'chrome')).lower()
+    headless = web_config.get('headless', False) if headless is None else headless
+    width, height = web_config.get('window_size', [1920, 1080])
+
+    if browser in ('chrome', 'edge'):
+        options = webdriver.ChromeOptions() if browser == 'chrome' else webdriver.EdgeOptions()
+        if headless:
+            options.add_argument('--headless=new')
+        options.add_argument(f'--window-size={width},{height}')
+        # 容器 / CI 环境中常用的启动参数，同时减少启动时的后台任务
+        for argument in ('--no-sandbox', '--disable-dev-shm-usage', '--disable-gpu', '--disable-extensions',
+                         '--no-first-run', '--no-default-browser-check', '--disable-background-networking'):
+            options.add_argument(argument)
+        driver = webdriver.Chrome(options=options) if browser == 'chrome' else webdriver.Edge(options=options)
+    elif browser == 'firefox':
+        options = webdriver.FirefoxOptions()
+        if headless:
+            options.add_argument('-headless')
+        options.add_argument(f'--width={width}')
+        options.add_argument(f'--height={height}')
+        driver = webdriver.Firefox(options=options)
+    elif browser == 'safari':
+        if headless:
+            logger.warning("Safari does not support headless mode, starting a normal window.")
+        driver = webdriver.Safari()
+        driver.set_window_size(width, height)
+    else:
+        raise ValueError(f"Unsupported browser '{browser}', expected one of {BROWSERS}.")
+
+    driver.implicitly_wait(web_config.get('implicit_wait', 10))
+    driver.set_page_load_timeout(web_config.get('page_load_timeout', 30))
+    return driver
+
+
+def _history_origins(driver):
+    """当前窗口导航历史中出现过的所有 http(s) 源 (CDP Page.getNavigationHistory)"""
+    history = driver.execute_cdp_cmd('Page.getNavigationHistory', {})
+    origins = set()
+    for entry in history.get('entries', []):
+        parts = urlsplit(entry.get('url', ''))
+        if parts.scheme in ('http', 'https'):
+            origins.add(f"{parts.scheme}://{parts.netloc}")
+    return origins
+
+
+def _clear_origins(driver, origins):
+    """
+    Chromium 系浏览器: 通过 CDP 清理所有域名的 cookies 和缓存，
+    并对用例访问过的每个源清理 localStorage / sessionStorage / IndexedDB 等 (Storage.clearDataForOrigin)。
+    Web Storage 没有 "清理所有源" 的 CDP 命令，访问过的源来自各窗口的导航历史和 cookies 的域名。
+    """
+    for cookie in driver.execute_cdp_cmd('Network.getAllCookies', {}).get('cookies', []):
+        domain = cookie['domain'].lstrip('.')
+        origins.update((f"http://{domain}", f"https://{domain}"))
+    for origin in sorted(origins):
+        driver.execute_cdp_cmd('Storage.clearDataForOrigin', {'origin': origin, 'storageTypes': 'all'})
+    driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+    driver.execute_cdp_cmd('Network.clearBrowserCache', {})
+
+
+def reset_driver(driver):
+    """
+    清理浏览器状态，使其可以被下一个用例复用:
+    cookies、当前源的 localStorage / sessionStorage，多余的窗口，最后回到 about:blank。
+    Chromium 系浏览器额外清理用例访问过的所有源的 Web Storage 和所有域名的 cookies、缓存 (见 _clear_origins)；
+    只在 iframe 中加载过的第三方源不在导航历史中，无法确定，不会被清理。
+    Firefox / Safari 没有 CDP，只能清理当前源的 Web Storage 和当前域名的 cookies。
+    """
+    cdp = hasattr(driver, 'execute_cdp_cmd')
+    origins = set()
+    handles = driver.window_handles
+    for handle in handles[1:]:
+        driver.switch_to.window(handle)
+        if cdp:
+            origins |= _history_origins(driver)
+        driver.close()
+    driver.switch_to.window(handles[0])
+
+    if driver.current_url.startswith(('http://', 'https://')):
+        driver.execute_script(_CLEAR_STORAGE_JS)
+        driver.delete_all_cookies()  # 只能删除当前域名下的 cookies
+    if cdp:
+        _clear_origins(driver, origins | _history_origins(driver))
+    driver.get('about:blank')
+
+
+class DriverPool:
+    """
+    进程内的 WebDriver 池 (线程安全)。
+
+    :param size: 最多同时存在的浏览器数量，默认使用 config.yaml 中的 web.pool_size
+    :param factory: 创建浏览器的函数，默认为按配置调用 create_driver()
+    :param reset: 归还时重置浏览器状态的函数，默认为 reset_driver()
+    """
+
+    def __init__(self, size=None, factory=None, reset=None):
+        web_config = _web_config() if size is None or factory is None else {}
+        self.size = size or web_config.get('pool_size', 1)
+        self._factory = factory or (lambda: create_driver(web_config=web_config))
+        self._reset = reset or reset_driver
+        self._idle = queue.LifoQueue()  # 后进先出: 优先复用最近使用过的 (最"热"的) 浏览器
+        self._created = 0
+        self._lock = threading.Lock()
+        self._closed = False
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0}
+        logger.info(f"WebDriver pool initialized for worker {get_worker_id()}, size: {self.size}")
+
+    def prewarm(self, count=None):
+        """提前并行启动 count 个浏览器 (默认填满整个池)，把启动耗时挪到第一个用例之前"""
+        count = min(count or self.size, self.size)
+        drivers = [None] * count
+
+        def start(index):
+            drivers[index] = self.acquire()
+
+        threads = [threading.Thread(target=start, args=(i,), name=f'driver-prewarm-{i}') for i in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for driver in drivers:
+            if driver is not None:
+                self._idle.put(driver)
+
+    def acquire(self, timeout=None):
+        """
+        取出一个浏览器: 优先复用空闲的，池未满时新建，否则等待其他用例归还。
+
+        :param timeout: 等待归还的最长时间 (秒)，None 表示一直等待
+        """
+        if self._closed:
+            raise RuntimeError("WebDriver pool is closed.")
+        try:
+            driver = self._idle.get_nowait()
+            self.stats['reused'] += 1
+            return driver
+        except queue.Empty:
+            pass
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        if can_create:
+            return self._create()
+        try:
+            driver = self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No WebDriver available in the pool (size {self.size}) within {timeout}s.") from None
+        self.stats['reused'] += 1
+        return driver
+
+    def _create(self):
+        start = time.perf_counter()
+        try:
+            driver = self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+        self.stats['created'] += 1
+        logger.info(f"Started browser #{self.stats['created']} for worker {get_worker_id()} "
+                    f"in {(time.perf_counter() - start) * 1000:.0f}ms")
+        return driver
+
+    def release(self, driver, discard=False):
+        """
+        归还浏览器。重置成功的放回池中；discard=True 或重置失败时关闭并丢弃。
+        """
+        if not discard and not self._closed:
+            try:
+                self._reset(driver)
+            except Exception as e:
+                logger.warning(f"Failed to reset browser, discarding it: {e!r}")
+                discard = True
+        if discard or self._closed:
+            self._quit(driver)
+            with self._lock:
+                self._created -= 1
+            self.stats['discarded'] += 1
+            return
+        self._idle.put(driver)
+
+    @contextlib.contextmanager
+    def lease(self, timeout=None):
+        """with pool.lease() as driver: ... 结束时自动归还"""
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        finally:
+            self.release(driver)
+
+    @staticmethod
+    def _quit(driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Failed to quit browser: {e!r}")
+
+    def close(self):
+        """关闭池中所有空闲的浏览器；之后归还的浏览器会被直接关闭"""
+        self._closed = True
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self._quit(driver)
+            with self._lock:
+                self._created -= 1
+        logger.info(f"WebDriver pool closed for worker {get_worker_id()}: {self.stats}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
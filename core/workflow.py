@@ -0,0 +1,297 @@
+# core/workflow.py
+"""
+有状态的 API 工作流: 在 YAML 中声明多个相互依赖的请求步骤，由 WorkflowRunner 按依赖关系调度。
+
+    name: user_lifecycle
+    setup:                      # 共享的准备步骤: 结果在同一个 runner 中缓存，多个工作流复用
+      - id: janet
+        method: GET
+        endpoint: /users/2
+    chains:                     # 每条链内的步骤按顺序执行，不同的链并发执行
+      neo:
+        - id: create
+          method: POST
+          endpoint: /users
+          json: {name: neo, job: the one}
+          expect: {status_code: 201, keys: [id, createdAt]}
+        - id: update
+          method: PUT
+          endpoint: /users/{{create.id}}        # 引用前面步骤响应中的值
+          json: {name: "{{janet.data.first_name}}", job: zion resident}
+          expect: {status_code: 200, values: {name: Janet}}
+
+步骤之间的依赖:
+- 同一条链中的前一个步骤
+- 模板 {{step_id.json_path}} 引用的步骤 (路径语法见 common/json_path.py)
+- depends_on 中显式列出的步骤
+endpoint、请求参数和 expect 中都可以使用模板。
+只有 chains 时也可以写成单个 steps 列表 (视为一条链)。
+
+整个模板就是 {{...}} 时保留引用值的原始类型 (e.g., 整数 id)，否则按字符串拼接。
+expect 的字段与 ExpectationSet 一致: status_code / values / keys / payload。
+某个步骤失败 (期望不满足或执行时抛出任何异常) 后，依赖它的步骤被跳过，其余不相关的链继续执行。
+"""
+import re
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import requests
+
+from common.expectations import ExpectationSet
+from common.json_path import compile_path
+from common.logger import logger
+from common.read_yaml import read_yaml
+from common.reporting import step as report_step
+from common.utils import excerpt, get_response_json
+
+_TEMPLATE_RE = re.compile(r'\{\{\s*([A-Za-z_][\w-]*)(?:\.([^}]*?))?\s*\}\}')
+REQUEST_FIELDS = ('params', 'json', 'data', 'headers', 'timeout')
+EXPECT_FIELDS = ('status_code', 'values', 'keys', 'payload', 'description')  # ExpectationSet 的参数
+
+
+class WorkflowError(ValueError):
+    """工作流定义不合法: 重复的步骤 id、引用了不存在的步骤、循环依赖等"""
+
+
+class WorkflowStep:
+    """工作流中的一个请求步骤"""
+
+    def __init__(self, definition, chain=None, shared=False):
+        if 'id' not in definition:
+            raise WorkflowError(f"Workflow step without 'id': {definition}")
+        self.id = str(definition['id'])
+        self.method = definition.get('method', 'GET').upper()
+        self.endpoint = definition['endpoint']
+        self.request = {field: definition[field] for field in REQUEST_FIELDS if field in definition}
+        self.expect = definition.get('expect') or {}
+        self.chain = chain
+        self.shared = shared
+        self.depends_on = set(definition.get('depends_on', []))
+        self.depends_on.update(_template_refs([self.endpoint, self.request, self.expect]))
+
+    @property
+    def cache_key(self):
+        """共享步骤的缓存键: 请求本身 (而不是 id)，不同工作流中相同的 setup 请求也能复用"""
+        return repr((self.method, self.endpoint, sorted((k, repr(v)) for k, v in self.request.items())))
+
+    def __repr__(self):
+        return f"WorkflowStep({self.id!r}, {self.method} {self.endpoint})"
+
+
+def _template_refs(value):
+    """返回 value (可嵌套的 dict / list / str) 中模板引用的所有步骤 id"""
+    if isinstance(value, str):
+        return {match.group(1) for match in _TEMPLATE_RE.finditer(value)}
+    if isinstance(value, dict):
+        return set().union(*(_template_refs(v) for v in value.values())) if value else set()
+    if isinstance(value, (list, tuple)):
+        return set().union(*(_template_refs(v) for v in value)) if value else set()
+    return set()
+
+
+def render(value, documents):
+    """
+    把 value 中的模板替换为已完成步骤响应中的值。
+
+    :param value: 可嵌套的 dict / list / str
+    :param documents: {step_id: 响应 JSON}
+    """
+    if isinstance(value, dict):
+        return {key: render(item, documents) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render(item, documents) for item in value]
+    if not isinstance(value, str) or '{{' not in value:
+        return value
+
+    def lookup(match):
+        step_id, path = match.group(1), match.group(2)
+        document = documents[step_id]
+        return compile_path(path).resolve(document) if path else document
+
+    whole = _TEMPLATE_RE.fullmatch(value.strip())
+    if whole:
+        return lookup(whole)
+    return _TEMPLATE_RE.sub(lambda match: str(lookup(match)), value)
+
+
+class Workflow:
+    """
+    已解析并校验过的工作流 (DAG)。
+
+    :param definition: 工作流定义 (dict)，格式见模块说明
+    :param name: 工作流名称，默认使用定义中的 name
+    """
+
+    def __init__(self, definition, name=None):
+        self.name = name or definition.get('name', 'workflow')
+        self.steps = {}
+        for item in definition.get('setup', []):
+            self._add(WorkflowStep(item, shared=True))
+        chains = dict(definition.get('chains') or {})
+        if definition.get('steps'):
+            chains.setdefault('main', definition['steps'])
+        for chain, items in chains.items():
+            previous = None
+            for item in items:
+                step = self._add(WorkflowStep(item, chain=chain))
+                if previous is not None:
+                    step.depends_on.add(previous.id)
+                previous = step
+        self._validate()
+
+    @classmethod
+    def from_yaml(cls, file_path):
+        """从 YAML 文件加载工作流 (路径相对于项目根目录)"""
+        definition = read_yaml(file_path)
+        if not definition:
+            raise WorkflowError(f"Failed to load workflow from {file_path}")
+        return cls(definition)
+
+    def _add(self, step):
+        if step.id in self.steps:
+            raise WorkflowError(f"Duplicate step id '{step.id}' in workflow '{self.name}'")
+        self.steps[step.id] = step
+        return step
+
+    def _validate(self):
+        for step in self.steps.values():
+            if not isinstance(step.expect, dict):
+                raise WorkflowError(f"'expect' of step '{step.id}' in workflow '{self.name}' must be a mapping")
+            unknown_fields = step.expect.keys() - set(EXPECT_FIELDS)
+            if unknown_fields:
+                raise WorkflowError(f"Unknown expect fields {sorted(unknown_fields)} in step '{step.id}' of workflow "
+                                    f"'{self.name}', expected some of {list(EXPECT_FIELDS)}")
+            unknown = step.depends_on - self.steps.keys()
+            if unknown:
+                raise WorkflowError(f"Step '{step.id}' in workflow '{self.name}' depends on unknown steps "
+                                    f"{sorted(unknown)}")
+        # Kahn 算法检测循环依赖，同时得到一个拓扑顺序
+        remaining = {step_id: set(step.depends_on) for step_id, step in self.steps.items()}
+        self.order = []
+        while remaining:
+            ready = sorted(step_id for step_id, deps in remaining.items() if not deps)
+            if not ready:
+                raise WorkflowError(f"Circular dependency between steps {sorted(remaining)} "
+                                    f"in workflow '{self.name}'")
+            for step_id in ready:
+                del remaining[step_id]
+                self.order.append(step_id)
+            for deps in remaining.values():
+                deps.difference_update(ready)
+
+
+class WorkflowResult:
+    """工作流的执行结果"""
+
+    def __init__(self, workflow):
+        self.workflow = workflow
+        self.responses = {}  # {step_id: requests.Response}
+        self.failures = {}  # {step_id: 失败原因}
+        self.skipped = {}  # {step_id: 被哪个失败的步骤阻塞}
+
+    @property
+    def passed(self):
+        return not self.failures and not self.skipped
+
+    def verify(self):
+        """有任何步骤失败或被跳过时，抛出汇总了所有问题的 AssertionError"""
+        if self.passed:
+            return
+        lines = [f"Workflow '{self.workflow.name}' failed:"]
+        lines += [f"- step '{step_id}': {reason}" for step_id, reason in self.failures.items()]
+        lines += [f"- step '{step_id}': skipped, blocked by failed step '{blocker}'"
+                  for step_id, blocker in self.skipped.items()]
+        raise AssertionError("\n".join(lines))
+
+
+class WorkflowRunner:
+    """
+    按依赖关系并发执行工作流。
+
+    :param client: ApiClient 实例 (在多个线程中共享，连接池大小应不小于 max_workers)
+    :param max_workers: 最多同时执行的步骤数
+    """
+
+    def __init__(self, client, max_workers=8):
+        self.client = client
+        self.max_workers = max_workers
+        self._shared_cache = {}  # {cache_key: requests.Response}，setup 步骤的响应
+        self._shared_locks = {}
+        self._lock = threading.Lock()
+
+    def _shared_lock(self, key):
+        with self._lock:
+            return self._shared_locks.setdefault(key, threading.Lock())
+
+    def _execute(self, step, documents):
+        """发送一个步骤的请求并检查期望，返回 (response, 不匹配信息列表)"""
+        endpoint = render(step.endpoint, documents)
+        request = render(step.request, documents)
+        with report_step(f"[{step.id}] {step.method} {endpoint}", level='summary'):
+            response = self.client.request(step.method, endpoint, **request)
+        mismatches = ExpectationSet(**render(step.expect, documents)).evaluate(response) if step.expect else []
+        if not mismatches and not step.expect and response.status_code >= 400:
+            mismatches = [f"Unexpected status code {response.status_code}: {excerpt(response.text, 500)}"]
+        return response, mismatches
+
+    def _run_step(self, step, documents):
+        if not step.shared:
+            return self._execute(step, documents)
+        key = step.cache_key
+        with self._shared_lock(key):  # 并发的工作流同时需要同一个 setup 时只请求一次
+            if key in self._shared_cache:
+                logger.debug("Reusing cached setup response for step '{}'", step.id)
+                return self._shared_cache[key], []
+            response, mismatches = self._execute(step, documents)
+            if not mismatches:
+                self._shared_cache[key] = response
+            return response, mismatches
+
+    def run(self, workflow):
+        """执行工作流，返回 WorkflowResult (不抛出断言错误，需要时调用 result.verify())"""
+        result = WorkflowResult(workflow)
+        documents = {}
+        pending = {step_id: set(step.depends_on) for step_id, step in workflow.steps.items()}
+        dependents = {step_id: [] for step_id in workflow.steps}
+        for step_id, step in workflow.steps.items():
+            for dependency in step.depends_on:
+                dependents[dependency].append(step_id)
+
+        def skip_dependents(step_id, blocker):
+            for dependent in dependents[step_id]:
+                if dependent in pending:
+                    del pending[dependent]
+                    result.skipped[dependent] = blocker
+                    skip_dependents(dependent, blocker)
+
+        logger.info(f"Running workflow '{workflow.name}' with {len(workflow.steps)} steps")
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='workflow') as executor:
+            running = {}
+            while pending or running:
+                for step_id in [s for s, deps in pending.items() if not deps]:
+                    del pending[step_id]
+                    running[executor.submit(self._run_step, workflow.steps[step_id], dict(documents))] = step_id
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    step_id = running.pop(future)
+                    try:
+                        response, mismatches = future.result()
+                    except Exception as e:
+                        # 请求失败、模板引用的值不存在、请求参数不合法等: 只让这个步骤失败，跳过依赖它的步骤
+                        response, mismatches = None, [f"{type(e).__name__}: {e}"]
+                    if response is not None:
+                        result.responses[step_id] = response
+                    if mismatches:
+                        result.failures[step_id] = "; ".join(mismatches)
+                        skip_dependents(step_id, step_id)
+                        continue
+                    try:
+                        documents[step_id] = get_response_json(response)
+                    except requests.exceptions.JSONDecodeError:
+                        documents[step_id] = None  # 没有 JSON 响应体 (e.g., 204)，不能被模板引用
+                    for dependent in dependents[step_id]:
+                        if dependent in pending:
+                            pending[dependent].discard(step_id)
+        logger.info(f"Workflow '{workflow.name}' finished: {len(result.responses)} responses, "
+                    f"{len(result.failures)} failed, {len(result.skipped)} skipped")
+        return result
@@ -0,0 +1,199 @@
+# plugins/allure_stream.py
+"""
+流式 Allure 结果写入 (--allure-stream):
+
+allure-pytest 默认为每个用例、每个 fixture 容器、每个附件各写一个小文件 (先写 .tmp 再重命名)，
+数据驱动用例成千上万时，大量小文件的创建和归档会拖慢整个流程。
+开启后，每个进程 (xdist worker) 把所有结果追加写入 allure-results 目录下的一个
+gzip 压缩的 NDJSON 流 (allure-stream-<worker>.ndjson.gz)，由 gzip 缓冲批量落盘；
+会话结束时主进程一次性把流转换为 Allure 的标准结果文件。
+
+使用 --allure-stream-keep 时不做转换，只保留压缩流 (便于归档)，之后再转换:
+    python -m plugins.allure_stream reports/allure-results
+
+步骤粒度 (--allure-steps=none|summary|full) 见 common/reporting.py。
+"""
+import argparse
+import base64
+import glob
+import gzip
+import json
+import os
+import threading
+import uuid
+import zlib
+
+import pytest
+from attr import asdict
+
+import allure_commons
+from allure_commons import hookimpl
+from allure_commons.logger import AllureFileLogger
+
+from common.logger import logger
+from common.read_config import get_config
+from common.reporting import STEP_LEVELS, set_step_level
+from common.utils import get_worker_id, is_xdist_worker
+
+STREAM_PATTERN = 'allure-stream-*.ndjson.gz'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("autodemo")
+    group.addoption("--allure-stream", action="store_true", default=None,
+                    help="把 Allure 结果写入压缩的 NDJSON 流，会话结束时再转换为结果文件 "
+                         "(默认使用 config.yaml 中的 allure.stream)")
+    group.addoption("--allure-stream-keep", action="store_true", default=False,
+                    help="会话结束时不转换，只保留 allure-stream-*.ndjson.gz")
+    group.addoption("--allure-steps", choices=STEP_LEVELS, default=None,
+                    help="Allure 步骤粒度，默认使用 config.yaml 中的 allure.steps")
+
+
+@pytest.hookimpl(trylast=True)  # 在 allure-pytest 注册 AllureFileLogger 之后执行
+def pytest_configure(config):
+    steps = config.getoption("--allure-steps")
+    if steps:
+        set_step_level(steps)
+
+    allure_config = (get_config() or {}).get('allure', {})
+    stream = config.getoption("--allure-stream")
+    stream = allure_config.get('stream', False) if stream is None else stream
+    report_dir = getattr(config.option, 'allure_report_dir', None)
+    if not stream or not report_dir:
+        return
+    file_loggers = [plugin for plugin in allure_commons.plugin_manager.get_plugins()
+                    if isinstance(plugin, AllureFileLogger)]
+    for file_logger in file_loggers:
+        allure_commons.plugin_manager.unregister(file_logger)
+    stream_logger = AllureStreamLogger(report_dir, allure_config.get('stream_compresslevel', 6))
+    allure_commons.plugin_manager.register(stream_logger)
+
+    def restore():
+        # cleanup 按注册的逆序执行: 先恢复 AllureFileLogger，allure-pytest 自己的 cleanup 才能正常注销它
+        allure_commons.plugin_manager.unregister(stream_logger)
+        for file_logger in file_loggers:
+            allure_commons.plugin_manager.register(file_logger)
+
+    config.add_cleanup(restore)
+    config.pluginmanager.register(
+        AllureStreamPlugin(stream_logger, keep=config.getoption("--allure-stream-keep")), "autodemo-allure-stream")
+
+
+class AllureStreamLogger:
+    """allure_commons 的报告插件: 代替 AllureFileLogger，把结果追加写入本进程的压缩流"""
+
+    def __init__(self, report_dir, compresslevel=6):
+        self.report_dir = os.path.abspath(report_dir)
+        self.path = os.path.join(self.report_dir, f"allure-stream-{get_worker_id()}.ndjson.gz")
+        self.compresslevel = compresslevel
+        self.count = 0
+        self._file = None
+        self._lock = threading.Lock()
+        os.makedirs(self.report_dir, exist_ok=True)
+
+    def _write(self, record):
+        line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+        with self._lock:
+            if self._file is None:
+                # 追加模式: 关闭后仍有结果上报时 (e.g., session fixture 的收尾) 作为新的 gzip 成员继续写
+                self._file = gzip.open(self.path, 'at', encoding='utf-8', compresslevel=self.compresslevel)
+            self._file.write(line)
+            self.count += 1
+
+    def _write_item(self, item):
+        self._write({'file': item.file_pattern.format(prefix=uuid.uuid4()),
+                     'json': asdict(item, filter=lambda _, v: v or v is False)})
+
+    @hookimpl
+    def report_result(self, result):
+        self._write_item(result)
+
+    @hookimpl
+    def report_container(self, container):
+        self._write_item(container)
+
+    @hookimpl
+    def report_globals(self, globals_item):
+        self._write_item(globals_item)
+
+    @hookimpl
+    def report_attached_file(self, source, file_name):
+        with open(source, 'rb') as file:
+            self.report_attached_data(file.read(), file_name)
+
+    @hookimpl
+    def report_attached_data(self, body, file_name):
+        if isinstance(body, str):
+            self._write({'file': file_name, 'text': body})
+        else:
+            self._write({'file': file_name, 'b64': base64.b64encode(body).decode('ascii')})
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+class AllureStreamPlugin:
+    """pytest 插件: 会话结束时关闭流，主进程在所有 worker 结束后转换"""
+
+    def __init__(self, stream_logger, keep=False):
+        self.stream_logger = stream_logger
+        self.keep = keep
+
+    @pytest.hookimpl(trylast=True)  # session 级 fixture 的收尾 (及其 Allure 容器) 在此之前完成
+    def pytest_sessionfinish(self, session):
+        self.stream_logger.close()
+
+    def pytest_unconfigure(self, config):
+        self.stream_logger.close()
+        if is_xdist_worker() or self.keep:
+            return
+        count = convert_streams(self.stream_logger.report_dir)
+        logger.info(f"Converted {count} streamed Allure records in {self.stream_logger.report_dir}")
+
+
+def iter_stream(path):
+    """逐条读取流中的记录；流因进程中断而不完整时，读到损坏处为止"""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            for line in file:
+                if line.endswith('\n'):
+                    yield json.loads(line)
+    except (EOFError, zlib.error, gzip.BadGzipFile) as e:
+        logger.warning(f"Allure stream {path} is truncated, converted the records before the damage: {e!r}")
+
+
+def convert_streams(report_dir, remove=True):
+    """把 report_dir 中所有 allure-stream-*.ndjson.gz 转换为 Allure 结果文件，返回记录数"""
+    count = 0
+    for path in sorted(glob.glob(os.path.join(report_dir, STREAM_PATTERN))):
+        for record in iter_stream(path):
+            target = os.path.join(report_dir, record['file'])
+            if 'json' in record:
+                with open(target, 'w', encoding='utf-8') as file:
+                    json.dump(record['json'], file, ensure_ascii=False)
+            elif 'text' in record:
+                with open(target, 'w', encoding='utf-8') as file:
+                    file.write(record['text'])
+            else:
+                with open(target, 'wb') as file:
+                    file.write(base64.b64decode(record['b64']))
+            count += 1
+        if remove:
+            os.remove(path)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert streamed Allure results into Allure result files.")
+    parser.add_argument('report_dir', help="包含 allure-stream-*.ndjson.gz 的 allure-results 目录")
+    parser.add_argument('--keep', action='store_true', help="转换后保留压缩流")
+    args = parser.parse_args(argv)
+    count = convert_streams(args.report_dir, remove=not args.keep)
+    print(f"Converted {count} records in {args.report_dir}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# plugins/sharding.py
+"""
+用例分片插件: 把一次测试运行拆分到多个 CI agent，每个 agent 只收集并执行自己的分片。
+
+    pytest api_tests --num-shards=4 --shard-id=0                       # 按 test_id / nodeid 哈希分配
+    pytest api_tests --num-shards=4 --shard-id=0 --shard-mode=duration # 按历史耗时均衡分配
+
+分配规则见 common/sharding.py。数据驱动用例在 parametrize 时由 select_shard 过滤，
+其余用例 (以及没有使用 select_shard 的数据驱动用例) 在收集结束时按 nodeid 分配，不属于本分片的被取消选择。
+duration 模式的耗时来自 --shard-durations (默认是 test impact 的记录文件，见 plugins/test_impact.py)，
+所有分片必须使用同一份文件。
+
+各分片执行完后合并结果 (每个分片目录中包含 allure-results/ 和 reports/latency/):
+    python -m plugins.sharding merge shards/0 shards/1 shards/2 shards/3 \\
+        --allure-out allure-results --latency-out reports/latency --durations-out test_durations.json
+"""
+import argparse
+import fnmatch
+import glob
+import json
+import os
+import shutil
+
+import pytest
+
+from common.logger import logger
+from common.metrics import merge_latency_files
+from common.read_config import get_config
+from common.read_yaml import CaseRef
+from common.sharding import SHARD_MODES, assign, configure_shard, get_shard, is_presharded, is_sharded, load_durations
+from plugins.allure_stream import STREAM_PATTERN, convert_streams
+from plugins.test_impact import DEFAULT_IMPACT_FILE
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("autodemo")
+    group.addoption("--num-shards", type=int, default=None, help="分片总数 (CI agent 数量)")
+    group.addoption("--shard-id", type=int, default=None, help="当前分片编号，从 0 开始")
+    group.addoption("--shard-mode", choices=SHARD_MODES, default=None,
+                    help="分配方式，默认使用 config.yaml 中的 sharding.mode")
+    group.addoption("--shard-durations", default=None,
+                    help="duration 模式使用的历史耗时文件，默认使用 test impact 的记录文件")
+
+
+def pytest_configure(config):
+    num_shards = config.getoption("--num-shards")
+    shard_id = config.getoption("--shard-id")
+    if num_shards is None and shard_id is None:
+        return
+    if num_shards is None or shard_id is None:
+        raise pytest.UsageError("--num-shards and --shard-id must be used together.")
+    sharding_config = (get_config() or {}).get('sharding', {})
+    mode = config.getoption("--shard-mode") or sharding_config.get('mode', 'hash')
+    durations = {}
+    if mode == 'duration':
+        path = (config.getoption("--shard-durations") or sharding_config.get('durations_file')
+                or config.getoption("--impact-file") or DEFAULT_IMPACT_FILE)
+        durations = load_durations(os.path.join(str(config.rootpath), path))
+        if not durations:
+            logger.warning(f"No durations found in {path}, every test is estimated equally")
+    try:
+        configure_shard(shard_id, num_shards, mode, durations)
+    except ValueError as e:
+        raise pytest.UsageError(str(e)) from None
+    config.pluginmanager.register(ShardingPlugin(), "autodemo-sharding")
+
+
+class ShardingPlugin:
+    """收集结束时取消选择不属于当前分片的用例"""
+
+    @staticmethod
+    def _presharded(item):
+        callspec = getattr(item, 'callspec', None)
+        if callspec is None:
+            return False
+        refs = [value for value in callspec.params.values() if isinstance(value, CaseRef)]
+        return bool(refs) and all(is_presharded(ref) for ref in refs)
+
+    @staticmethod
+    def _empty_parametrization(item):
+        """select_shard 没有给本分片留下任何行时，pytest 会生成一个被跳过的占位用例 ([NOTSET])"""
+        return any(marker.name == 'parametrize' and len(marker.args) > 1 and not marker.args[1]
+                   for marker in item.iter_markers())
+
+    @pytest.hookimpl(tryfirst=True)  # 先于 test impact 执行，只为本分片的用例计算指纹
+    def pytest_collection_modifyitems(self, session, config, items):
+        if not is_sharded():
+            return
+        # 占位用例只在部分分片上出现，必须先排除: duration 模式要求每个分片参与分配的用例完全相同
+        placeholders = [item for item in items if self._empty_parametrization(item)]
+        others = [item for item in items if not self._presharded(item) and item not in placeholders]
+        selected = assign([item.nodeid for item in others])
+        deselected = placeholders + [item for item in others if item.nodeid not in selected]
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+            deselected_ids = {id(item) for item in deselected}
+            items[:] = [item for item in items if id(item) not in deselected_ids]
+        shard_id, num_shards = get_shard()
+        logger.info(f"Shard {shard_id}/{num_shards}: {len(items)} tests selected, {len(deselected)} deselected")
+
+    def pytest_report_header(self, config):
+        shard_id, num_shards = get_shard()
+        return f"shard: {shard_id}/{num_shards}"
+
+
+# --- 合并各分片的结果 ---
+
+def merge_allure_results(source_dirs, output_dir):
+    """
+    把各分片的 allure-results 复制到同一个目录，返回复制的文件数。
+    结果文件名带 uuid 不会冲突；同名的压缩流 (--allure-stream-keep) 加上分片前缀后再统一转换。
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    count = 0
+    for index, source_dir in enumerate(source_dirs):
+        for path in glob.glob(os.path.join(source_dir, '*')):
+            if not os.path.isfile(path):
+                continue
+            name = os.path.basename(path)
+            if fnmatch.fnmatch(name, STREAM_PATTERN):
+                name = name.replace('allure-stream-', f'allure-stream-shard{index}-', 1)
+            shutil.copyfile(path, os.path.join(output_dir, name))
+            count += 1
+    if glob.glob(os.path.join(output_dir, STREAM_PATTERN)):
+        convert_streams(output_dir)
+    return count
+
+
+def merge_durations(impact_files, output_path):
+    """把各分片的 test impact 记录合并为 {nodeid: 秒}，供下一次 --shard-mode=duration 使用"""
+    durations = {}
+    for path in impact_files:
+        durations.update(load_durations(path))
+    durations = {key: round(value, 3) for key, value in durations.items() if '::' in key}  # 只保留 nodeid
+    with open(output_path, 'w', encoding='utf-8') as file:
+        json.dump(durations, file, indent=1, sort_keys=True)
+    return durations
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge allure-results and latency data from test shards.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    merge = subparsers.add_parser('merge', help="合并各分片的结果")
+    merge.add_argument('shard_dirs', nargs='+', help="各分片的结果目录 (其中包含 allure-results/ 和 reports/latency/)")
+    merge.add_argument('--allure-out', default='allure-results', help="合并后的 allure-results 目录")
+    merge.add_argument('--latency-out', default=os.path.join('reports', 'latency'), help="合并后的耗时统计目录")
+    merge.add_argument('--durations-out', default=None,
+                       help="把各分片目录中的 test_impact.json 合并为耗时文件 (用于 --shard-durations)")
+    args = parser.parse_args(argv)
+
+    allure_dirs = [os.path.join(d, 'allure-results') for d in args.shard_dirs
+                   if os.path.isdir(os.path.join(d, 'allure-results'))]
+    count = merge_allure_results(allure_dirs, args.allure_out)
+    print(f"Merged {count} Allure result files from {len(allure_dirs)} shards into {args.allure_out}")
+
+    latency_files = [path for d in args.shard_dirs
+                     for path in sorted(glob.glob(os.path.join(d, 'reports', 'latency', 'latency-*.json')))
+                     if not path.endswith('latency-summary.json')]
+    if latency_files:
+        os.makedirs(args.latency_out, exist_ok=True)
+        merged = merge_latency_files(latency_files, os.path.join(args.latency_out, 'latency-summary.json'))
+        print(f"Merged {len(latency_files)} latency files ({len(merged.keys())} endpoints) into {args.latency_out}")
+
+    if args.durations_out:
+        impact_files = [os.path.join(d, 'test_impact.json') for d in args.shard_dirs
+                        if os.path.exists(os.path.join(d, 'test_impact.json'))]
+        durations = merge_durations(impact_files, args.durations_out)
+        print(f"Merged durations of {len(durations)} tests into {args.durations_out}")
+
+
+if __name__ == '__main__':
+    main()
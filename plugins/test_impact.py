@@ -0,0 +1,223 @@
+# plugins/test_impact.py
+"""
+测试影响分析 (test impact) 插件: 为每个用例计算指纹，并记录上一次的执行结果。
+
+指纹由以下部分组成，任何一项变化都会让用例重新执行:
+- 用例函数的源码 (包含装饰器)
+- 用例使用的数据行: parametrize 参数中的 CaseRef 对应的原始字节 (data/*.yaml 中的那一条用例)；
+  值是项目内文件路径的参数 (e.g., data/workflows/*.yaml) 使用文件内容，其余参数使用 repr()
+- config.yaml 中与用例相关的配置 (默认是 api 整个小节，已包含 AUTODEMO__* 环境变量覆盖)
+- 框架代码: conftest.py 以及 common/ core/ plugins/ 下的源码 (任何一处修改都让所有用例失效)
+- 用例间接引用的数据: data/workflows/*.yaml 和 data/schemas/*.json (同样让所有用例失效)
+
+使用 --impact 时:
+- 指纹未变、上次通过且未超过 impact.max_age_hours 的用例被取消选择 (deselect)，不再执行
+- 其余用例按 "上次失败 -> 新增/有修改 -> 其他" 的顺序执行
+不加 --impact 时只记录结果，不影响选择和顺序。
+
+结果保存在 JSON 文件中 (默认 .cache/test_impact.json，可通过 --impact-file 指定)，
+CI 清理工作空间时应把它放在工作空间之外。使用 xdist 时由主进程统一写入。
+"""
+import glob
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import pytest
+
+from common.logger import logger
+from common.read_config import get_config
+from common.read_yaml import CaseRef
+from common.utils import is_xdist_worker
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_IMPACT_FILE = os.path.join('.cache', 'test_impact.json')
+FRAMEWORK_SOURCES = ('conftest.py', 'common/*.py', 'core/*.py', 'plugins/*.py',
+                     'data/workflows/*.yaml', 'data/schemas/*.json')
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup("autodemo")
+    group.addoption("--impact", action="store_true", default=False,
+                    help="跳过指纹未变且上次通过的用例，优先执行上次失败和有修改的用例")
+    group.addoption("--impact-reset", action="store_true", default=False,
+                    help="忽略并清空已记录的用例结果 (本次运行全部执行)")
+    group.addoption("--impact-file", default=None,
+                    help=f"用例指纹和结果的存储文件，默认 {DEFAULT_IMPACT_FILE}")
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(TestImpactPlugin(config), "autodemo-test-impact")
+
+
+def _sha1(*parts):
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def framework_digest(root=PROJECT_ROOT):
+    """FRAMEWORK_SOURCES 中所有文件 (框架源码、工作流和 JSON Schema) 的摘要"""
+    digest = hashlib.sha1()
+    for pattern in FRAMEWORK_SOURCES:
+        for path in sorted(glob.glob(os.path.join(root, pattern))):
+            digest.update(os.path.relpath(path, root).encode('utf-8'))
+            with open(path, 'rb') as file:
+                digest.update(file.read())
+    return digest.hexdigest()
+
+
+def config_digest(keys):
+    """config.yaml 中指定小节的摘要"""
+    config = get_config() or {}
+    selected = {key: config.get(key) for key in keys}
+    return _sha1(json.dumps(selected, sort_keys=True, default=str))
+
+
+class TestImpactPlugin:
+    """记录每个用例的指纹和结果，并在 --impact 时据此选择和排序用例"""
+
+    __test__ = False  # 类名以 Test 开头，避免被 pytest 当作测试类收集
+
+    def __init__(self, config):
+        self.config = config
+        self.enabled = config.getoption("--impact")
+        self.reset = config.getoption("--impact-reset")
+        self.path = os.path.join(str(config.rootpath), config.getoption("--impact-file") or DEFAULT_IMPACT_FILE)
+        impact_config = (get_config() or {}).get('impact', {})
+        self.max_age = impact_config.get('max_age_hours', 24) * 3600
+        self.config_keys = impact_config.get('config_keys', ['api'])
+        self.records = {} if self.reset else self._load()
+        self.fingerprints = {}  # {nodeid: fingerprint}，本进程收集到的用例
+        self._results = {}  # {nodeid: {'fingerprint', 'outcome', 'duration'}}，本次执行的结果
+        self._source_cache = {}
+        self._file_cache = {}  # {参数值: 文件内容摘要 或 None (不是文件路径)}
+        self._base = None
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable test impact file {self.path}: {e!r}")
+            return {}
+
+    # --- 指纹 ---
+
+    def _function_source(self, function):
+        if function not in self._source_cache:
+            try:
+                self._source_cache[function] = inspect.getsource(function)
+            except (OSError, TypeError):
+                self._source_cache[function] = getattr(function, '__qualname__', repr(function))
+        return self._source_cache[function]
+
+    def _file_digest(self, value):
+        """参数值是项目内的文件路径时返回文件内容的摘要，否则返回 None"""
+        if value not in self._file_cache:
+            path = os.path.join(str(self.config.rootpath), value)
+            digest = None
+            if len(value) < 1024 and '\n' not in value and os.path.isfile(path):
+                with open(path, 'rb') as file:
+                    digest = _sha1(file.read())
+            self._file_cache[value] = digest
+        return self._file_cache[value]
+
+    def _params_digest(self, item):
+        callspec = getattr(item, 'callspec', None)
+        if callspec is None:
+            return ''
+        parts = []
+        for name, value in sorted(callspec.params.items()):
+            if isinstance(value, CaseRef):
+                parts.append(f"{name}={value.source}:{_sha1(value.read_raw())}")
+            elif isinstance(value, str) and self._file_digest(value):
+                parts.append(f"{name}={value}:{self._file_digest(value)}")
+            else:
+                parts.append(f"{name}={value!r}")
+        return '\n'.join(parts)
+
+    def fingerprint(self, item):
+        if self._base is None:
+            self._base = _sha1(framework_digest(), config_digest(self.config_keys))
+        function = getattr(item, 'function', None)
+        source = self._function_source(function) if function is not None else item.nodeid
+        return _sha1(self._base, source, self._params_digest(item))
+
+    # --- 选择和排序 ---
+
+    def _is_fresh_pass(self, nodeid, fingerprint, now):
+        record = self.records.get(nodeid)
+        return (record is not None and record['fingerprint'] == fingerprint and record['outcome'] == 'passed'
+                and now - record.get('timestamp', 0) <= self.max_age)
+
+    def pytest_collection_modifyitems(self, session, config, items):
+        for item in items:
+            self.fingerprints[item.nodeid] = self.fingerprint(item)
+        if not self.enabled:
+            return
+
+        now = time.time()
+        failed, changed, deselected = [], [], []
+        for item in items:
+            fingerprint = self.fingerprints[item.nodeid]
+            record = self.records.get(item.nodeid)
+            if self._is_fresh_pass(item.nodeid, fingerprint, now):
+                deselected.append(item)
+            elif record is not None and record['outcome'] == 'failed':
+                failed.append(item)
+            else:
+                changed.append(item)
+        if deselected:
+            config.hook.pytest_deselected(items=deselected)
+        items[:] = failed + changed
+        logger.info(f"Test impact: {len(failed)} previously failed, {len(changed)} new/changed, "
+                    f"{len(deselected)} unchanged and passed (deselected)")
+
+    # --- 记录结果 ---
+
+    @pytest.hookimpl(hookwrapper=True)
+    def pytest_runtest_makereport(self, item, call):
+        # 把指纹附加到报告上: 使用 xdist 时报告连同该属性一起发送给主进程，由主进程记录
+        outcome = yield
+        fingerprint = self.fingerprints.get(item.nodeid)
+        if fingerprint is not None:
+            outcome.get_result().impact_fingerprint = fingerprint
+
+    def pytest_runtest_logreport(self, report):
+        fingerprint = getattr(report, 'impact_fingerprint', None)
+        if fingerprint is None:
+            return
+        result = self._results.setdefault(report.nodeid, {'fingerprint': fingerprint, 'outcome': 'passed',
+                                                          'duration': 0.0})
+        result['duration'] += getattr(report, 'duration', 0.0)
+        if report.failed:
+            result['outcome'] = 'failed'
+        elif report.skipped and result['outcome'] == 'passed':
+            result['outcome'] = 'skipped'  # 跳过的用例不缓存，下次照常执行
+
+    def pytest_sessionfinish(self, session, exitstatus):
+        if is_xdist_worker():
+            return  # 由主进程统一写入
+        if self.enabled and exitstatus == pytest.ExitCode.NO_TESTS_COLLECTED and self.records:
+            session.exitstatus = pytest.ExitCode.OK  # 所有用例都未变化，不应视为 "没有收集到用例" 的错误
+        if not self._results and not self.reset:
+            return
+        records = self.records
+        now = time.time()
+        for nodeid, result in self._results.items():
+            if result['outcome'] == 'skipped':
+                records.pop(nodeid, None)
+            else:
+                records[nodeid] = {**result, 'duration': round(result['duration'], 3), 'timestamp': now}
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(records, file, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,86 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import allure
+
+pytest.importorskip("selenium", reason="selenium is required for UI tests")
+
+INDEX_HTML = """<!DOCTYPE html>
+<html>
+<head><title>AutoDemo</title></head>
+<body>
+<h1 id="title">AutoDemo</h1>
+<script>
+document.cookie = "session=abc123; path=/";
+window.localStorage.setItem("token", "secret");
+window.sessionStorage.setItem("cart", "3");
+</script>
+</body>
+</html>
+"""
+
+
+@pytest.fixture(scope="module")
+def static_site(tmp_path_factory):
+    """在本地随机端口启动一个静态 HTTP 服务，返回站点根 URL"""
+    root = tmp_path_factory.mktemp("static_site")
+    (root / "index.html").write_text(INDEX_HTML, encoding="utf-8")
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=str(root))
+    handler.log_message = lambda *args: None  # 不输出访问日志
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@allure.feature("Web Driver")
+class TestDriverPool:
+
+    @allure.story("Browser Reuse")
+    @allure.title("Test browser is reused and its state is reset between leases")
+    @pytest.mark.ui
+    def test_browser_reused_with_clean_state(self, web_driver_pool, static_site):
+        with web_driver_pool.lease() as driver:
+            first_session = driver.session_id
+            driver.get(f"{static_site}/index.html")
+            assert driver.title == "AutoDemo"
+            assert driver.get_cookie("session") is not None
+            assert driver.execute_script("return window.localStorage.getItem('token');") == "secret"
+
+        with web_driver_pool.lease() as driver:
+            assert driver.session_id == first_session, "Expected the pooled browser to be reused"
+            assert driver.current_url == "about:blank"
+            # 访问同源下不会写入状态的页面，确认上一次的 cookie / storage 已被清理
+            driver.get(f"{static_site}/missing.html")
+            assert driver.get_cookie("session") is None
+            assert driver.execute_script("return window.localStorage.getItem('token');") is None
+
+    @allure.story("Browser Reuse")
+    @allure.title("Test Web Storage of every visited origin is cleared, not only the current one")
+    @pytest.mark.ui
+    def test_storage_cleared_for_all_origins(self, web_driver_pool, static_site):
+        # 127.0.0.1 和 localhost 是两个不同的源，各自有独立的 localStorage
+        other_site = static_site.replace('127.0.0.1', 'localhost')
+        with web_driver_pool.lease() as driver:
+            if not hasattr(driver, 'execute_cdp_cmd'):
+                pytest.skip("clearing storage of other origins requires a Chromium-based browser (CDP)")
+            driver.get(f"{static_site}/index.html")
+            driver.get(f"{other_site}/index.html")  # 归还时当前页面属于 localhost
+
+        with web_driver_pool.lease() as driver:
+            driver.get(f"{static_site}/missing.html")
+            assert driver.execute_script("return window.localStorage.getItem('token');") is None
+            assert driver.execute_script("return window.sessionStorage.getItem('cart');") is None
+
+    @allure.story("Browser Reuse")
+    @allure.title("Test driver fixture provides a browser without state from previous tests")
+    @pytest.mark.ui
+    def test_driver_fixture_clean_state(self, driver, static_site):
+        assert driver.current_url == "about:blank"
+        driver.get(f"{static_site}/missing.html")
+        assert driver.get_cookie("session") is None
+        assert driver.execute_script("return window.localStorage.getItem('token');") is None
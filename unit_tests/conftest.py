@@ -0,0 +1,21 @@
+# unit_tests/conftest.py
+import pytest
+
+from core.api_client import ApiClient
+from core.mock_server import MockServer
+
+
+@pytest.fixture(scope="module")
+def local_server():
+    """框架单元测试使用的本地模拟服务 (进程内，随机端口)，不受 --mock-server 影响"""
+    with MockServer() as server:
+        yield server
+
+
+@pytest.fixture
+def local_client(local_server):
+    """指向 local_server 的 ApiClient，用例结束后关闭"""
+    client = ApiClient()
+    client.base_url = local_server.base_url
+    yield client
+    client.close()
@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import allure
+import requests
+
+from core.async_api_client import AsyncApiClient
+
+LATENCY_MS = 50
+
+
+@pytest.fixture
+def async_client(local_server):
+    client = AsyncApiClient(concurrency=4)
+    client.base_url = local_server.base_url
+    yield client
+    client.close()
+
+
+@pytest.fixture
+def slow_server(local_server):
+    local_server.configure(latency_ms=LATENCY_MS)
+    yield local_server
+    local_server.configure(latency_ms=0)
+
+
+class _RepeatedHeadersHandler(BaseHTTPRequestHandler):
+    """返回重复的响应头 (mock_server 的每个响应头只出现一次)"""
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Set-Cookie', 'session=abc; Path=/')
+        self.send_header('Set-Cookie', 'theme=dark; Path=/')
+        self.send_header('X-Trace', 'a')
+        self.send_header('x-trace', 'b')
+        self.send_header('Content-Length', '2')
+        self.end_headers()
+        self.wfile.write(b'{}')
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def repeated_headers_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _RepeatedHeadersHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@allure.feature("Async API Client")
+class TestAsyncApiClient:
+
+    @allure.story("Concurrency")
+    @allure.title("Test gather never has more requests in flight than the concurrency limit")
+    @pytest.mark.unit
+    def test_concurrency_limit(self, async_client, slow_server):
+        start = time.perf_counter()
+        responses = async_client.run(async_client.gather(async_client.get('/users/2') for _ in range(16)))
+        elapsed = time.perf_counter() - start
+        assert [response.status_code for response in responses] == [200] * 16
+        # 16 个请求、并发上限 4: 至少要分 4 批，每批至少 LATENCY_MS
+        assert elapsed >= 4 * LATENCY_MS / 1000 * 0.95
+        assert async_client._semaphore._value == async_client.concurrency  # 全部释放
+
+        unlimited = AsyncApiClient(concurrency=16)
+        unlimited.base_url = async_client.base_url
+        try:
+            start = time.perf_counter()
+            unlimited.run(unlimited.gather(unlimited.get('/users/2') for _ in range(16)))
+            assert time.perf_counter() - start < elapsed
+        finally:
+            unlimited.close()
+
+    @allure.story("Ordering")
+    @allure.title("Test results keep the order of the calls, not of completion")
+    @pytest.mark.unit
+    def test_result_order(self, async_client):
+        user_ids = [5, 1, 12, 3, 9, 2, 7, 11, 4, 6, 10, 8]
+        responses = async_client.run(async_client.gather(async_client.get(f'/users/{i}') for i in user_ids))
+        assert [response.json()['data']['id'] for response in responses] == user_ids
+        created = async_client.run(async_client.gather(
+            async_client.post('/users', json={'name': f'user{i}', 'job': 'qa'}) for i in range(10)))
+        assert [response.json()['name'] for response in created] == [f'user{i}' for i in range(10)]
+        assert all(response.status_code == 201 for response in created)
+
+    @allure.story("Errors")
+    @allure.title("Test HTTP errors are responses and transport errors follow return_exceptions")
+    @pytest.mark.unit
+    def test_errors(self, async_client, slow_server):
+        def calls():
+            return [async_client.get('/users/2'),
+                    async_client.get('/users/2', timeout=LATENCY_MS / 1000 / 5),
+                    async_client.get('/users/999')]
+
+        results = async_client.run(async_client.gather(calls(), return_exceptions=True))
+        assert results[0].status_code == 200
+        assert isinstance(results[1], asyncio.TimeoutError)
+        assert results[2].status_code == 404
+        with pytest.raises(asyncio.TimeoutError):
+            async_client.run(async_client.gather(calls()))
+        # 失败后客户端仍然可用
+        assert async_client.run(async_client.get('/users/3')).json()['data']['id'] == 3
+
+    @allure.story("Headers")
+    @allure.title("Test repeated response headers are joined like the sync client does")
+    @pytest.mark.unit
+    def test_repeated_headers(self, async_client, repeated_headers_url):
+        async_client.base_url = repeated_headers_url
+        response = async_client.run(async_client.get('/cookies'))
+        expected = requests.get(f"{repeated_headers_url}/cookies").headers
+        assert response.headers['Set-Cookie'] == expected['Set-Cookie'] == 'session=abc; Path=/, theme=dark; Path=/'
+        assert response.headers['X-Trace'] == expected['X-Trace'] == 'a, b'
+        assert response.json() == {}
@@ -0,0 +1,87 @@
+import pytest
+import allure
+
+from benchmarks.run import compare
+
+
+def _document(**metrics):
+    """{'name': (value, unit)} -> 结果文件格式 {'results': {'name': {'value': ..., 'unit': ...}}}"""
+    return {'results': {name.replace('__', '.'): {'value': value, 'unit': unit}
+                        for name, (value, unit) in metrics.items()}}
+
+
+def _compare(current, previous, threshold=0.25):
+    return compare(_document(**current)['results'], _document(**previous) if previous is not None else None,
+                   threshold)
+
+
+@allure.feature("Benchmarks")
+class TestCompare:
+
+    @allure.story("Threshold")
+    @allure.title("Test a slowdown beyond the threshold is a regression, within it is not")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("current, regressed", [(124.0, False), (125.0, False), (126.0, True), (80.0, False)])
+    def test_threshold(self, current, regressed):
+        lines, regressions = _compare({'client__get_us': (current, 'us')}, {'client__get_us': (100.0, 'us')})
+        assert regressions == (['client.get_us'] if regressed else [])
+        assert lines[1].endswith('REGRESSION') == regressed
+
+    @allure.story("Threshold")
+    @allure.title("Test the threshold argument is applied")
+    @pytest.mark.unit
+    def test_custom_threshold(self):
+        current, previous = {'data__load_ms': (150.0, 'ms')}, {'data__load_ms': (100.0, 'ms')}
+        assert _compare(current, previous, threshold=0.6)[1] == []
+        assert _compare(current, previous, threshold=0.4)[1] == ['data.load_ms']
+
+    @allure.story("Noise Floor")
+    @allure.title("Test small absolute changes stay below the per-unit noise floor")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("unit, previous, current, regressed", [
+        ('us', 5.0, 14.0, False),    # +180%，但只慢了 9us
+        ('us', 5.0, 16.0, True),
+        ('ms', 40.0, 59.0, False),   # +48%，但只慢了 19ms
+        ('ms', 40.0, 61.0, True),
+        ('count', 1.0, 1.5, True),   # 没有噪声下限的单位只看相对变化
+    ])
+    def test_noise_floor(self, unit, previous, current, regressed):
+        _, regressions = _compare({'metric': (current, unit)}, {'metric': (previous, unit)})
+        assert regressions == (['metric'] if regressed else [])
+
+    @allure.story("New Metrics")
+    @allure.title("Test metrics missing from the baseline are reported but never regress")
+    @pytest.mark.unit
+    def test_new_metrics(self):
+        lines, regressions = _compare({'a_us': (100.0, 'us'), 'b_us': (5000.0, 'us')}, {'a_us': (100.0, 'us')})
+        assert regressions == []
+        assert lines[2].split('|')[0].strip() == 'b_us'
+        assert lines[2].split('|')[1].strip() == '-'
+        assert lines[2].endswith('new')
+
+    @allure.story("New Metrics")
+    @allure.title("Test without a baseline every metric is new")
+    @pytest.mark.unit
+    def test_no_baseline(self):
+        lines, regressions = _compare({'a_us': (100.0, 'us'), 'b_ms': (1.0, 'ms')}, None)
+        assert regressions == []
+        assert all(line.endswith('new') for line in lines[1:])
+
+    @allure.story("Zero Baseline")
+    @allure.title("Test a zero baseline does not divide by zero and only the noise floor decides")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("current, regressed, change", [
+        (0.0, False, '+0%'), (8.0, False, '+inf%'), (50.0, True, '+inf%'), (-3.0, False, '-inf%')])
+    def test_zero_baseline(self, current, regressed, change):
+        lines, regressions = _compare({'overhead_us': (current, 'us')}, {'overhead_us': (0.0, 'us')})
+        assert regressions == (['overhead_us'] if regressed else [])
+        assert lines[1].split('|')[3].split()[0] == change
+
+    @allure.story("Zero Baseline")
+    @allure.title("Test a negative baseline (overhead within noise) still detects slowdowns")
+    @pytest.mark.unit
+    def test_negative_baseline(self):
+        _, regressions = _compare({'overhead_us': (40.0, 'us')}, {'overhead_us': (-5.0, 'us')})
+        assert regressions == ['overhead_us']
+        _, regressions = _compare({'overhead_us': (-20.0, 'us')}, {'overhead_us': (-5.0, 'us')})
+        assert regressions == []
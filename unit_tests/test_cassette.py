@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+
+import pytest
+import allure
+
+from core.cassette import Cassette, CassetteMissError
+
+
+def _use_cassette(client, directory, mode):
+    client.cassette = Cassette(str(directory), name='unit', mode=mode)
+    return client.cassette
+
+
+@allure.feature("Cassette")
+class TestCassette:
+
+    @allure.story("Record / Replay")
+    @allure.title("Test recorded interactions replay without the network")
+    @pytest.mark.unit
+    def test_record_then_replay(self, local_client, local_server, tmp_path):
+        cassette = _use_cassette(local_client, tmp_path, 'record')
+        recorded = [local_client.post('/users', json={'name': 'neo', 'job': 'the one'}).json() for _ in range(2)]
+        user = local_client.get('/users/2').json()
+        cassette.save()
+        assert recorded[0]['id'] != recorded[1]['id']
+
+        requests_before = local_server.requests
+        _use_cassette(local_client, tmp_path, 'replay')
+        replayed = [local_client.post('/users', json={'job': 'the one', 'name': 'neo'}) for _ in range(2)]
+        assert [response.json() for response in replayed] == recorded
+        assert all(response.from_cassette for response in replayed)
+        assert local_client.get('/users/2').json() == user
+        assert local_server.requests == requests_before, "Replay must not hit the server"
+        with pytest.raises(CassetteMissError):
+            local_client.get('/users/3')
+
+    @allure.story("Record / Replay")
+    @allure.title("Test identical responses keep their recorded order (A, A, B)")
+    @pytest.mark.unit
+    def test_replay_keeps_order_of_identical_responses(self, local_client, local_server, tmp_path):
+        cassette = _use_cassette(local_client, tmp_path, 'record')
+        local_server.configure(error_rate=1.0, error_status=500)  # 500 不在重试列表中
+        try:
+            statuses = [local_client.get('/users/2').status_code for _ in range(2)]
+        finally:
+            local_server.configure(error_rate=0.0, error_status=503)
+        statuses.append(local_client.get('/users/2').status_code)
+        cassette.save()
+        assert statuses == [500, 500, 200]
+
+        _use_cassette(local_client, tmp_path, 'replay')
+        assert [local_client.get('/users/2').status_code for _ in range(3)] == [500, 500, 200]
+
+    @allure.story("Record / Replay")
+    @allure.title("Test recording again discards stale worker and master files")
+    @pytest.mark.unit
+    def test_clear_removes_stale_files(self, local_client, tmp_path):
+        stale = {'key': 'stale', 'method': 'GET', 'url': 'http://old/api/users/2', 'status': 418, 'body': '{}'}
+        for name in ('unit.jsonl.gz', 'unit.gw3.jsonl.gz'):
+            with gzip.open(tmp_path / name, 'wt', encoding='utf-8') as file:
+                file.write(json.dumps(stale) + '\n')
+        (tmp_path / 'other.jsonl.gz').write_bytes(b'')
+
+        cassette = Cassette(str(tmp_path), name='unit', mode='record')
+        cassette.clear()
+        local_client.cassette = cassette
+        local_client.get('/users/2')
+        cassette.save()
+
+        # 使用 xdist 时本进程的文件名带 worker 后缀
+        assert sorted(path.name for path in tmp_path.iterdir()) == sorted(
+            ['other.jsonl.gz', os.path.basename(cassette.save_path)])
+        assert len(Cassette(str(tmp_path), name='unit', mode='replay')) == 1
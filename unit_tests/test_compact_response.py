@@ -0,0 +1,118 @@
+import json
+import os
+import threading
+
+import pytest
+import allure
+import requests
+
+from common.utils import get_response_json
+from core.compact_response import CompactResponse, ResponseRetention
+
+
+def _response(size, url='http://local/users'):
+    """构造响应体约为 size 字节的 JSON 响应 (已读取)"""
+    body = json.dumps({'data': 'é' * (size // 2 - 6)}, ensure_ascii=False).encode('utf-8')
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.encoding = 'utf-8'
+    response.headers['Content-Type'] = 'application/json'
+    response._content = body
+    response._content_consumed = True
+    return response
+
+
+@pytest.fixture
+def retention(tmp_path):
+    retention = ResponseRetention(max_bytes_per_test=10_000, compress_min_bytes=1000, spill_min_bytes=5000,
+                                  spill_dir=str(tmp_path))
+    yield retention
+    retention.close()
+
+
+@allure.feature("Response Retention")
+class TestResponseRetention:
+
+    @allure.story("Per-test Cap")
+    @allure.title("Test bodies within the per-test cap are kept, later ones are compacted")
+    @pytest.mark.unit
+    def test_per_test_cap(self, retention):
+        kept = [_response(4000), _response(4000)]
+        over = _response(4000)
+        small = _response(500)
+        for response in kept + [over, small]:
+            retention.track(response)
+        assert [type(response) for response in kept] == [requests.Response, requests.Response]
+        assert type(over) is CompactResponse
+        assert type(small) is requests.Response, "Bodies below compress_min_bytes are never compacted"
+        assert retention.retained_bytes == sum(len(response._content) for response in kept)
+
+    @allure.story("Thresholds")
+    @allure.title("Test bodies below spill_min_bytes are compressed, larger ones spill to disk")
+    @pytest.mark.unit
+    def test_compress_vs_spill(self, retention, tmp_path):
+        compressed, spilled = _response(2000), _response(6000)
+        retention.compact(compressed)
+        retention.compact(spilled)
+        assert type(compressed._compact_body).__name__ == '_CompressedBody'
+        assert type(spilled._compact_body).__name__ == '_SpilledBody'
+        assert os.path.dirname(os.path.dirname(spilled._compact_body.path)) == str(tmp_path)
+        assert retention.stats == {'compressed': 1, 'spilled': 1, 'compacted_bytes': 2000 + 6000}
+
+    @allure.story("Reset")
+    @allure.title("Test reset compacts live responses and drops the parsed JSON cache")
+    @pytest.mark.unit
+    def test_reset_compacts_live_responses(self, retention):
+        live, dropped = _response(2000), _response(2000)
+        retention.track(live)
+        retention.track(dropped)
+        get_response_json(live)
+        del dropped
+        retention.reset()
+        assert type(live) is CompactResponse
+        assert '_parsed_json' not in live.__dict__
+        assert live._content is None
+        assert retention.retained_bytes == 0
+        assert retention.stats['compressed'] == 1, "Garbage-collected responses are skipped"
+
+    @allure.story("Round Trip")
+    @allure.title("Test content, text, json() and iter_content survive compaction")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("size", [2000, 6000], ids=['compressed', 'spilled'])
+    def test_round_trip(self, retention, size):
+        response = _response(size)
+        content, text, data = response.content, response.text, response.json()
+        retention.compact(response)
+        assert response.content == content
+        assert response.text == text
+        assert response.json() == data
+        assert get_response_json(response) == data
+        assert b''.join(response.iter_content(chunk_size=7)) == content
+        assert ''.join(response.iter_content(chunk_size=7, decode_unicode=True)) == text
+
+    @allure.story("Cleanup")
+    @allure.title("Test close removes the spill directory")
+    @pytest.mark.unit
+    def test_close_removes_spill_dir(self, retention):
+        response = _response(6000)
+        retention.compact(response)
+        spill_dir = os.path.dirname(response._compact_body.path)
+        assert os.listdir(spill_dir) == ['1.body']
+        retention.close()
+        assert not os.path.exists(spill_dir)
+
+    @allure.story("Thread Safety")
+    @allure.title("Test concurrent compaction keeps the stats consistent")
+    @pytest.mark.unit
+    def test_concurrent_stats(self, retention):
+        def compact_many():
+            for _ in range(200):
+                retention.compact(_response(1200))
+
+        threads = [threading.Thread(target=compact_many) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert retention.stats == {'compressed': 800, 'spilled': 0, 'compacted_bytes': 800 * 1200}
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+import allure
+import requests
+
+from common.expectations import ExpectationSet
+
+USER = {
+    'data': {'id': 2, 'email': 'janet.weaver@reqres.in', 'first_name': 'Janet', 'last_name': 'Weaver',
+             'roles': [{'name': 'admin'}, {'name': 'ops'}]},
+    'support': {'url': 'https://reqres.in/#support-heading'},
+    'name': 'neo',
+    'job': 'the one',
+}
+
+
+class _CountingDict(dict):
+    """记录每个键被读取的次数，用于确认公共前缀只访问一次"""
+
+    reads = None
+
+    def __getitem__(self, key):
+        self.reads[key] = self.reads.get(key, 0) + 1
+        return super().__getitem__(key)
+
+
+def _counting(value, reads):
+    if isinstance(value, dict):
+        document = _CountingDict({key: _counting(item, reads) for key, item in value.items()})
+        document.reads = reads
+        return document
+    if isinstance(value, list):
+        return [_counting(item, reads) for item in value]
+    return value
+
+
+def _response(payload, status_code=200):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+    response.request = requests.Request('GET', 'http://127.0.0.1/api/users/2').prepare()
+    return response
+
+
+@allure.feature("Expectations")
+class TestExpectationSet:
+
+    @allure.story("Single Pass")
+    @allure.title("Test all checks pass in one traversal of shared prefixes")
+    @pytest.mark.unit
+    def test_shared_prefix_visited_once(self):
+        reads = {}
+        expectations = ExpectationSet(
+            values={'data.id': 2, 'data.first_name': 'Janet', 'data.last_name': 'Weaver',
+                    'data.roles[*].name': ['admin', 'ops'], 'support.url': 'https://reqres.in/#support-heading'},
+            keys={'data': ['email', 'roles'], '': ['support']},
+            payload={'name': 'neo', 'job': 'the one'},
+        )
+        assert expectations.evaluate_document(_counting(USER, reads)) == []
+        assert reads['data'] == 1 and reads['support'] == 1
+        assert len(expectations) == 8
+
+    @allure.story("Mismatches")
+    @allure.title("Test every mismatch is reported together")
+    @pytest.mark.unit
+    def test_all_mismatches_reported(self):
+        mismatches = ExpectationSet(
+            values={'data.id': 3, 'data.first_name': 'Janet', 'data.missing.deep': 1, 'data.missing.other': 2},
+            keys={'support': ['url', 'text']},
+            payload={'name': 'trinity', 'absent': 'x'},
+        ).evaluate_document(USER)
+        text = '\n'.join(mismatches)
+        assert "Expected JSON value '3'" in text and "'data.id'" in text
+        assert "at path 'data.first_name'" not in text
+        assert "(expectation on 'data.missing.deep')" in text and "(expectation on 'data.missing.other')" in text
+        assert "Missing expected JSON keys: ['text']" in text
+        assert "'name': {'expected': 'trinity', 'actual': 'neo'}" in text
+        assert "'absent': {'expected': 'x', 'actual': 'None'}" in text
+        assert len(mismatches) == 5  # 两个值 + 两个断开的路径 + 缺少的键，payload 不匹配合并为一条
+
+    @allure.story("Mismatches")
+    @allure.title("Test keys on a non-dictionary value and filters inside the tree")
+    @pytest.mark.unit
+    def test_keys_on_non_dict_and_filters(self):
+        mismatches = ExpectationSet(
+            values={'data.roles[?(@.name == "ops")].name': ['ops']},
+            keys={'data.email': ['x']},
+        ).evaluate_document(USER)
+        assert len(mismatches) == 1 and "is not a dictionary" in mismatches[0]
+
+    @allure.story("Response")
+    @allure.title("Test verify raises one AssertionError with status and JSON mismatches")
+    @pytest.mark.unit
+    def test_verify_response(self):
+        expectations = ExpectationSet(status_code=200, values={'data.id': 2}, keys=['data', 'support'])
+        expectations.verify(_response(USER))
+        with pytest.raises(AssertionError) as error:
+            ExpectationSet(status_code=201, values={'data.id': 3}).verify(_response(USER))
+        message = str(error.value)
+        assert 'Expected status code 201, but got 200' in message
+        assert "Expected JSON value '3'" in message
+        assert 'Response JSON (excerpt)' in message
+
+    @allure.story("Response")
+    @allure.title("Test a non-JSON body fails JSON checks but not status-only checks")
+    @pytest.mark.unit
+    def test_non_json_response(self):
+        response = _response(b'<html>oops</html>', status_code=502)
+        assert ExpectationSet(status_code=502).evaluate(response) == []
+        mismatches = ExpectationSet(values={'data.id': 2}).evaluate(response)
+        assert len(mismatches) == 1 and 'not valid JSON' in mismatches[0]
+
+    @allure.story("Describe")
+    @allure.title("Test the Allure step title summarises the checks")
+    @pytest.mark.unit
+    def test_describe(self):
+        assert ExpectationSet(status_code=200).describe() == "Verify response status code is 200"
+        description = ExpectationSet(status_code=200, values={'data.id': 2}).describe()
+        assert description.startswith("Verify 2 expectations: ")
+        assert ExpectationSet(status_code=200, description='custom').describe() == 'custom'
@@ -0,0 +1,102 @@
+import pytest
+import allure
+
+from common.json_path import JsonPathError, compile_path
+
+DOCUMENT = {
+    'page': 2,
+    'data': [
+        {'id': 7, 'email': 'michael@reqres.in', 'tags': ['admin', 'ops'], 'first.name': 'Michael', 'note': 'a]b'},
+        {'id': 8, 'email': 'lindsay@reqres.in', 'tags': ['ops'], 'first.name': 'Lindsay', 'note': None},
+        {'id': 9, 'email': None, 'tags': [], 'first.name': 'Tobias', 'note': "O'Brien"},
+    ],
+    'support': {'url': 'https://reqres.in/#support-heading', 'text': 'Thanks'},
+}
+
+
+@allure.feature("JSON Path")
+class TestJsonPath:
+
+    @allure.story("Single Values")
+    @allure.title("Test dotted keys, indexes and quoted keys resolve to a single value")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("expression, expected", [
+        ('page', 2),
+        ('$.page', 2),
+        ('data.0.id', 7),
+        ('data[1].email', 'lindsay@reqres.in'),
+        ('data[-1].id', 9),
+        ("data[0]['first.name']", 'Michael'),
+        ('data[2]["first.name"]', 'Tobias'),
+        ('support.url', 'https://reqres.in/#support-heading'),
+    ])
+    def test_resolve(self, expression, expected):
+        assert compile_path(expression).is_singular
+        assert compile_path(expression).resolve(DOCUMENT) == expected
+
+    @allure.story("Multiple Values")
+    @allure.title("Test wildcards, slices and filters return every match")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("expression, expected", [
+        ('data[*].id', [7, 8, 9]),
+        ('data.*.id', [7, 8, 9]),
+        ('support.*', ['https://reqres.in/#support-heading', 'Thanks']),
+        ('data[1:].id', [8, 9]),
+        ('data[::2].id', [7, 9]),
+        ('data[:-1].id', [7, 8]),
+        ('data[?(@.id == 8)].email', ['lindsay@reqres.in']),
+        ('data[?(@.id >= 8)].id', [8, 9]),
+        ('data[?(@.id != 8)].id', [7, 9]),
+        ('data[?(@.email)].id', [7, 8]),
+        ("data[?(@.email == 'michael@reqres.in')].id", [7]),
+        ('data[?(@.tags[0] == "ops")].id', [8]),
+        ('data[?(@.tags[-1] == "ops")].id', [7, 8]),
+        ('data[?(@.note == "a]b")].id', [7]),
+        ('data[?(@.note == "O\'Brien")].id', [9]),
+        ('data[*].tags[0]', ['admin', 'ops']),
+        ('data[?(@.id > "x")].id', []),
+        ('data[?(id == 9)].id', [9]),
+        ('data[0].tags[?(@ == "ops")]', ['ops']),
+        ('data[1].tags[?(@)]', ['ops']),
+    ])
+    def test_find(self, expression, expected):
+        path = compile_path(expression)
+        assert not path.is_singular
+        assert path.resolve(DOCUMENT) == expected
+
+    @allure.story("Multiple Values")
+    @allure.title("Test a bare '@' in a filter refers to the list item itself")
+    @pytest.mark.unit
+    def test_filter_on_scalars(self):
+        assert compile_path('a[?(@ > 1)]').resolve({'a': [1, 2, 3]}) == [2, 3]
+        assert compile_path('a[?(@ == "b")]').resolve({'a': ['a', 'b', 'c', 'b']}) == ['b', 'b']
+        assert compile_path('a[?(@ != null)]').resolve({'a': [None, 0, 'x']}) == [0, 'x']
+        assert compile_path('a[?(@)]').resolve({'a': [None, 0, 'x']}) == [0, 'x']
+
+    @allure.story("Errors")
+    @allure.title("Test missing values and invalid syntax raise JsonPathError")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("expression, message", [
+        ('data.5.id', 'out of bounds'),
+        ('support.missing', "Key 'missing' not found"),
+        ('page.id', 'non-dict/non-list'),
+        ('support[0]', 'non-list'),
+    ])
+    def test_resolve_errors(self, expression, message):
+        with pytest.raises(JsonPathError, match=message):
+            compile_path(expression).resolve(DOCUMENT)
+        assert compile_path(expression).find(DOCUMENT) == []
+
+    @allure.story("Errors")
+    @allure.title("Test invalid path syntax is rejected when compiling")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("expression", ['data[', 'data[x]', 'data[1:a]', 'data[?(@.tags[0 == "x")]', 'data[?()]'])
+    def test_invalid_syntax(self, expression):
+        with pytest.raises(JsonPathError):
+            compile_path(expression)
+
+    @allure.story("Compilation")
+    @allure.title("Test the same expression is compiled only once")
+    @pytest.mark.unit
+    def test_compiled_once(self):
+        assert compile_path('data[?(@.id == 8)].email') is compile_path('data[?(@.id == 8)].email')
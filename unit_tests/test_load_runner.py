@@ -0,0 +1,78 @@
+import json
+
+import pytest
+import allure
+
+from common.read_yaml import iter_cases
+from core.load_runner import LoadRunner, main
+from core.mock_server import MockServer
+
+DATA_FILE = 'data/user_creation_data.yaml'
+
+
+@allure.feature("Load Runner")
+class TestLoadRunner:
+
+    @allure.story("Closed Loop")
+    @allure.title("Test virtual users replay data-driven cases against the mock server")
+    @pytest.mark.unit
+    def test_closed_loop(self, local_client):
+        result = LoadRunner(local_client, list(iter_cases(DATA_FILE))).run('closed', users=4, duration=0.3)
+        summary = result.summary()
+        assert summary['requests'] > 0
+        assert summary['errors'] == 0, summary['error_samples']
+        assert summary['latency_ms']['count'] == summary['requests']
+
+    @allure.story("Open Loop")
+    @allure.title("Test constant arrival rate sends the scheduled number of requests")
+    @pytest.mark.unit
+    def test_open_loop(self, local_client):
+        result = LoadRunner(local_client, list(iter_cases(DATA_FILE))).run('open', rate=50, duration=0.4)
+        assert result.requests == 20
+        assert result.errors == 0, result.error_samples
+
+    @allure.story("Errors")
+    @allure.title("Test errors raised while building a request are counted, not lost")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("mode", ['open', 'closed'])
+    def test_non_transport_errors_counted(self, local_client, mode):
+        runner = LoadRunner(local_client, list(iter_cases(DATA_FILE)), endpoint='/users/{missing}')
+        result = runner.run(mode, rate=50, users=2, duration=0.2)
+        assert result.requests > 0
+        assert result.errors == result.requests
+        assert list(result.error_samples) == ["KeyError: 'missing'"]
+
+    @allure.story("Exit Code")
+    @allure.title("Test the CLI fails when no request completes and honours --max-error-rate")
+    @pytest.mark.unit
+    def test_main_exit_code(self, local_server, tmp_path, capsys):
+        common = ['--data', DATA_FILE, '--mode', 'closed', '--users', '2', '--duration', '0.2',
+                  '--base-url', local_server.base_url]
+        output = tmp_path / 'load.json'
+        assert main(common + ['--output', str(output)]) == 0
+        assert json.loads(output.read_text(encoding='utf-8'))['errors'] == 0
+        assert main(common + ['--endpoint', '/users/{missing}']) == 1
+        local_server.configure(error_rate=0.5)
+        try:
+            assert main(common + ['--max-error-rate', '0.1']) == 1
+        finally:
+            local_server.configure(error_rate=0.0)
+        capsys.readouterr()
+
+    @allure.story("Errors")
+    @allure.title("Test server errors are not hidden by retries and backoff is not counted as latency")
+    @pytest.mark.unit
+    def test_errors_not_retried(self, tmp_path, capsys):
+        data_file = tmp_path / 'get_user.jsonl'
+        data_file.write_text('{"test_id": "get_user", "expected_status": 200}\n', encoding='utf-8')
+        output = tmp_path / 'load.json'
+        with MockServer(error_rate=0.3, error_status=503, seed=7) as server:
+            main(['--data', str(data_file), '--method', 'GET', '--endpoint', '/users/2', '--mode', 'closed',
+                  '--users', '4', '--duration', '0.5', '--base-url', server.base_url, '--output', str(output)])
+            served = server.requests
+        capsys.readouterr()
+        summary = json.loads(output.read_text(encoding='utf-8'))
+        assert summary['requests'] == served, "Every attempt should be one sample"
+        assert 0.2 <= summary['error_rate'] <= 0.4
+        assert list(summary['error_samples']) == ['status 503 != 200']
+        assert summary['latency_ms']['p99'] < 250  # 重试的退避至少 300ms
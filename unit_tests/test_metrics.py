@@ -0,0 +1,105 @@
+import math
+import random
+
+import pytest
+import allure
+
+from common.metrics import LatencyHistogram, LatencyRegistry, endpoint_template, merge_latency_files
+
+MAX_RELATIVE_ERROR = math.sqrt(1.02) - 1 + 1e-9  # 代表值取桶的几何中点，误差不超过半个桶
+
+
+def _samples(count, seed):
+    rng = random.Random(seed)
+    return [rng.lognormvariate(math.log(20), 1.0) for _ in range(count)]  # 毫秒，长尾分布
+
+
+def _exact_percentile(samples, percent):
+    ordered = sorted(samples)
+    return ordered[max(1, math.ceil(len(ordered) * percent / 100)) - 1]
+
+
+def _histogram(samples):
+    histogram = LatencyHistogram()
+    for value in samples:
+        histogram.record(value)
+    return histogram
+
+
+@allure.feature("Metrics")
+class TestLatencyHistogram:
+
+    @allure.story("Percentiles")
+    @allure.title("Test percentiles are within the bucket error of the exact nearest-rank value")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("percent", [1, 50, 90, 95, 99, 99.9, 100])
+    def test_percentile_accuracy(self, percent):
+        samples = _samples(20000, seed=1)
+        estimate = _histogram(samples).percentile(percent)
+        exact = _exact_percentile(samples, percent)
+        assert abs(estimate - exact) / exact <= MAX_RELATIVE_ERROR
+
+    @allure.story("Percentiles")
+    @allure.title("Test summary of an empty histogram and clamping to min / max")
+    @pytest.mark.unit
+    def test_edge_cases(self):
+        assert LatencyHistogram().percentile(50) is None
+        assert LatencyHistogram().summary()['p99'] is None
+        histogram = _histogram([5.0])
+        assert histogram.percentile(0) == histogram.percentile(100) == 5.0
+        assert histogram.summary() == {'count': 1, 'mean': 5.0, 'min': 5.0, 'p50': 5.0, 'p90': 5.0,
+                                       'p95': 5.0, 'p99': 5.0, 'max': 5.0}
+        assert _histogram([0.0, 0.0001]).percentile(50) == 0.0001  # 小于最小桶的耗时
+
+    @allure.story("Merge")
+    @allure.title("Test merging partial histograms equals recording everything in one")
+    @pytest.mark.unit
+    def test_merge_is_exact(self):
+        samples = _samples(9000, seed=2)
+        whole = _histogram(samples)
+        merged = LatencyHistogram()
+        for part in range(3):
+            merged.merge(LatencyHistogram.from_dict(_histogram(samples[part::3]).to_dict()))
+        assert merged.buckets == whole.buckets
+        assert (merged.count, merged.min, merged.max) == (whole.count, whole.min, whole.max)
+        assert merged.total == pytest.approx(whole.total)
+        assert merged.summary() == whole.summary()
+
+
+@allure.feature("Metrics")
+class TestLatencyRegistry:
+
+    @allure.story("Grouping")
+    @allure.title("Test endpoints are grouped by template")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("endpoint, expected", [
+        ('/users/2', '/users/{id}'),
+        ('/users?page=2', '/users'),
+        ('/users/550e8400-e29b-41d4-a716-446655440000/posts', '/users/{id}/posts'),
+        ('/orders/5f1d7c2e9b1e8a3d4c6f0a1b', '/orders/{id}'),
+        ('/users/export', '/users/export'),
+    ])
+    def test_endpoint_template(self, endpoint, expected):
+        assert endpoint_template(endpoint) == expected
+
+    @allure.story("Merge")
+    @allure.title("Test merging dumped files from several workers")
+    @pytest.mark.unit
+    def test_merge_latency_files(self, tmp_path):
+        samples = _samples(3000, seed=3)
+        paths = []
+        for worker in range(3):
+            registry = LatencyRegistry()
+            for value in samples[worker::3]:
+                registry.record('GET /users/{id}', {'total': value, 'ttfb': value / 2, 'connect': None})
+            registry.record(f'POST /worker{worker}', {'total': 1.0})
+            path = tmp_path / f'latency-gw{worker}.json'
+            registry.dump(str(path))
+            paths.append(str(path))
+
+        merged = merge_latency_files(paths, str(tmp_path / 'latency-summary.json'))
+        assert sorted(merged.keys()) == ['GET /users/{id}', 'POST /worker0', 'POST /worker1', 'POST /worker2']
+        assert merged.histogram('GET /users/{id}', 'connect') is None
+        assert merged.histogram('GET /users/{id}').summary() == _histogram(samples).summary()
+        reloaded = LatencyRegistry.load(str(tmp_path / 'latency-summary.json'))
+        assert reloaded.summary() == merged.summary()
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import socket
+
+import pytest
+import allure
+import requests
+
+from core.mock_server import MockServer
+
+
+def _exchange(server, data):
+    """在一条新连接上发送原始请求，读取到服务端关闭连接为止，返回 [(状态码, 响应体), ...]"""
+    with socket.create_connection((server.host, server.port), timeout=5) as sock:
+        sock.sendall(data)
+        received = b''
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            received += chunk
+    responses = []
+    while received:
+        head, _, rest = received.partition(b'\r\n\r\n')
+        lines = head.decode('latin-1').split('\r\n')
+        headers = dict(line.lower().split(': ', 1) for line in lines[1:])
+        length = int(headers['content-length'])
+        responses.append((int(lines[0].split(' ')[1]), rest[:length]))
+        received = rest[length:]
+    return responses
+
+
+def _request(method, path, body=b'', connection='keep-alive', headers=()):
+    head = [f"{method} {path} HTTP/1.1", "Host: localhost", f"Connection: {connection}", *headers]
+    if body and not any(header.lower().startswith('transfer-encoding') for header in headers):
+        head.append(f"Content-Length: {len(body)}")
+    return ('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body
+
+
+def _statuses(server, count, path='/users/2'):
+    with requests.Session() as session:  # 不经过 ApiClient: 注入的 503 不会被重试
+        return [session.get(f"{server.base_url}{path}").status_code for _ in range(count)]
+
+
+@allure.feature("Mock Server")
+class TestMockServer:
+
+    @allure.story("Keep-alive")
+    @allure.title("Test several requests are served on one connection until Connection: close")
+    @pytest.mark.unit
+    def test_keep_alive_reuse(self, local_server):
+        data = (_request('GET', '/api/users/2') + _request('POST', '/api/users', b'{"name": "neo"}')
+                + _request('DELETE', '/api/users/2', connection='close'))
+        responses = _exchange(local_server, data)
+        assert [status for status, _ in responses] == [200, 201, 204]
+        assert json.loads(responses[1][1])['name'] == 'neo'
+
+    @allure.story("Keep-alive")
+    @allure.title("Test HTTP/1.0 requests close the connection by default")
+    @pytest.mark.unit
+    def test_http_10_closes(self, local_server):
+        data = b"GET /api/users/2 HTTP/1.0\r\n\r\n" + _request('GET', '/api/users/3')
+        assert [status for status, _ in _exchange(local_server, data)] == [200]
+
+    @allure.story("Request Body")
+    @allure.title("Test a chunked request body is reassembled, including chunk extensions")
+    @pytest.mark.unit
+    def test_chunked_request_body(self, local_server):
+        chunked = b'5\r\nhello\r\n6;name=value\r\n world\r\nA\r\n0123456789\r\n0\r\n\r\n'
+        data = (_request('POST', '/api/uploads', chunked, headers=['Transfer-Encoding: chunked'])
+                + _request('GET', '/api/users/2', connection='close'))
+        (status, body), (next_status, _) = _exchange(local_server, data)
+        assert status == 201
+        assert json.loads(body) == {'size': 21, 'sha256': hashlib.sha256(b'hello world0123456789').hexdigest()}
+        assert next_status == 200, "The connection stays usable after a chunked body"
+
+    @allure.story("Request Body")
+    @allure.title("Test a malformed Content-Length or chunk size returns 400 and closes the connection")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("headers, body", [
+        (['Content-Length: ten'], b''),
+        (['Content-Length: -1'], b''),
+        (['Transfer-Encoding: chunked'], b'zz\r\nhello\r\n0\r\n\r\n'),
+        (['Transfer-Encoding: chunked'], b'-5\r\nhello\r\n0\r\n\r\n'),
+    ], ids=['content-length', 'negative-content-length', 'chunk-size', 'negative-chunk-size'])
+    def test_malformed_body_length(self, local_server, headers, body):
+        data = _request('POST', '/api/uploads', body, headers=headers) + _request('GET', '/api/users/2')
+        responses = _exchange(local_server, data)
+        assert len(responses) == 1
+        status, payload = responses[0]
+        assert status == 400
+        assert json.loads(payload)['error'].startswith('Invalid')
+
+    @allure.story("Routes")
+    @allure.title("Test unknown routes, methods and bad input return 404 / 405 / 400")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("method, path, body, status", [
+        ('GET', '/other/users/2', None, 404),
+        ('GET', '/api/orders', None, 404),
+        ('GET', '/api/users/99', None, 404),
+        ('GET', '/api/users/abc', None, 404),
+        ('GET', '/api/users/1/posts', None, 404),
+        ('DELETE', '/api/users', None, 405),
+        ('POST', '/api/users/2', None, 405),
+        ('GET', '/api/uploads', None, 405),
+        ('POST', '/api/users/export', None, 405),
+        ('POST', '/api/users', b'not json', 400),
+        ('PUT', '/api/users/2', b'[1, 2]', 400),
+        ('GET', '/api/users?page=x', None, 400),
+        ('GET', '/api/users/export?count=x', None, 400),
+    ])
+    def test_error_routes(self, local_server, method, path, body, status):
+        url = f"http://{local_server.host}:{local_server.port}{path}"
+        assert requests.request(method, url, data=body).status_code == status
+
+    @allure.story("Routes")
+    @allure.title("Test a malformed request line returns 400")
+    @pytest.mark.unit
+    def test_malformed_request_line(self, local_server):
+        assert _exchange(local_server, b"GARBAGE\r\n\r\n") == [(400, b'{}')]
+
+    @allure.story("Fault Injection")
+    @allure.title("Test injected errors are reproducible with a fixed seed")
+    @pytest.mark.unit
+    def test_error_injection_seed(self):
+        runs = []
+        for _ in range(2):
+            with MockServer(error_rate=0.5, seed=42) as server:
+                runs.append(_statuses(server, 20))
+        assert runs[0] == runs[1]
+        assert set(runs[0]) == {200, 503}
+
+    @allure.story("Fault Injection")
+    @allure.title("Test configure() changes fault injection on a running server")
+    @pytest.mark.unit
+    def test_configure(self):
+        with MockServer(seed=1) as server:
+            assert _statuses(server, 5) == [200] * 5
+            server.configure(error_rate=1.0, error_status=500)
+            assert _statuses(server, 5) == [500] * 5
+            server.configure(error_rate=0.0)
+            assert _statuses(server, 5) == [200] * 5
+            assert server.requests == 15
+            with pytest.raises(ValueError, match="Unknown mock server option 'seed'"):
+                server.configure(seed=2)
+
+    @allure.story("Subprocess")
+    @allure.title("Test the subprocess server serves requests and stops")
+    @pytest.mark.unit
+    def test_spawn(self):
+        with MockServer.spawn(error_rate=0.0) as server:
+            assert requests.get(f"{server.base_url}/users/2").json()['data']['id'] == 2
+        assert server.process.poll() is not None
+
+    @allure.story("Subprocess")
+    @allure.title("Test a subprocess that cannot listen raises RuntimeError")
+    @pytest.mark.unit
+    def test_spawn_failure(self, local_server):
+        with pytest.raises(RuntimeError, match="failed to start"):
+            MockServer.spawn(port=local_server.port)  # 端口已被占用
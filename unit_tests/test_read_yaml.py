@@ -0,0 +1,166 @@
+import json
+import os
+
+import pytest
+import allure
+import yaml
+
+from common import read_yaml as read_yaml_module
+from common.read_yaml import iter_cases, load_case_refs, read_yaml
+
+ANCHORS_YAML = """\
+- test_id: base
+  payload: &defaults
+    name: morpheus
+    job: leader
+  expected_status: 201
+- test_id: merged
+  payload:
+    <<: *defaults
+    name: neo
+  expected_status: 201
+-   test_id: "quoted: id"
+    payload: {name: trinity, tags: [a, b]}
+- test_id: 7
+  payload: null
+"""
+
+MULTI_DOCUMENT_YAML = """\
+test_id: first
+payload: {name: a}
+---
+- test_id: second
+  payload: {name: b}
+- test_id: third
+  payload: {name: c}
+---
+test_id: fourth
+payload: {name: d}
+"""
+
+JSONL = """\
+{"test_id": "a", "payload": {"name": "a"}}
+
+# 注释行
+{"test_id": "b", "payload": {"name": "b", "text": "line\\nbreak"}}
+{"payload": {"name": "no id"}}
+"""
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    """在临时目录中写入数据文件，索引写入临时目录 (不污染 .cache/testdata)"""
+    monkeypatch.setattr(read_yaml_module, 'INDEX_DIR', str(tmp_path / 'index'))
+
+    def write(name, text):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        return str(path)
+    return write
+
+
+@pytest.fixture
+def builds(monkeypatch):
+    """记录索引被重建的次数"""
+    calls = []
+    build = read_yaml_module._build_index_entries
+
+    def counting_build(full_path):
+        calls.append(full_path)
+        return build(full_path)
+    monkeypatch.setattr(read_yaml_module, '_build_index_entries', counting_build)
+    return calls
+
+
+@allure.feature("Test Data")
+class TestCaseIndex:
+
+    @allure.story("CaseRef")
+    @allure.title("Test CaseRef.load matches read_yaml for the project data file")
+    @pytest.mark.unit
+    def test_project_data_file(self):
+        file_path = 'data/user_creation_data.yaml'
+        refs = load_case_refs(file_path)
+        cases = read_yaml(file_path)
+        assert [ref.load() for ref in refs] == cases
+        assert list(iter_cases(file_path)) == cases
+
+    @allure.story("CaseRef")
+    @allure.title("Test anchors and merge keys load the same as read_yaml")
+    @pytest.mark.unit
+    def test_anchors_and_merge_keys(self, data_file):
+        path = data_file('anchors.yaml', ANCHORS_YAML)
+        refs = load_case_refs(path)
+        cases = read_yaml(path)
+        assert [ref.case_id for ref in refs] == ['base', 'merged', 'quoted: id', '7']
+        for i, ref in enumerate(refs):
+            assert ref.load() == cases[i]
+        assert cases[1]['payload'] == {'name': 'neo', 'job': 'leader'}
+
+    @allure.story("CaseRef")
+    @allure.title("Test multi-document YAML yields list items and mapping documents")
+    @pytest.mark.unit
+    def test_multi_document_yaml(self, data_file):
+        path = data_file('multi.yaml', MULTI_DOCUMENT_YAML)
+        expected = []
+        for document in yaml.safe_load_all(MULTI_DOCUMENT_YAML):
+            expected.extend(document if isinstance(document, list) else [document])
+        refs = load_case_refs(path)
+        assert [ref.case_id for ref in refs] == ['first', 'second', 'third', 'fourth']
+        assert [ref.load() for ref in refs] == expected
+        assert list(iter_cases(path)) == expected
+
+    @allure.story("CaseRef")
+    @allure.title("Test JSONL skips blank and comment lines and falls back to the ordinal id")
+    @pytest.mark.unit
+    def test_jsonl(self, data_file):
+        path = data_file('cases.jsonl', JSONL)
+        expected = [json.loads(line) for line in JSONL.splitlines() if line.startswith('{')]
+        refs = load_case_refs(path)
+        assert [ref.case_id for ref in refs] == ['a', 'b', 'data_index_2']
+        assert [ref.load() for ref in refs] == expected
+        assert list(iter_cases(path)) == expected
+
+    @allure.story("Index Cache")
+    @allure.title("Test the index is reused until the data file changes")
+    @pytest.mark.unit
+    def test_index_reused(self, data_file, builds):
+        path = data_file('anchors.yaml', ANCHORS_YAML)
+        first = load_case_refs(path)
+        second = load_case_refs(path)
+        assert len(builds) == 1
+        assert [(ref.offset, ref.length) for ref in first] == [(ref.offset, ref.length) for ref in second]
+
+    @allure.story("Index Cache")
+    @allure.title("Test the index is rebuilt when only the modification time changes")
+    @pytest.mark.unit
+    def test_rebuild_on_mtime_change(self, data_file, builds):
+        path = data_file('cases.yaml', ANCHORS_YAML)
+        load_case_refs(path)
+        data_file('cases.yaml', ANCHORS_YAML.replace('morpheus', 'oracle!!'))  # 大小不变
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        refs = load_case_refs(path)
+        assert len(builds) == 2
+        assert refs[0].load()['payload']['name'] == 'oracle!!'
+
+    @allure.story("Index Cache")
+    @allure.title("Test the index is rebuilt when only the size changes")
+    @pytest.mark.unit
+    def test_rebuild_on_size_change(self, data_file, builds):
+        path = data_file('cases.yaml', ANCHORS_YAML)
+        load_case_refs(path)
+        mtime_ns = os.stat(path).st_mtime_ns
+        data_file('cases.yaml', '# 新增的注释行\n' + ANCHORS_YAML)
+        os.utime(path, ns=(mtime_ns, mtime_ns))  # 修改时间不变
+        refs = load_case_refs(path)
+        assert len(builds) == 2
+        assert [ref.load() for ref in refs] == read_yaml(path)
+
+    @allure.story("Errors")
+    @allure.title("Test a missing or invalid data file returns None")
+    @pytest.mark.unit
+    def test_invalid_files(self, data_file, tmp_path):
+        assert load_case_refs(str(tmp_path / 'missing.yaml')) is None
+        assert load_case_refs(data_file('broken.yaml', '- test_id: a\n  payload: [1, 2\n')) is None
+        assert load_case_refs(data_file('broken.jsonl', '{"test_id": "a"}\n{broken\n')) is None
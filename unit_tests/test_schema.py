@@ -0,0 +1,106 @@
+import json
+
+import pytest
+import allure
+
+from common import schema as schema_module
+from common.schema import SchemaError, get_validator, validate_document, validate_response
+
+USER = {'id': 2, 'email': 'janet.weaver@reqres.in', 'first_name': 'Janet', 'last_name': 'Weaver',
+        'avatar': 'https://reqres.in/img/faces/2-image.jpg'}
+
+
+def _clear_caches():
+    schema_module._load_schema.cache_clear()
+    schema_module._registry.cache_clear()
+    get_validator.cache_clear()
+
+
+@pytest.fixture
+def schema_dir(tmp_path, monkeypatch):
+    """把 SCHEMA_DIR 指向临时目录，返回写入 schema 文件的函数；结束后清空编译缓存"""
+    monkeypatch.setattr(schema_module, 'SCHEMA_DIR', str(tmp_path))
+    _clear_caches()
+
+    def write(name, content):
+        path = tmp_path / name
+        path.write_text(content if isinstance(content, str) else json.dumps(content), encoding='utf-8')
+    yield write
+    _clear_caches()
+
+
+@allure.feature("JSON Schema")
+class TestSchema:
+
+    @allure.story("$ref")
+    @allure.title("Test a schema referencing another file validates live responses")
+    @pytest.mark.unit
+    def test_ref_between_files(self, local_client):
+        assert validate_response(local_client.get('/users/2'), 'single_user.json') == []
+        errors = validate_document('single_user.json', {'data': {**USER, 'id': 0, 'email': 'nope'}})
+        assert errors == [
+            "data.id: 0 is less than the minimum of 1",
+            "data.email: 'nope' does not match '^[^@\\\\s]+@[^@\\\\s]+$'",
+        ]
+
+    @allure.story("$ref")
+    @allure.title("Test a $ref is loaded from the schema directory once")
+    @pytest.mark.unit
+    def test_ref_loaded_once(self, schema_dir):
+        schema_dir('item.json', {'type': 'object', 'required': ['id']})
+        schema_dir('wrapper.json', {'type': 'object', 'properties': {'item': {'$ref': 'item.json'}}})
+        assert validate_document('wrapper.json', {'item': {}}) == ["item: 'id' is a required property"]
+        assert validate_document('wrapper.json', {'item': {}}) == ["item: 'id' is a required property"]
+        assert schema_module._load_schema.cache_info().misses == 2
+
+    @allure.story("Items Path")
+    @allure.title("Test errors inside list items report the item index")
+    @pytest.mark.unit
+    def test_items_path_locations(self, local_client):
+        response = local_client.get('/users', params={'page': 1})
+        assert validate_response(response, 'user.json', items_path='data') == []
+        document = {'data': [USER, {**USER, 'id': 'x'}, {k: v for k, v in USER.items() if k != 'avatar'}]}
+        assert validate_document('user.json', document, items_path='data') == [
+            "data[1].id: 'x' is not of type 'integer'",
+            "data[2]: 'avatar' is a required property",
+        ]
+
+    @allure.story("Items Path")
+    @allure.title("Test a missing path or a non-list at items_path is reported, not raised")
+    @pytest.mark.unit
+    def test_items_path_not_a_list(self):
+        assert validate_document('user.json', {'data': USER}, items_path='data') == [
+            "Expected a list at path 'data' (type: <class 'dict'>)"]
+        errors = validate_document('user.json', {'page': 1}, items_path='data')
+        assert len(errors) == 1 and 'data' in errors[0]
+
+    @allure.story("Max Errors")
+    @allure.title("Test the error list is truncated at max_errors")
+    @pytest.mark.unit
+    def test_max_errors(self):
+        document = {'data': [{'id': 0}] * 5}
+        errors = validate_document('user.json', document, items_path='data', max_errors=3)
+        assert len(errors) == 3
+        assert all(error.startswith('data[0]') for error in errors), errors
+        assert len(validate_document('user.json', document, items_path='data', max_errors=100)) == 5 * 5
+
+    @allure.story("Errors")
+    @allure.title("Test schema names outside the schema directory are rejected")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("name", ['../user_creation_data.yaml', '/etc/passwd', '../schemas_copy/user.json'])
+    def test_path_outside_schema_dir(self, name):
+        with pytest.raises(SchemaError, match="is outside"):
+            get_validator(name)
+
+    @allure.story("Errors")
+    @allure.title("Test a missing, malformed or invalid schema raises SchemaError")
+    @pytest.mark.unit
+    def test_invalid_schema(self, schema_dir):
+        schema_dir('broken.json', '{"type": ')
+        schema_dir('invalid.json', {'type': 'no-such-type'})
+        with pytest.raises(SchemaError, match="not found"):
+            validate_document('missing.json', {})
+        with pytest.raises(SchemaError, match="not valid JSON:"):
+            validate_document('broken.json', {})
+        with pytest.raises(SchemaError, match="not a valid JSON Schema"):
+            validate_document('invalid.json', {})
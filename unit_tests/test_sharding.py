@@ -0,0 +1,177 @@
+import json
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+import pytest
+import allure
+
+from common import sharding
+from common.read_yaml import load_case_refs
+from common.sharding import assign, configure_shard, is_presharded, select_shard
+from plugins.sharding import ShardingPlugin, merge_allure_results, merge_durations
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+KEYS = [f"api_tests/test_example.py::test_case[TC{index:03d}]" for index in range(200)]
+DURATIONS = {key: float(index % 17 + 1) for index, key in enumerate(KEYS[:150])}  # 后 50 个没有历史耗时
+
+
+@pytest.fixture(autouse=True)
+def _restore_shard():
+    """分片参数是模块级状态: 测试结束后恢复 (本次运行本身也可能是分片执行的)"""
+    settings, presharded = dict(sharding._settings), set(sharding._presharded)
+    sharding._presharded.clear()
+    yield
+    sharding._settings.update(settings)
+    sharding._presharded.clear()
+    sharding._presharded.update(presharded)
+
+
+def _partition(keys, num_shards, mode, durations=None):
+    shards = []
+    for shard_id in range(num_shards):
+        configure_shard(shard_id, num_shards, mode, durations)
+        shards.append(assign(keys))
+    return shards
+
+
+def _assert_partition(shards, keys):
+    assert set().union(*shards) == set(keys)
+    assert sum(len(shard) for shard in shards) == len(set(keys)), "Shards must be disjoint"
+
+
+class _Item:
+    def __init__(self, nodeid, params=None, markers=()):
+        self.nodeid = nodeid
+        self.callspec = SimpleNamespace(params=params) if params is not None else None
+        self._markers = markers
+
+    def iter_markers(self):
+        return iter(self._markers)
+
+
+def _collect(*args):
+    """在子进程中收集 api_tests (不执行)，返回 nodeid 列表"""
+    output = subprocess.run([sys.executable, '-m', 'pytest', 'api_tests', '--collect-only', '-q',
+                             '-p', 'no:cacheprovider', *args],
+                            cwd=PROJECT_ROOT, capture_output=True, text=True, check=True).stdout
+    return [line for line in output.splitlines() if line.startswith('api_tests/')]
+
+
+@allure.feature("Sharding")
+class TestSharding:
+
+    @allure.story("Assignment")
+    @allure.title("Test shards are disjoint and cover every key")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("mode", ['hash', 'duration'])
+    @pytest.mark.parametrize("num_shards", [1, 2, 3, 5])
+    def test_assign_partitions_keys(self, mode, num_shards):
+        _assert_partition(_partition(KEYS, num_shards, mode, DURATIONS), KEYS)
+
+    @allure.story("Assignment")
+    @allure.title("Test hash assignment is stable when other keys are added or removed")
+    @pytest.mark.unit
+    def test_hash_assignment_is_stable(self):
+        before = _partition(KEYS, 4, 'hash')
+        after = _partition(KEYS[::2] + ['api_tests/test_new.py::test_new'], 4, 'hash')
+        for old, new in zip(before, after):
+            assert set(KEYS[::2]) & old == set(KEYS[::2]) & new
+
+    @allure.story("Assignment")
+    @allure.title("Test duration assignment balances the estimated load")
+    @pytest.mark.unit
+    def test_duration_assignment_is_balanced(self):
+        shards = _partition(KEYS, 4, 'duration', DURATIONS)
+        default = 9.0  # 已知耗时的中位数，用于没有历史耗时的用例
+        loads = [sum(DURATIONS.get(key, default) for key in shard) for shard in shards]
+        assert max(loads) - min(loads) <= max(DURATIONS.values())
+
+    @allure.story("Data-driven Cases")
+    @allure.title("Test select_shard partitions data rows and marks them as presharded")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("mode", ['hash', 'duration'])
+    def test_select_shard(self, mode):
+        refs = load_case_refs('data/user_creation_data.yaml')
+        configure_shard(0, 1)
+        assert select_shard(refs) is refs
+        assert not any(is_presharded(ref) for ref in refs)
+
+        selected = []
+        for shard_id in range(3):
+            configure_shard(shard_id, 3, mode)
+            sharding._presharded.clear()
+            shard = select_shard(refs)
+            assert all(is_presharded(ref) for ref in shard)
+            assert not any(is_presharded(ref) for ref in refs if ref not in shard)
+            selected.append({ref.case_id for ref in shard})
+        _assert_partition(selected, [ref.case_id for ref in refs])
+
+    @allure.story("Collection")
+    @allure.title("Test the plugin deselects other shards' items and empty-parametrization placeholders")
+    @pytest.mark.unit
+    def test_plugin_deselects_items(self):
+        refs = load_case_refs('data/user_creation_data.yaml')
+        placeholder = SimpleNamespace(name='parametrize', args=('test_data', []))
+        kept = []
+        for shard_id in range(3):
+            configure_shard(shard_id, 3)
+            sharding._presharded.clear()
+            shard_refs = select_shard(refs)
+            items = ([_Item(key) for key in KEYS[:30]]
+                     + [_Item(f"test_users.py::test_create[{ref.case_id}]", {'test_data': ref}) for ref in shard_refs]
+                     + [_Item("test_users.py::test_create[test_data0]", {'test_data': None}, [placeholder])])
+            deselected = []
+            config = SimpleNamespace(hook=SimpleNamespace(pytest_deselected=lambda items: deselected.extend(items)))
+            ShardingPlugin().pytest_collection_modifyitems(None, config, items)
+            assert not any(item.nodeid.endswith('[test_data0]') for item in items)
+            assert len(items) + len(deselected) == 30 + len(shard_refs) + 1
+            kept.append({item.nodeid for item in items})
+        expected = KEYS[:30] + [f"test_users.py::test_create[{ref.case_id}]" for ref in refs]
+        _assert_partition(kept, expected)
+
+    @allure.story("Collection")
+    @allure.title("Test sharded collection of api_tests partitions the full collection")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("mode", ['hash', 'duration'])
+    def test_collection_partition(self, mode, tmp_path):
+        full = _collect()
+        durations = tmp_path / 'durations.json'
+        durations.write_text(json.dumps({nodeid: index + 1 for index, nodeid in enumerate(full)}), encoding='utf-8')
+        shards = [set(_collect('--num-shards=3', f'--shard-id={shard_id}', f'--shard-mode={mode}',
+                               f'--shard-durations={durations}'))
+                  for shard_id in range(3)]
+        assert any(nodeid.startswith('api_tests/test_users.py') and '[TC' in nodeid for nodeid in full)
+        _assert_partition(shards, full)
+
+    @allure.story("Merge")
+    @allure.title("Test merging shard durations keeps only nodeids")
+    @pytest.mark.unit
+    def test_merge_durations(self, tmp_path):
+        shard_files = []
+        for shard_id, nodeid in enumerate(["test_a.py::test_one[TC1]", "test_b.py::test_two"]):
+            path = tmp_path / f'impact-{shard_id}.json'
+            path.write_text(json.dumps({nodeid: {'fingerprint': 'f', 'outcome': 'passed', 'duration': 1.23456}}),
+                            encoding='utf-8')
+            shard_files.append(str(path))
+        output = tmp_path / 'durations.json'
+        durations = merge_durations(shard_files + [str(tmp_path / 'missing.json')], str(output))
+        assert durations == {"test_a.py::test_one[TC1]": 1.235, "test_b.py::test_two": 1.235}
+        assert json.loads(output.read_text(encoding='utf-8')) == durations
+
+    @allure.story("Merge")
+    @allure.title("Test merging allure-results copies every shard's files")
+    @pytest.mark.unit
+    def test_merge_allure_results(self, tmp_path):
+        source_dirs = []
+        for shard_id in range(2):
+            source = tmp_path / f'shard{shard_id}'
+            source.mkdir()
+            (source / f'{shard_id}-result.json').write_text('{}', encoding='utf-8')
+            (source / f'{shard_id}-attachment.txt').write_text('log', encoding='utf-8')
+            source_dirs.append(str(source))
+        output = tmp_path / 'allure-results'
+        assert merge_allure_results(source_dirs, str(output)) == 4
+        assert sorted(path.name for path in output.iterdir()) == [
+            '0-attachment.txt', '0-result.json', '1-attachment.txt', '1-result.json']
@@ -0,0 +1,105 @@
+import hashlib
+import io
+import os
+
+import pytest
+import allure
+import requests
+
+from core import api_client as api_client_module
+from core.cassette import Cassette
+from core.streaming import ChecksumMismatchError, NdjsonDecodeError, iter_ndjson
+
+
+def _response(body, url='http://local/export'):
+    """构造响应体为 body 的 requests.Response，用于精确控制 NDJSON 的行尾"""
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response.raw = io.BytesIO(body)
+    return response
+
+
+@allure.feature("Streaming")
+class TestStreaming:
+
+    @allure.story("NDJSON")
+    @allure.title("Test a line split across chunks is parsed once, in order")
+    @pytest.mark.unit
+    def test_line_split_across_chunks(self, local_client):
+        with local_client.stream('GET', '/users/export', params={'count': 50}) as response:
+            records = list(iter_ndjson(response, chunk_size=7))  # 7 字节的块必然把每一行切开
+        assert [record['id'] for record in records] == list(range(1, 51))
+
+    @allure.story("NDJSON")
+    @allure.title("Test the last line is returned without a trailing newline")
+    @pytest.mark.unit
+    def test_last_line_without_newline(self):
+        records = list(iter_ndjson(_response(b'{"id": 1}\n\n{"id": 2}'), chunk_size=4))
+        assert records == [{'id': 1}, {'id': 2}]
+
+    @allure.story("NDJSON")
+    @allure.title("Test an invalid line reports its line number")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("body, line", [
+        (b'{"id": 1}\n{"id": \n{"id": 3}\n', 2),
+        (b'{"id": 1}\n\n{"id": 3}\nnot json', 4),
+    ])
+    def test_decode_error_line_number(self, body, line):
+        with pytest.raises(NdjsonDecodeError, match=f"line {line} of http://local/export"):
+            list(iter_ndjson(_response(body), chunk_size=5))
+
+    @allure.story("Download")
+    @allure.title("Test a matching checksum renames the part file to the target")
+    @pytest.mark.unit
+    def test_download_checksum(self, local_client, tmp_path):
+        path = tmp_path / 'export.ndjson'
+        with local_client.stream('GET', '/users/export', params={'count': 20}) as response:
+            expected = hashlib.sha256(response.content).hexdigest()
+        result = local_client.download('/users/export', str(path), checksum=expected.upper(), params={'count': 20})
+        assert result.checksum == expected
+        assert result.size == path.stat().st_size
+        assert os.listdir(tmp_path) == ['export.ndjson']
+
+    @allure.story("Download")
+    @allure.title("Test a checksum mismatch raises and removes the part file")
+    @pytest.mark.unit
+    def test_download_checksum_mismatch(self, local_client, tmp_path):
+        path = tmp_path / 'export.ndjson'
+        with pytest.raises(ChecksumMismatchError, match="sha256 mismatch"):
+            local_client.download('/users/export', str(path), checksum='0' * 64, params={'count': 20})
+        assert os.listdir(tmp_path) == []
+
+    @allure.story("Upload")
+    @allure.title("Test a generator upload is sent once and not retried")
+    @pytest.mark.unit
+    def test_generator_upload_not_retried(self, local_client, local_server):
+        def body():
+            yield b'a' * 10
+            yield b'b' * 10
+
+        requests_before = local_server.requests
+        local_server.configure(error_rate=1.0, error_status=503)  # 503 在重试列表中，PUT 是幂等方法
+        try:
+            response = local_client.upload('/uploads', body(), method='PUT')
+        finally:
+            local_server.configure(error_rate=0.0)
+        assert response.status_code == 503
+        assert local_server.requests - requests_before == 1, "A consumed generator cannot be replayed"
+
+        response = local_client.upload('/uploads', body(), method='PUT')
+        assert response.json() == {'size': 20, 'sha256': hashlib.sha256(b'a' * 10 + b'b' * 10).hexdigest()}
+
+    @allure.story("Logging")
+    @allure.title("Test TRACE logging does not read a streamed body while recording")
+    @pytest.mark.unit
+    def test_trace_skips_streamed_body_when_recording(self, local_client, tmp_path, monkeypatch):
+        def read_body(response):
+            raise AssertionError("Streamed response body must not be logged")
+
+        monkeypatch.setattr(api_client_module, 'is_enabled', lambda level: True)
+        monkeypatch.setattr(local_client, '_log_response_body', read_body)
+        local_client.cassette = Cassette(str(tmp_path), name='unit', mode='record')
+        with local_client.stream('GET', '/users/export', params={'count': 10}) as response:
+            assert not response._content_consumed
+            assert len(list(iter_ndjson(response))) == 10
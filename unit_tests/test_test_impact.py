@@ -0,0 +1,96 @@
+from types import SimpleNamespace
+
+import pytest
+import allure
+
+from plugins.test_impact import FRAMEWORK_SOURCES, TestImpactPlugin, framework_digest
+
+WORKFLOW = """name: lifecycle
+steps:
+  - name: create
+    request: {method: POST, url: /users}
+    expect: {status_code: 201}
+"""
+
+
+class _Config:
+    """TestImpactPlugin 只用到 getoption / rootpath / hook.pytest_deselected"""
+
+    def __init__(self, rootpath, impact_file, **options):
+        self.rootpath = rootpath
+        self.options = {'--impact': True, '--impact-reset': False, '--impact-file': str(impact_file), **options}
+        self.deselected = []
+        self.hook = SimpleNamespace(pytest_deselected=lambda items: self.deselected.extend(items))
+
+    def getoption(self, name):
+        return self.options[name]
+
+
+def _workflow_test(workflow_file):
+    pass
+
+
+def _item(workflow_file):
+    return SimpleNamespace(nodeid=f"api_tests/test_workflows.py::test_workflow[{workflow_file}]",
+                           function=_workflow_test, callspec=SimpleNamespace(params={'workflow_file': workflow_file}))
+
+
+def _select(tmp_path, items):
+    """模拟一次 --impact 收集，返回 (保留的用例, 取消选择的用例)"""
+    config = _Config(tmp_path, tmp_path / 'impact.json')
+    plugin = TestImpactPlugin(config)
+    plugin.pytest_collection_modifyitems(None, config, items)
+    return plugin, items, config.deselected
+
+
+def _record_pass(plugin, items):
+    for item in items:
+        plugin.pytest_runtest_logreport(SimpleNamespace(nodeid=item.nodeid, failed=False, skipped=False, duration=0.1,
+                                                        impact_fingerprint=plugin.fingerprints[item.nodeid]))
+    plugin.pytest_sessionfinish(None, pytest.ExitCode.OK)
+
+
+@allure.feature("Test Impact")
+class TestTestImpact:
+
+    @allure.story("Fingerprint")
+    @allure.title("Test editing a workflow file passed as a path parameter re-selects the test")
+    @pytest.mark.unit
+    def test_workflow_edit_reselects_test(self, tmp_path, monkeypatch):
+        monkeypatch.setattr('plugins.test_impact.is_xdist_worker', lambda: False)  # 本测试自己写入记录文件
+        workflow = tmp_path / 'data' / 'workflows' / 'user_lifecycle.yaml'
+        workflow.parent.mkdir(parents=True)
+        workflow.write_text(WORKFLOW, encoding='utf-8')
+        param = 'data/workflows/user_lifecycle.yaml'
+
+        plugin, items, deselected = _select(tmp_path, [_item(param)])
+        assert len(items) == 1 and not deselected
+        _record_pass(plugin, items)
+
+        _, items, deselected = _select(tmp_path, [_item(param)])
+        assert not items and len(deselected) == 1, "Unchanged test that passed should be deselected"
+
+        workflow.write_text(WORKFLOW.replace('201', '299'), encoding='utf-8')
+        _, items, deselected = _select(tmp_path, [_item(param)])
+        assert len(items) == 1 and not deselected, "Test should be re-selected after its workflow file changed"
+
+    @allure.story("Fingerprint")
+    @allure.title("Test workflow and schema files are part of the framework digest")
+    @pytest.mark.unit
+    def test_framework_digest_covers_data_files(self, tmp_path):
+        assert 'data/workflows/*.yaml' in FRAMEWORK_SOURCES and 'data/schemas/*.json' in FRAMEWORK_SOURCES
+        (tmp_path / 'data' / 'schemas').mkdir(parents=True)
+        schema = tmp_path / 'data' / 'schemas' / 'user.json'
+        schema.write_text('{"type": "object"}', encoding='utf-8')
+        before = framework_digest(str(tmp_path))
+        schema.write_text('{"type": "object", "required": ["id"]}', encoding='utf-8')
+        assert framework_digest(str(tmp_path)) != before
+
+    @allure.story("Fingerprint")
+    @allure.title("Test string parameters that are not file paths are fingerprinted by value")
+    @pytest.mark.unit
+    def test_plain_string_param(self, tmp_path):
+        plugin, _, _ = _select(tmp_path, [])
+        first = plugin.fingerprint(_item('not/a/file.yaml'))
+        assert plugin.fingerprint(_item('not/a/file.yaml')) == first
+        assert plugin.fingerprint(_item('other')) != first
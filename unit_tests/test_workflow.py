@@ -0,0 +1,163 @@
+import threading
+import time
+
+import pytest
+import allure
+
+from core.workflow import Workflow, WorkflowError, WorkflowRunner
+
+LATENCY_MS = 100
+
+
+def _step(step_id, method='GET', endpoint='/users/2', **fields):
+    return {'id': step_id, 'method': method, 'endpoint': endpoint, **fields}
+
+
+@pytest.fixture
+def calls(local_client, monkeypatch):
+    """记录每个请求的 (method, endpoint, 开始时间, 结束时间)"""
+    recorded = []
+    lock = threading.Lock()
+    request = local_client.request
+
+    def recording_request(method, endpoint, **kwargs):
+        start = time.perf_counter()
+        try:
+            return request(method, endpoint, **kwargs)
+        finally:
+            with lock:
+                recorded.append((method, endpoint, start, time.perf_counter()))
+
+    monkeypatch.setattr(local_client, 'request', recording_request)
+    return recorded
+
+
+@pytest.fixture
+def slow_server(local_server):
+    local_server.configure(latency_ms=LATENCY_MS)
+    yield local_server
+    local_server.configure(latency_ms=0)
+
+
+@allure.feature("Workflows")
+class TestWorkflowDefinition:
+
+    @allure.story("Validation")
+    @allure.title("Test the topological order follows chains, templates and depends_on")
+    @pytest.mark.unit
+    def test_order(self):
+        workflow = Workflow({
+            'setup': [_step('base')],
+            'chains': {
+                'a': [_step('a1', 'POST', '/users'), _step('a2', 'PUT', '/users/{{a1.id}}')],
+                'b': [_step('b1', 'POST', '/users', json={'name': '{{base.data.first_name}}'}),
+                      _step('b2', depends_on=['a2'])],
+            },
+        })
+        order = workflow.order
+        assert order.index('a1') < order.index('a2') < order.index('b2')
+        assert order.index('base') < order.index('b1') < order.index('b2')
+        assert workflow.steps['b1'].depends_on == {'base'}
+
+    @allure.story("Validation")
+    @allure.title("Test invalid workflows are rejected when loaded")
+    @pytest.mark.unit
+    @pytest.mark.parametrize("definition, message", [
+        ({'steps': [_step('a', depends_on=['b']), _step('b', depends_on=['a'])]}, 'Circular dependency'),
+        ({'steps': [_step('a', endpoint='/users/{{a.id}}')]}, 'Circular dependency'),
+        ({'steps': [_step('a', depends_on=['missing'])]}, r"unknown steps \['missing'\]"),
+        ({'steps': [_step('a', endpoint='/users/{{ghost.id}}')]}, r"unknown steps \['ghost'\]"),
+        ({'steps': [_step('a'), _step('a')]}, "Duplicate step id 'a'"),
+        ({'steps': [{'method': 'GET', 'endpoint': '/users'}]}, "without 'id'"),
+        ({'steps': [_step('a', expect={'status': 200})]}, r"Unknown expect fields \['status'\]"),
+        ({'steps': [_step('a', expect=[200])]}, 'must be a mapping'),
+    ])
+    def test_invalid_definition(self, definition, message):
+        with pytest.raises(WorkflowError, match=message):
+            Workflow(definition)
+
+
+@allure.feature("Workflows")
+class TestWorkflowRunner:
+
+    @allure.story("Scheduling")
+    @allure.title("Test steps wait for their dependencies and independent chains run in parallel")
+    @pytest.mark.unit
+    def test_chains_run_in_parallel(self, local_client, slow_server, calls):
+        workflow = Workflow({'chains': {
+            'neo': [_step('create_neo', 'POST', '/users', json={'name': 'neo'}, expect={'status_code': 201}),
+                    _step('get_neo', endpoint='/users/{{create_neo.id}}', expect={'status_code': 404})],
+            'trinity': [_step('create_trinity', 'POST', '/users', json={'name': 'trinity'}),
+                        _step('update_trinity', 'PUT', '/users/{{create_trinity.id}}', json={'job': 'pilot'},
+                              expect={'values': {'job': 'pilot'}})],
+        }})
+        start = time.perf_counter()
+        result = WorkflowRunner(local_client, max_workers=4).run(workflow)
+        elapsed = time.perf_counter() - start
+        result.verify()
+
+        starts = {(method, endpoint): begin for method, endpoint, begin, _ in calls}
+        first_post_end = min(end for method, _, _, end in calls if method == 'POST')
+        neo_id, trinity_id = (result.responses[f'create_{name}'].json()['id'] for name in ('neo', 'trinity'))
+        # 链中的第二步引用第一步的响应，只能在 POST 完成之后开始
+        assert starts[('GET', f'/users/{neo_id}')] >= first_post_end
+        assert starts[('PUT', f'/users/{trinity_id}')] >= first_post_end
+        # 两条链各两个步骤: 并发执行时约 2 个延迟，串行需要 4 个
+        assert elapsed < 3.5 * LATENCY_MS / 1000
+
+    @allure.story("Failures")
+    @allure.title("Test a failed step skips its dependents while unrelated chains continue")
+    @pytest.mark.unit
+    def test_failure_skips_dependents(self, local_client):
+        workflow = Workflow({'chains': {
+            'broken': [_step('wrong_status', expect={'status_code': 201}), _step('after_wrong')],
+            'bad_request': [_step('bad_timeout', timeout='soon'), _step('after_bad', depends_on=['bad_timeout'])],
+            'ok': [_step('fine', endpoint='/users/3'), _step('fine_too', endpoint='/users/{{fine.data.id}}')],
+            'join': [_step('needs_both', depends_on=['fine_too', 'after_wrong'])],
+        }})
+        result = WorkflowRunner(local_client).run(workflow)
+        assert sorted(result.failures) == ['bad_timeout', 'wrong_status']
+        assert 'Expected status code 201' in result.failures['wrong_status']
+        assert result.failures['bad_timeout'].startswith('ValueError')
+        assert result.skipped == {'after_wrong': 'wrong_status', 'needs_both': 'wrong_status',
+                                  'after_bad': 'bad_timeout'}
+        assert result.responses['fine_too'].json()['data']['id'] == 3
+        with pytest.raises(AssertionError, match="step 'needs_both': skipped, blocked by failed step 'wrong_status'"):
+            result.verify()
+
+    @allure.story("Failures")
+    @allure.title("Test a template referencing a missing value fails only that step")
+    @pytest.mark.unit
+    def test_missing_template_value(self, local_client):
+        workflow = Workflow({'steps': [_step('user'), _step('next', endpoint='/users/{{user.data.missing}}')]})
+        result = WorkflowRunner(local_client).run(workflow)
+        assert list(result.failures) == ['next'] and 'JsonPathError' in result.failures['next']
+
+    @allure.story("Setup Cache")
+    @allure.title("Test shared setup responses are requested once per runner")
+    @pytest.mark.unit
+    def test_shared_setup_cache(self, local_client, calls):
+        def workflow(name):
+            return Workflow({'name': name, 'setup': [_step('janet', expect={'status_code': 200})],
+                             'steps': [_step('copy', 'POST', '/users', json={'name': '{{janet.data.first_name}}'},
+                                             expect={'values': {'name': 'Janet'}})]})
+
+        runner = WorkflowRunner(local_client)
+        for name in ('first', 'second', 'third'):
+            runner.run(workflow(name)).verify()
+        assert [endpoint for method, endpoint, _, _ in calls if method == 'GET'] == ['/users/2']
+        assert len([call for call in calls if call[0] == 'POST']) == 3
+
+        WorkflowRunner(local_client).run(workflow('new runner')).verify()
+        assert len([call for call in calls if call[0] == 'GET']) == 2
+
+    @allure.story("Setup Cache")
+    @allure.title("Test a failed setup step is not cached")
+    @pytest.mark.unit
+    def test_failed_setup_not_cached(self, local_client, calls):
+        definition = {'setup': [_step('janet', expect={'status_code': 201})], 'steps': [_step('after', depends_on=['janet'])]}
+        runner = WorkflowRunner(local_client)
+        for _ in range(2):
+            result = runner.run(Workflow(definition))
+            assert list(result.failures) == ['janet'] and result.skipped == {'after': 'janet'}
+        assert len(calls) == 2